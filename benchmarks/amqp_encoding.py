@@ -0,0 +1,80 @@
+"""Benchmark for AMQP payload encodings.
+
+Measures the CPU time to encode a Deku client message and the size of the
+encoded body for each payload encoding: JSON, MessagePack (if installed),
+and both compressed with gzip, for short and long message contents.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.offline import BENCHMARK_ENV
+
+CONTENT_LENGTHS = (160, 4000)
+
+
+def process_time_us(run, runs: int) -> list:
+    """Call run repeatedly and measure each call's CPU time in microseconds."""
+
+    run()
+    timings = []
+
+    for _ in range(runs):
+        start = time.process_time()
+        run()
+        timings.append((time.process_time() - start) * 1_000_000)
+
+    return timings
+
+
+def main():
+    """Command line interface for the AMQP encoding benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark AMQP payload encodings")
+    parser.add_argument("--runs", type=int, default=2000, help="timed runs per case")
+    args = parser.parse_args()
+
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+    # pylint: disable=import-outside-toplevel
+    from src.utils import message_encoding
+
+    encodings = {
+        content_type.split("/")[-1]: content_type
+        for content_type in (message_encoding.JSON, message_encoding.MSGPACK)
+        if content_type in message_encoding.SERIALIZERS
+    }
+    results = {}
+
+    for length in CONTENT_LENGTHS:
+        body = {
+            "id": "SMbenchmark0000000000000000000000",
+            "to": "+237650000000",
+            "body": ("Deku benchmark message " * (length // 23 + 1))[:length],
+        }
+
+        for name, content_type in encodings.items():
+            for compression in (None, "gzip"):
+                encoding = message_encoding.Encoding(content_type, compression)
+                data, applied = encoding.encode(body)
+                encode_us = statistics.median(
+                    process_time_us(lambda: encoding.encode(body), args.runs)
+                )
+                case = f"{name}_{compression}" if compression else name
+                results[f"content_{length}_{case}"] = {
+                    "encode_cpu_us": round(encode_us, 2),
+                    "body_bytes": len(data),
+                    "content_encoding": applied,
+                }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.amqp_encoding --runs 2000
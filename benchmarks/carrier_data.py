@@ -0,0 +1,95 @@
+"""Benchmark for loading the carrier reference data.
+
+Compares importing the MCCMNC.py source tables with memory-mapping the
+compact carrier data file, each in a fresh interpreter. Reports load time and
+the growth of the process resident set size.
+"""
+
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Standard library modules a worker has already imported are loaded before
+# measuring, so only the carrier data itself is counted.
+LOAD_SCRIPT = """
+import bisect, functools, mmap, os, struct, threading, time
+
+def rss():
+    with open("/proc/self/statm", encoding="utf-8") as statm:
+        return int(statm.read().split()[1]) * {page_size}
+
+before = rss()
+start = time.perf_counter()
+{load}
+print(time.perf_counter() - start, rss() - before)
+"""
+
+LOADERS = {
+    "source_tables": (
+        "from src.utils.std_carrier_lib import MCCMNC\n"
+        "MCCMNC.MCC_dict[624], MCCMNC.MNC_dict[(624, 1)]"
+    ),
+    "carrier_data": (
+        "from src.utils.std_carrier_lib.carrier_data import get_carrier_data\n"
+        "get_carrier_data().get_mcc(624), get_carrier_data().get_operator_name(62401)"
+    ),
+}
+
+
+def measure_load(load: str, runs: int) -> dict:
+    """Load carrier data in fresh interpreters and measure it.
+
+    :param load: Python source that loads and queries the data.
+    :param runs: Number of interpreters to spawn.
+    :return: Load time in milliseconds and RSS growth in KiB.
+    """
+
+    script = LOAD_SCRIPT.format(page_size=os.sysconf("SC_PAGE_SIZE"), load=load)
+    times = []
+    rss = []
+
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        load_time, rss_growth = output.stdout.split()
+        times.append(float(load_time) * 1000)
+        rss.append(int(rss_growth) / 1024)
+
+    return {
+        "load_ms": round(statistics.median(times), 3),
+        "rss_kib": round(statistics.median(rss), 1),
+    }
+
+
+def main():
+    """Command line interface for the carrier data benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark carrier data loading")
+    parser.add_argument(
+        "--runs", type=int, default=10, help="number of interpreters to spawn"
+    )
+    args = parser.parse_args()
+
+    # Workers load cached bytecode, so make sure it exists for both loaders.
+    compileall.compile_dir(os.path.join(ROOT_DIR, "src"), quiet=1)
+
+    results = {name: measure_load(load, args.runs) for name, load in LOADERS.items()}
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.carrier_data --runs 10
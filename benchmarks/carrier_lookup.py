@@ -0,0 +1,110 @@
+"""Benchmark for operator code resolution.
+
+Compares the former nested scan over the MCC/MNC tables with the reverse
+indexes used by CarrierInformation.get_operator_code. Country and operator
+names are resolved once up front from example mobile numbers of every region,
+so only the table lookups are timed.
+"""
+
+import argparse
+import json
+import time
+
+import phonenumbers
+from phonenumbers import geocoder
+
+from src.utils.std_carrier_lib import MCCMNC
+from src.utils.std_carrier_lib.helpers import CarrierInformation
+
+
+def legacy_resolve_operator_code(country: str, operator_name: str) -> str:
+    """The operator code resolution before the reverse indexes were added."""
+
+    for IMSI, values in MCCMNC.MCC_dict.items():
+        if country == values[0]:
+            for key, values in MCCMNC.MNC_dict.items():
+                if IMSI == key[0] and operator_name == values[1]:
+                    return str(values[0])
+
+    return None
+
+
+def example_operators() -> list:
+    """Country, call code and operator name of example mobile numbers."""
+
+    operators = []
+
+    for region in sorted(phonenumbers.SUPPORTED_REGIONS):
+        number = phonenumbers.example_number_for_type(
+            region, phonenumbers.PhoneNumberType.MOBILE
+        )
+
+        if number:
+            operators.append(
+                (
+                    geocoder.description_for_number(number, "en"),
+                    f"+{number.country_code}",
+                    phonenumbers.carrier.name_for_number(number, "en"),
+                )
+            )
+
+    return operators
+
+
+def time_lookups(lookup, operators: list, rounds: int) -> float:
+    """Time a lookup function over the operators.
+
+    :param lookup: The lookup function to call per operator.
+    :param operators: (country, call code, operator name) tuples.
+    :param rounds: Number of passes over the operators.
+    :return: Mean microseconds per lookup.
+    """
+
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for operator in operators:
+            lookup(*operator)
+
+    return (time.perf_counter() - start) / (rounds * len(operators)) * 1e6
+
+
+def main():
+    """Command line interface for the carrier lookup benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark operator code lookups")
+    parser.add_argument("--rounds", type=int, default=100, help="passes over data")
+    args = parser.parse_args()
+
+    carrier_information = CarrierInformation()
+    operators = example_operators()
+
+    def before(country, _, operator_name):
+        return legacy_resolve_operator_code(country, operator_name)
+
+    def after(country, call_code, operator_name):
+        return carrier_information.__resolve_operator_code__(
+            country=country, call_code=call_code, operator_name=operator_name
+        )
+
+    before_us = time_lookups(before, operators, args.rounds)
+    after_us = time_lookups(after, operators, args.rounds)
+
+    print(
+        json.dumps(
+            {
+                "operators": len(operators),
+                "rounds": args.rounds,
+                "before_us_per_lookup": round(before_us, 3),
+                "after_us_per_lookup": round(after_us, 3),
+                "speedup": round(before_us / after_us, 2),
+            },
+            indent=4,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.carrier_lookup --rounds 100
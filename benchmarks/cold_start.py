@@ -0,0 +1,95 @@
+"""Benchmark for worker cold start latency.
+
+Spawns fresh interpreters that import the WSGI application the same way a
+mod_wsgi process does, and reports how long each one takes to be ready to
+serve. Module imports do no database or broker I/O, so this runs without
+MySQL or RabbitMQ.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARK_ENV = {
+    "ENCRYPTION_KEY": "0" * 32,
+    "HASH_SALT": "benchmark",
+    "ORIGINS": "[]",
+    "RABBITMQ_SSL_ACTIVE": "false",
+}
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import wsgi_script
+print(time.perf_counter() - start)
+"""
+
+
+def measure_cold_start(runs: int) -> dict:
+    """Spawn interpreters importing the application and time them.
+
+    :param runs: Number of interpreters to spawn.
+    :return: Process and import timings in milliseconds.
+    """
+
+    env = {**BENCHMARK_ENV, **os.environ}
+    process_times = []
+    import_times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            cwd=ROOT_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        process_times.append((time.perf_counter() - start) * 1000)
+        import_times.append(float(output.stdout.strip().splitlines()[-1]) * 1000)
+
+    return {
+        "runs": runs,
+        "process_ms": summarize(process_times),
+        "import_ms": summarize(import_times),
+    }
+
+
+def summarize(samples: list) -> dict:
+    """Summarize timing samples.
+
+    :param samples: Timings in milliseconds.
+    :return: Minimum, median, mean and maximum of the samples.
+    """
+
+    return {
+        "min": round(min(samples), 3),
+        "median": round(statistics.median(samples), 3),
+        "mean": round(statistics.mean(samples), 3),
+        "max": round(max(samples), 3),
+    }
+
+
+def main():
+    """Command line interface for the cold start benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark worker cold start")
+    parser.add_argument(
+        "--runs", type=int, default=10, help="number of interpreters to spawn"
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(measure_cold_start(runs=args.runs), indent=4))
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.cold_start --runs 20
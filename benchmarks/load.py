@@ -0,0 +1,420 @@
+"""Load generator for end-to-end publish throughput.
+
+Provisions synthetic accounts and projects, then drives
+POST /v1/projects/<reference>/services/sms at a target request rate with
+generated JSON or CSV payloads, and reports the sustained message rate,
+latency percentiles and errors.
+
+Requests are scheduled open-loop: each request has a fixed send time, and
+latency is measured from that time, so a saturated server shows up as
+growing latency instead of silently lowering the request rate.
+
+Without --target, the application is served in-process on SQLite with the
+stand-in broker of benchmarks.offline. To size mod_wsgi processes and
+threads, serve benchmarks/wsgi_offline.py with mod_wsgi-express and pass its
+URL as --target and its SQLite file as --database. Against a server with a
+real database, accounts are provisioned through the API instead.
+"""
+
+import argparse
+import io
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks import offline, payloads
+
+USER_AGENT = "deku-load"
+PASSWORD = "Load-Test-Passw0rd!"
+PUBLISHED_METRIC = "deku_messages_published_total"
+
+
+class Account:
+    """A provisioned account and the projects it publishes to."""
+
+    def __init__(self, account_sid: str, auth_token: str, references: list):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.references = references
+
+
+def provision_offline(env: offline.Environment, users: int, projects: int) -> list:
+    """Create accounts and projects directly in the offline database."""
+
+    # pylint: disable=import-outside-toplevel
+    from src.controllers import project
+
+    accounts = []
+    run_id = uuid.uuid4().hex[:8]
+
+    with env.database.connection_context():
+        for index in range(users):
+            user = offline.create_account(
+                email=f"load-{run_id}-{index}@example.com", password=PASSWORD
+            )
+            references = [
+                project.create_project(
+                    friendly_name=f"Load {index}.{number}",
+                    description="Load test project",
+                    user_id=user.id,
+                )["reference"]
+                for number in range(projects)
+            ]
+            accounts.append(Account(user.account_sid, user.auth_token, references))
+
+    return accounts
+
+
+def provision_http(target: str, users: int, projects: int) -> list:
+    """Create accounts and projects through the API of the target."""
+
+    accounts = []
+    run_id = uuid.uuid4().hex[:8]
+
+    for index in range(users):
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        credentials = {"email": f"load-{run_id}-{index}@example.com"}
+        credentials["password"] = PASSWORD
+
+        session.post(f"{target}/v1/signup", json=credentials).raise_for_status()
+        response = session.post(f"{target}/v1/login", json=credentials)
+        response.raise_for_status()
+
+        references = []
+
+        for number in range(projects):
+            created = session.post(
+                f"{target}/v1/projects",
+                json={"friendly_name": f"Load {index}.{number}"},
+            )
+            created.raise_for_status()
+            references.append(created.json()["reference"])
+
+        accounts.append(
+            Account(
+                response.json()["account_sid"],
+                response.json()["auth_token"],
+                references,
+            )
+        )
+
+    return accounts
+
+
+def scrape_published(target: str) -> float:
+    """Total messages published according to the target's /metrics, or None."""
+
+    try:
+        response = requests.get(f"{target}/metrics", timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        return None
+
+    return sum(
+        float(line.rsplit(" ", 1)[1])
+        for line in response.text.splitlines()
+        if line.startswith(PUBLISHED_METRIC + "{")
+    )
+
+
+def serve(env: offline.Environment) -> str:
+    """Serve the offline application on a local port, returning its URL."""
+
+    # pylint: disable=import-outside-toplevel
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        """Does not log every request."""
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(
+        "127.0.0.1",
+        0,
+        env.app,
+        threaded=True,
+        request_handler=QuietRequestHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """The value at a fraction of an ordered list."""
+
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class LoadGenerator:
+    """
+    Sends publish requests at a fixed rate and records the outcomes.
+
+    Attributes:
+        target (str): The base URL of the server.
+        accounts (list): The accounts to publish as, used round-robin.
+        recipients (list): The recipient numbers payloads are drawn from.
+        batch_size (int): Messages per request.
+        payload_format (str): "json" or "csv".
+    """
+
+    def __init__(
+        self,
+        target: str,
+        accounts: list,
+        recipients: list,
+        batch_size: int,
+        payload_format: str,
+    ):
+        self.target = target
+        self.accounts = accounts
+        self.recipients = recipients
+        self.batch_size = batch_size
+        self.payload_format = payload_format
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = {}
+        self.accepted = 0
+
+    def session(self) -> requests.Session:
+        """The HTTP session of the calling worker thread."""
+
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+            self.local.session.headers["User-Agent"] = USER_AGENT
+
+        return self.local.session
+
+    def send(self, number: int, scheduled: float) -> None:
+        """Send one publish request, scheduled at a perf_counter time."""
+
+        account = self.accounts[number % len(self.accounts)]
+        reference = account.references[number % len(account.references)]
+        start = number * self.batch_size % len(self.recipients)
+        recipients = (self.recipients * 2)[start : start + self.batch_size]
+
+        if self.payload_format == "json":
+            request = {"json": payloads.json_payload(recipients)}
+        else:
+            request = {
+                "files": {
+                    "file": (
+                        "messages.csv",
+                        io.BytesIO(payloads.csv_payload(recipients)),
+                        "text/csv",
+                    )
+                }
+            }
+
+        error = None
+
+        try:
+            response = self.session().post(
+                f"{self.target}/v1/projects/{reference}/services/sms",
+                auth=(account.account_sid, account.auth_token),
+                timeout=60,
+                **request,
+            )
+
+            if response.status_code != 200:
+                error = f"status {response.status_code}"
+
+        except requests.exceptions.RequestException as exception:
+            error = type(exception).__name__
+
+        latency = (time.perf_counter() - scheduled) * 1000
+
+        with self.lock:
+            self.latencies.append(latency)
+
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            else:
+                self.accepted += len(recipients)
+
+    def run(self, rps: float, duration: float, concurrency: int) -> float:
+        """
+        Send requests at rps for duration seconds.
+
+        :return: The elapsed seconds until the last response.
+        """
+
+        total = int(rps * duration)
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for number in range(total):
+                scheduled = start + number / rps
+                delay = scheduled - time.perf_counter()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                executor.submit(self.send, number, scheduled)
+
+        return time.perf_counter() - start
+
+
+def wait_for_published(read_published, expected: float, timeout: float) -> float:
+    """Wait until expected messages are published or the count stalls."""
+
+    deadline = time.monotonic() + timeout
+    published = read_published()
+
+    while published is not None and published < expected:
+        if time.monotonic() >= deadline:
+            break
+
+        time.sleep(0.5)
+        current = read_published()
+
+        if current == published:
+            # Give stragglers one more interval, then stop waiting.
+            time.sleep(0.5)
+            current = read_published()
+
+            if current == published:
+                break
+
+        published = current
+
+    return published
+
+
+def main():
+    """Command line interface for the load generator."""
+
+    parser = argparse.ArgumentParser(description="Generate publish load")
+    parser.add_argument("--target", help="server URL (default: in-process server)")
+    parser.add_argument(
+        "--database", help="SQLite file of a benchmarks.wsgi_offline target"
+    )
+    parser.add_argument("--rps", type=float, default=10, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=32, help="client threads")
+    parser.add_argument("--batch-size", type=int, default=10, help="messages/request")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--users", type=int, default=5, help="accounts to provision")
+    parser.add_argument("--projects", type=int, default=2, help="projects/account")
+    parser.add_argument(
+        "--regions",
+        type=payloads.parse_weights,
+        default=payloads.DEFAULT_REGIONS,
+        help='recipient region weights, e.g. "CM=0.7,NG=0.3"',
+    )
+    parser.add_argument(
+        "--carriers",
+        type=payloads.parse_weights,
+        default={},
+        help='carrier weights per region, e.g. "CM:MTN Cameroon=0.8,CM:Orange=0.2"',
+    )
+    parser.add_argument(
+        "--broker-latency",
+        type=float,
+        default=0,
+        help="seconds the in-process stand-in broker takes per publish",
+    )
+    parser.add_argument("--drain", type=float, default=60, help="max drain seconds")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--logs", default="critical", help="Set log level")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.logs.upper()))
+    random.seed(args.seed)
+
+    env = None
+    target = args.target.rstrip("/") if args.target else None
+
+    if not target or args.database:
+        env = offline.setup(path=args.database, broker_latency=args.broker_latency)
+
+    if not target:
+        target = serve(env)
+
+    if env:
+        accounts = provision_offline(env, args.users, args.projects)
+    else:
+        accounts = provision_http(target, args.users, args.projects)
+
+    if env and not args.target:
+
+        def read_published():
+            return env.broker.published
+
+    else:
+
+        def read_published():
+            return scrape_published(target)
+
+    recipients = payloads.generate_recipients(
+        max(args.batch_size * 50, 1000),
+        regions=args.regions,
+        seed=args.seed,
+        carriers=args.carriers,
+    )
+    generator = LoadGenerator(
+        target=target,
+        accounts=accounts,
+        recipients=recipients,
+        batch_size=args.batch_size,
+        payload_format=args.format,
+    )
+
+    published_before = read_published()
+    start = time.perf_counter()
+    elapsed = generator.run(args.rps, args.duration, args.concurrency)
+    published = wait_for_published(
+        read_published,
+        expected=(published_before or 0) + generator.accepted,
+        timeout=args.drain,
+    )
+    drained = time.perf_counter() - start
+
+    latencies = sorted(generator.latencies)
+    requests_sent = len(latencies)
+
+    report = {
+        "target": target,
+        "format": args.format,
+        "batch_size": args.batch_size,
+        "target_rps": args.rps,
+        "duration_s": round(elapsed, 3),
+        "requests": requests_sent,
+        "achieved_rps": round(requests_sent / elapsed, 2),
+        "messages_accepted": generator.accepted,
+        "accepted_messages_per_second": round(generator.accepted / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        }
+        if latencies
+        else None,
+        "errors": generator.errors,
+    }
+
+    if published is not None and published_before is not None:
+        report["messages_published"] = int(published - published_before)
+        report["published_messages_per_second"] = round(
+            (published - published_before) / drained, 1
+        )
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.load --rps 20 --duration 30 --batch-size 50 --regions "CM=0.7,NG=0.3"
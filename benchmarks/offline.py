@@ -0,0 +1,338 @@
+"""Offline environment for benchmarks.
+
+Runs the application in-process without external services:
+
+- The peewee database is swapped for SQLite (unless MySQL is requested, in
+  which case the MYSQL_* settings are used as configured).
+- The RabbitMQ management API and AMQP broker are replaced with in-process
+  fakes behind the `requests` and `pika` names used by src.utils.rabbitmq, so
+  the real management and publish code paths still run up to the wire.
+
+`setup` must be called before anything under src is imported, since models
+bind to the database when they are imported.
+"""
+
+import atexit
+import glob
+import os
+import secrets
+import tempfile
+import threading
+import time
+from json import dumps
+
+BENCHMARK_ENV = {
+    "ENCRYPTION_KEY": "0" * 32,
+    "HASH_SALT": "benchmark",
+    "ORIGINS": "[]",
+    "RABBITMQ_SSL_ACTIVE": "false",
+    "RABBITMQ_HOST": "localhost",
+}
+
+
+class FakeResponse:
+    """A management API response."""
+
+    def __init__(self, status_code: int, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.text = dumps(payload)
+
+    def json(self):
+        """Returns the response payload."""
+        return self.payload
+
+    def raise_for_status(self):
+        """Raises HTTPError for 4xx and 5xx responses, like requests."""
+        if self.status_code >= 400:
+            # pylint: disable=import-outside-toplevel
+            import requests
+
+            raise requests.exceptions.HTTPError(response=self)
+
+
+class FakeManagementAPI:
+    """
+    Stands in for the `requests` module against the management API.
+
+    Resources are kept by URL path. Exchanges are reported to exist unless
+    they were deleted, since they may have been created by another process
+    sharing the database. Queues are reported to exist for every service, as
+    if a Deku client were consuming each of them, unless `queues` is False.
+    """
+
+    def __init__(self, queues: bool = True):
+        # pylint: disable=import-outside-toplevel
+        import requests
+
+        self.exceptions = requests.exceptions
+        self.queues = queues
+        self.resources = {}
+        self.deleted = set()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def path(url: str) -> str:
+        """Returns the API path of a management API URL."""
+        return url.split("/api/", 1)[1]
+
+    def put(self, url: str, json=None, auth=None, timeout=None):
+        """Creates or replaces a resource."""
+        with self.lock:
+            self.calls += 1
+            self.resources[self.path(url)] = json or {}
+            self.deleted.discard(self.path(url))
+
+        return FakeResponse(201)
+
+    def get(self, url: str, auth=None, timeout=None):
+        """Returns a resource, or 404."""
+        path = self.path(url)
+
+        with self.lock:
+            self.calls += 1
+
+            if path in self.resources:
+                return FakeResponse(200, self.resources[path])
+
+            if path in self.deleted:
+                return FakeResponse(404, {"error": "Object Not Found"})
+
+        if path.startswith("exchanges/") or (
+            self.queues and path.startswith("queues/")
+        ):
+            return FakeResponse(200, {"name": path.rsplit("/", 1)[-1]})
+
+        return FakeResponse(404, {"error": "Object Not Found"})
+
+    def delete(self, url: str, json=None, auth=None, timeout=None):
+        """Deletes a resource, or 404."""
+        with self.lock:
+            self.calls += 1
+
+            self.deleted.add(self.path(url))
+
+            if self.resources.pop(self.path(url), None) is None:
+                return FakeResponse(404, {"error": "Object Not Found"})
+
+        return FakeResponse(204)
+
+
+class FakeBroker:
+    """Counts the messages published to it, by virtual host and exchange."""
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.published = 0
+        self.bytes = 0
+        self.exchanges = {}
+        self.condition = threading.Condition()
+
+    def publish(self, virtual_host: str, exchange: str, body) -> None:
+        """Accepts a message."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.condition:
+            self.published += 1
+            self.bytes += len(body)
+            key = (virtual_host, exchange)
+            self.exchanges[key] = self.exchanges.get(key, 0) + 1
+            self.condition.notify_all()
+
+    def wait_for(self, count: int, timeout: float = 600) -> bool:
+        """Waits until at least count messages have been published."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.published >= count, timeout=timeout
+            )
+
+
+class FakeChannel:
+    """An AMQP channel of a fake connection."""
+
+    def __init__(self, broker: FakeBroker, virtual_host: str):
+        self.broker = broker
+        self.virtual_host = virtual_host
+        self.is_open = True
+
+    def confirm_delivery(self):
+        """Enables publisher confirms, every message is confirmed."""
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        """Publishes a message to the fake broker."""
+        self.broker.publish(self.virtual_host, exchange, body)
+
+
+class FakeAMQP:
+    """
+    Stands in for the `pika` module, connecting to a fake broker.
+
+    Everything but BlockingConnection is delegated to pika, so connection
+    parameters are still built by the real code.
+    """
+
+    def __init__(self, broker: FakeBroker):
+        # pylint: disable=import-outside-toplevel
+        import pika
+
+        self.pika = pika
+        self.broker = broker
+        self.connections = 0
+
+    def __getattr__(self, name):
+        return getattr(self.pika, name)
+
+    def BlockingConnection(self, parameters):  # pylint: disable=invalid-name
+        """Opens a connection to the fake broker."""
+        self.connections += 1
+        return FakeConnection(self.broker, parameters.virtual_host)
+
+
+class FakeConnection:
+    """A blocking AMQP connection to a fake broker."""
+
+    def __init__(self, broker: FakeBroker, virtual_host: str):
+        self.broker = broker
+        self.virtual_host = virtual_host
+        self.is_open = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def channel(self):
+        """Opens a channel."""
+        return FakeChannel(self.broker, self.virtual_host)
+
+    def close(self):
+        """Closes the connection."""
+        self.is_open = False
+
+
+def remove_database(path: str) -> None:
+    """Removes a SQLite database file and its WAL files."""
+    for name in glob.glob(f"{path}*"):
+        os.remove(name)
+
+
+class Environment:
+    """
+    The offline application and its fakes.
+
+    Attributes:
+        app: The Flask application.
+        database: The peewee database in use.
+        management: FakeManagementAPI - The fake management API.
+        broker: FakeBroker - The fake AMQP broker.
+        amqp: FakeAMQP - The fake pika module.
+    """
+
+    def __init__(self, app, database, management, broker, amqp):
+        self.app = app
+        self.database = database
+        self.management = management
+        self.broker = broker
+        self.amqp = amqp
+
+
+def setup(
+    database: str = "sqlite", path: str = None, broker_latency: float = 0
+) -> Environment:
+    """
+    Builds the offline environment and imports the application.
+
+    :param database: str - "sqlite", or "mysql" to use the MYSQL_* settings.
+    :param path: str, optional - The SQLite database file, a temporary file by default.
+    :param broker_latency: float - Seconds the fake broker takes per publish.
+
+    :return: Environment - The application and its fakes.
+    """
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+    # pylint: disable=import-outside-toplevel
+    from src.orm.peewee import connector
+
+    if database == "sqlite":
+        from peewee import SqliteDatabase
+
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="deku-benchmark-", suffix=".db")
+            os.close(handle)
+            atexit.register(remove_database, path)
+
+        connector.database = SqliteDatabase(
+            path,
+            check_same_thread=False,
+            pragmas={"journal_mode": "wal", "synchronous": 0},
+        )
+
+    from bootstrap import MODELS, bootstrap
+    from src.utils import rabbitmq
+
+    if database == "sqlite":
+        with connector.database.connection_context():
+            connector.database.create_tables(MODELS, safe=True)
+    else:
+        bootstrap()
+
+    management = FakeManagementAPI()
+    broker = FakeBroker(latency=broker_latency)
+    amqp = FakeAMQP(broker)
+
+    rabbitmq.requests = management
+    rabbitmq.pika = amqp
+
+    from server import app
+
+    return Environment(
+        app=app,
+        database=connector.database,
+        management=management,
+        broker=broker,
+        amqp=amqp,
+    )
+
+
+def create_account(email: str, password: str):
+    """
+    Creates an account with its virtual host, like signup does.
+
+    The user handler fills in account_sid after inserting the row, which
+    SQLite rejects as a NOT NULL violation, so the credentials are generated
+    up front here instead.
+
+    :param email: str - The account email.
+    :param password: str - The account password.
+
+    :return: User - The new user.
+    """
+    # pylint: disable=import-outside-toplevel
+    from src.orm.peewee.models.user import User
+    from src.security.crypto import DataSecurity
+    from src.utils import rabbitmq
+
+    user = User.create(
+        email=email,
+        password=DataSecurity().hash_password(password=password),
+        account_sid=f"AC{secrets.token_hex(7)}",
+        auth_token=secrets.token_hex(32),
+    )
+
+    rabbitmq.create_virtual_host(name=user.account_sid)
+    rabbitmq.create_user(
+        username=user.account_sid, password=user.auth_token, tags="management"
+    )
+    rabbitmq.set_permissions(
+        configure=".*",
+        write=".*",
+        read=".*",
+        username=user.account_sid,
+        virtual_host=user.account_sid,
+    )
+
+    return user
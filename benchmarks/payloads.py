@@ -0,0 +1,155 @@
+"""Synthetic publish payloads for benchmarks.
+
+Recipients are valid mobile numbers derived from the phonenumbers example
+number of each region, so every recipient classifies to a carrier and is
+published rather than failing validation.
+"""
+
+import csv
+import functools
+import io
+import random
+import uuid
+
+import phonenumbers
+from phonenumbers.carrier import name_for_number
+from phonenumbers.carrierdata import CARRIER_DATA
+
+DEFAULT_REGIONS = {"CM": 0.4, "NG": 0.3, "GH": 0.1, "KE": 0.1, "US": 0.1}
+
+
+@functools.lru_cache(maxsize=None)
+def recipient_pool(region: str, size: int = 500) -> dict:
+    """
+    Returns valid mobile numbers of a region grouped by carrier.
+
+    Candidates are carrier number range prefixes of the region's country code,
+    padded with random digits to the length of the region's example number.
+
+    :param region: str - The ISO 3166 region code, e.g. "CM".
+    :param size: int - The number of candidate numbers to try.
+
+    :return: dict - carrier name -> list of E.164 numbers.
+    """
+    example = phonenumbers.example_number_for_type(
+        region, phonenumbers.PhoneNumberType.MOBILE
+    )
+
+    if example is None:
+        raise ValueError(f"No example mobile number for region {region}")
+
+    country_code = str(example.country_code)
+    length = len(country_code) + len(str(example.national_number))
+    prefixes = sorted(
+        prefix
+        for prefix in CARRIER_DATA
+        if prefix.startswith(country_code) and len(prefix) < length
+    )
+    generator = random.Random(region)
+    pool = {}
+
+    for _ in range(size if prefixes else 0):
+        prefix = generator.choice(prefixes)
+        digits = prefix + "".join(
+            generator.choices("0123456789", k=length - len(prefix))
+        )
+        number = phonenumbers.parse(f"+{digits}")
+
+        if phonenumbers.region_code_for_number(number) != region:
+            continue
+
+        if not phonenumbers.is_valid_number(number):
+            continue
+
+        carrier = name_for_number(number, "en")
+
+        if carrier:
+            pool.setdefault(carrier, []).append(f"+{digits}")
+
+    if not pool:
+        raise ValueError(f"No valid mobile numbers generated for region {region}")
+
+    return pool
+
+
+def generate_recipients(
+    count: int, regions: dict = None, seed: int = 0, carriers: dict = None
+) -> list:
+    """
+    Draws recipients from regions and carriers in proportion to their weights.
+
+    :param count: int - The number of recipients.
+    :param regions: dict, optional - region -> weight, DEFAULT_REGIONS by default.
+    :param seed: int - The random seed.
+    :param carriers: dict, optional - region -> {carrier -> weight}. Carriers
+        of regions without weights are drawn uniformly.
+
+    :return: list - E.164 phone numbers.
+    """
+    regions = regions or DEFAULT_REGIONS
+    carriers = carriers or {}
+    generator = random.Random(seed)
+    names = list(regions)
+    weights = [regions[name] for name in names]
+    recipients = []
+
+    for region in generator.choices(names, weights=weights, k=count):
+        pool = recipient_pool(region)
+        carrier_weights = carriers.get(region)
+
+        if carrier_weights:
+            unknown = set(carrier_weights).difference(pool)
+
+            if unknown:
+                raise ValueError(f"Unknown carriers for region {region}: {unknown}")
+
+            carrier = generator.choices(
+                list(carrier_weights), weights=list(carrier_weights.values())
+            )[0]
+        else:
+            carrier = generator.choice(sorted(pool))
+
+        recipients.append(generator.choice(pool[carrier]))
+
+    return recipients
+
+
+def parse_weights(text: str) -> dict:
+    """
+    Parses region and carrier weights.
+
+    :param text: str - Comma separated weights, e.g. "CM=0.7,NG=0.3" for
+        regions, or "CM:MTN Cameroon=0.8,CM:Orange=0.2" for carriers.
+
+    :return: dict - region -> weight, or region -> {carrier -> weight}.
+    """
+    weights = {}
+
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, _, weight = item.rpartition("=")
+
+        if not key:
+            raise ValueError(f"Invalid weight '{item}', expected KEY=WEIGHT")
+
+        if ":" in key:
+            region, _, carrier = key.partition(":")
+            weights.setdefault(region.upper(), {})[carrier] = float(weight)
+        else:
+            weights[key.upper()] = float(weight)
+
+    return weights
+
+
+def json_payload(recipients: list, body: str = "Benchmark message") -> list:
+    """Returns a JSON publish payload with one message per recipient."""
+    return [{"body": body, "to": to, "sid": str(uuid.uuid4())} for to in recipients]
+
+
+def csv_payload(recipients: list, body: str = "Benchmark message") -> bytes:
+    """Returns a CSV publish payload with one message per recipient."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=["body", "to", "sid"])
+    writer.writeheader()
+    writer.writerows(json_payload(recipients, body=body))
+
+    return output.getvalue().encode("utf-8")
@@ -0,0 +1,113 @@
+"""Benchmark for carrier routing.
+
+Routes synthetic numbers, drawn from the carrier number ranges of the
+phonenumbers metadata, with the prefix-trie router and with phonenumbers
+parsing. phonenumbers is timed on a smaller sample, since it is orders of
+magnitude slower. The share of sampled numbers for which both routers agree
+on the country code and carrier is reported as well.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from phonenumbers.carrierdata import CARRIER_DATA
+
+from src.utils.std_carrier_lib.helpers import CarrierInformation
+from src.utils.std_carrier_lib.prefix_router import (
+    PrefixRouter,
+    canonical_carrier_id,
+)
+
+
+def synthetic_numbers(count: int, seed: int) -> list:
+    """E.164 numbers of 12 digits, each starting with a carrier prefix."""
+
+    generator = random.Random(seed)
+    prefixes = list(CARRIER_DATA)
+    numbers = []
+
+    for _ in range(count):
+        prefix = generator.choice(prefixes)
+        suffix = "".join(generator.choices("0123456789", k=12 - len(prefix)))
+        numbers.append(f"+{prefix}{suffix}")
+
+    return numbers
+
+
+def time_routes(route, numbers: list) -> tuple:
+    """Time a routing function over the numbers.
+
+    :param route: The routing function to call per number.
+    :param numbers: E.164 phone numbers.
+    :return: Mean microseconds per number and the routes (None on errors).
+    """
+
+    routes = []
+    start = time.perf_counter()
+
+    for number in numbers:
+        try:
+            routes.append(route(number))
+        except Exception:  # pylint: disable=broad-exception-caught
+            routes.append(None)
+
+    return (time.perf_counter() - start) / len(numbers) * 1e6, routes
+
+
+def main():
+    """Command line interface for the prefix router benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark carrier routing")
+    parser.add_argument("--numbers", type=int, default=1000000, help="numbers")
+    parser.add_argument("--sample", type=int, default=10000, help="phonenumbers")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    numbers = synthetic_numbers(args.numbers, args.seed)
+
+    start = time.perf_counter()
+    router = PrefixRouter()
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    carrier_information = CarrierInformation()
+
+    def legacy_route(number):
+        country_code, name = carrier_information.get_routing_information(number)
+        return country_code, canonical_carrier_id(name)
+
+    trie_us, trie_routes = time_routes(router.route, numbers)
+    sample = numbers[: args.sample]
+    legacy_us, legacy_routes = time_routes(legacy_route, sample)
+
+    parsed = [
+        (trie, legacy)
+        for trie, legacy in zip(trie_routes, legacy_routes)
+        if legacy is not None
+    ]
+    agreed = sum(1 for trie, legacy in parsed if trie == legacy)
+
+    print(
+        json.dumps(
+            {
+                "numbers": len(numbers),
+                "trie_nodes": len(router.carriers),
+                "build_ms": round(build_ms, 1),
+                "trie_us_per_number": round(trie_us, 3),
+                "trie_numbers_per_second": round(1e6 / trie_us),
+                "phonenumbers_sample": len(sample),
+                "phonenumbers_us_per_number": round(legacy_us, 3),
+                "speedup": round(legacy_us / trie_us, 2),
+                "valid_in_sample": len(parsed),
+                "agreement": round(agreed / max(len(parsed), 1), 4),
+            },
+            indent=4,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.prefix_router --numbers 1000000 --sample 10000
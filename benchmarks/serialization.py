@@ -0,0 +1,115 @@
+"""Benchmark for list response serialization.
+
+Measures the CPU time to fetch and serialize one page of logs, the way
+GET /v1/logs does, with model instances converted by model_to_dict or rows
+fetched with .dicts(), serialized by Flask's default JSON provider or the
+orjson provider (with HTTP or ISO 8601 dates). Runs on the offline SQLite
+database of benchmarks.offline.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from peewee import chunked
+
+from benchmarks import offline
+
+PAGE_SIZES = (100, 1000)
+
+
+def process_time_ms(run, runs: int) -> list:
+    """Call run repeatedly and measure each call's CPU time in milliseconds."""
+
+    run()
+    timings = []
+
+    for _ in range(runs):
+        start = time.process_time()
+        run()
+        timings.append((time.process_time() - start) * 1000)
+
+    return timings
+
+
+def main():
+    """Command line interface for the serialization benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark list serialization")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per case")
+    args = parser.parse_args()
+
+    env = offline.setup()
+
+    # pylint: disable=import-outside-toplevel
+    from flask.json.provider import DefaultJSONProvider
+    from playhouse.shortcuts import model_to_dict
+
+    from src.orm.peewee.models.log import Log
+    from src.utils.json_provider import OrjsonProvider
+
+    with env.database.connection_context():
+        user = offline.create_account(
+            email="serialization@example.com", password="Benchmark-Passw0rd!"
+        )
+        rows = [
+            {
+                "user_id": user.id,
+                "service_id": "sms",
+                "service_name": "mtn_cameroon",
+                "project_reference": "PJbenchmark",
+                "channel": "deku_client",
+                "direction": "outbound-api",
+                "status": "delivered",
+                "to": "+237650000000",
+                "sid": f"serialization-{index}",
+            }
+            for index in range(max(PAGE_SIZES))
+        ]
+
+        with env.database.atomic():
+            for batch in chunked(rows, 500):
+                Log.insert_many(batch).execute()
+
+    iso_provider = OrjsonProvider(env.app)
+    iso_provider.datetime_format = "iso"
+    providers = {
+        "default": DefaultJSONProvider(env.app),
+        "orjson": OrjsonProvider(env.app),
+        "orjson_iso": iso_provider,
+    }
+    results = {}
+
+    with env.app.app_context(), env.database.connection_context():
+        for size in PAGE_SIZES:
+            query = Log.select().where(Log.user_id == user.id).limit(size)
+
+            fetchers = {
+                "model_to_dict": lambda query=query: [
+                    model_to_dict(log, recurse=False) for log in query.clone()
+                ],
+                "dicts": lambda query=query: list(query.clone().dicts()),
+            }
+
+            for fetch_name, fetch in fetchers.items():
+                fetch_ms = statistics.median(process_time_ms(fetch, args.runs))
+                page = fetch()
+
+                for provider_name, provider in providers.items():
+                    serialize_ms = statistics.median(
+                        process_time_ms(lambda: provider.response(page), args.runs)
+                    )
+                    results[f"logs_{size}_{fetch_name}_{provider_name}"] = {
+                        "fetch_cpu_ms": round(fetch_ms, 3),
+                        "serialize_cpu_ms": round(serialize_ms, 3),
+                        "page_cpu_ms": round(fetch_ms + serialize_ms, 3),
+                    }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.serialization --runs 50
@@ -0,0 +1,432 @@
+"""Benchmark suite for the API hot paths.
+
+Runs fully offline: the application is served in-process on SQLite (or on
+the configured MySQL with --database mysql) with fake RabbitMQ management
+API and AMQP broker, see benchmarks.offline. Covers login, session
+authenticated log and project listing, publishing over JSON and CSV,
+recipient classification and field encryption.
+
+Results are written as JSON. Comparing two result files flags the cases
+whose median got slower than the threshold allows and exits non-zero if
+there are any, so runs on two commits can gate a change:
+
+    python -m benchmarks.suite --output base.json     # on the base commit
+    python -m benchmarks.suite --output head.json     # on the change
+    python -m benchmarks.suite --compare base.json head.json
+"""
+
+import argparse
+import base64
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from peewee import chunked
+
+from benchmarks import offline, payloads
+
+USER_AGENT = "deku-benchmark"
+EMAIL = "benchmark@example.com"
+PASSWORD = "Benchmark-Passw0rd!"
+
+LOG_TABLE_SIZES = (100, 1000, 10000)
+PUBLISH_SIZES = (1, 100, 10000)
+CLASSIFY_SIZE = 10000
+CRYPTO_SIZE = 1000
+
+
+def summarize(timings: list) -> dict:
+    """Summarize timings in milliseconds."""
+
+    ordered = sorted(timings)
+
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def measure(run, runs: int, warmup: int = 1) -> list:
+    """Call run repeatedly and time each call in milliseconds."""
+
+    for _ in range(warmup):
+        run()
+
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def check(response, status: int = 200):
+    """Fail the benchmark on an unexpected response."""
+
+    if response.status_code != status:
+        raise RuntimeError(
+            f"Unexpected response {response.status_code}: {response.data[:200]!r}"
+        )
+
+    return response
+
+
+class Suite:
+    """
+    The benchmark cases, sharing one offline environment and account.
+
+    Attributes:
+        env (offline.Environment): The application and its fakes.
+        runs (int): Timed runs per case, fewer for the largest cases.
+        client: The Flask test client, holding the session cookie.
+    """
+
+    def __init__(self, env: offline.Environment, runs: int):
+        self.env = env
+        self.runs = runs
+        self.client = env.app.test_client()
+        self.client.environ_base["HTTP_USER_AGENT"] = USER_AGENT
+
+        # pylint: disable=import-outside-toplevel
+        from src.controllers import project
+
+        with env.database.connection_context():
+            self.user = offline.create_account(email=EMAIL, password=PASSWORD)
+            self.project = project.create_project(
+                friendly_name="Benchmark",
+                description="Benchmark project",
+                user_id=self.user.id,
+            )
+
+            for index in range(9):
+                project.create_project(
+                    friendly_name=f"Benchmark {index}",
+                    description="Benchmark project",
+                    user_id=self.user.id,
+                )
+
+        credentials = f"{self.user.account_sid}:{self.user.auth_token}"
+        self.authorization = "Basic " + base64.b64encode(credentials.encode()).decode()
+
+    def login(self):
+        """Log in, leaving the session cookie on the client."""
+
+        check(
+            self.client.post("/v1/login", json={"email": EMAIL, "password": PASSWORD})
+        )
+
+    def case_login(self) -> dict:
+        """POST /v1/login"""
+
+        return summarize(measure(self.login, self.runs))
+
+    def case_logs(self) -> dict:
+        """GET /v1/logs at growing table sizes"""
+
+        # pylint: disable=import-outside-toplevel
+        from src.orm.peewee.models.log import Log
+
+        results = {}
+        rows = 0
+        self.login()
+
+        for size in LOG_TABLE_SIZES:
+            rows_to_insert = [
+                {
+                    "user_id": self.user.id,
+                    "service_id": "sms",
+                    "project_reference": self.project["reference"],
+                    "channel": "deku_client",
+                    "status": "requested",
+                    "to": "+237600000000",
+                    "sid": f"benchmark-{rows + index}",
+                }
+                for index in range(size - rows)
+            ]
+
+            with self.env.database.connection_context():
+                with self.env.database.atomic():
+                    for batch in chunked(rows_to_insert, 500):
+                        Log.insert_many(batch).execute()
+
+            rows = size
+            results[f"logs_get_{size}"] = summarize(
+                measure(lambda: check(self.client.get("/v1/logs")), self.runs)
+            )
+
+        return results
+
+    def case_projects(self) -> dict:
+        """GET /v1/projects"""
+
+        self.login()
+
+        return summarize(
+            measure(lambda: check(self.client.get("/v1/projects")), self.runs)
+        )
+
+    def publish(self, size: int, payload_format: str) -> float:
+        """Publish size messages and wait until all of them were sent.
+
+        :return: The request latency in milliseconds.
+        """
+
+        recipients = payloads.generate_recipients(size, seed=size)
+        url = f"/v1/projects/{self.project['reference']}/services/sms"
+        headers = {"Authorization": self.authorization}
+
+        if payload_format == "json":
+            request = {"json": payloads.json_payload(recipients)}
+        else:
+            request = {
+                "data": {
+                    "file": (
+                        io.BytesIO(payloads.csv_payload(recipients)),
+                        "messages.csv",
+                    )
+                }
+            }
+
+        expected = self.env.broker.published + size
+
+        start = time.perf_counter()
+        response = check(self.client.post(url, headers=headers, **request))
+        request_ms = (time.perf_counter() - start) * 1000
+
+        if not self.env.broker.wait_for(expected):
+            raise RuntimeError(f"Only {self.env.broker.published} of {expected} sent")
+
+        # Wait for the job to record its last batch before the next case
+        job_url = f"/v1/jobs/{response.get_json()['job_id']}"
+
+        while check(self.client.get(job_url, headers=headers)).get_json()[
+            "status"
+        ] not in ("completed", "failed"):
+            time.sleep(0.001)
+
+        return request_ms
+
+    def case_publish(self) -> dict:
+        """POST /v1/projects/<reference>/services/sms, JSON and CSV"""
+
+        results = {}
+
+        for payload_format in ("json", "csv"):
+            for size in PUBLISH_SIZES:
+                runs = self.runs if size < 10000 else max(1, self.runs // 5)
+                request_timings = []
+
+                def run(size=size, payload_format=payload_format):
+                    request_timings.append(self.publish(size, payload_format))
+
+                timings = measure(run, runs)
+                summary = summarize(timings)
+                summary["request_median_ms"] = round(
+                    statistics.median(request_timings[-runs:]), 3
+                )
+                summary["messages_per_second"] = round(
+                    size / (summary["median_ms"] / 1000), 1
+                )
+                results[f"publish_{payload_format}_{size}"] = summary
+
+        return results
+
+    def case_classify(self) -> dict:
+        """Recipient classification of a batch"""
+
+        # pylint: disable=import-outside-toplevel
+        from src.utils.carrier_services import classify_recipients
+
+        recipients = [{"to": to} for to in payloads.generate_recipients(CLASSIFY_SIZE)]
+
+        return summarize(
+            measure(
+                lambda: classify_recipients("sms", "benchmark", recipients), self.runs
+            )
+        )
+
+    def case_crypto(self) -> dict:
+        """Field encryption and decryption"""
+
+        # pylint: disable=import-outside-toplevel
+        from src.security.crypto import DataSecurity
+
+        data_security = DataSecurity()
+        plaintexts = [f"+2376{index:08d}" for index in range(CRYPTO_SIZE)]
+        ciphertexts = [data_security.encrypt_data(text) for text in plaintexts]
+
+        return {
+            f"crypto_encrypt_{CRYPTO_SIZE}": summarize(
+                measure(
+                    lambda: [data_security.encrypt_data(text) for text in plaintexts],
+                    self.runs,
+                )
+            ),
+            f"crypto_decrypt_{CRYPTO_SIZE}": summarize(
+                measure(
+                    lambda: [data_security.decrypt_data(text) for text in ciphertexts],
+                    self.runs,
+                )
+            ),
+        }
+
+    def run(self, selected: list = None) -> dict:
+        """Run the selected cases, all of them by default."""
+
+        cases = {
+            "login": self.case_login,
+            "logs": self.case_logs,
+            "projects": self.case_projects,
+            "publish": self.case_publish,
+            "classify": self.case_classify,
+            "crypto": self.case_crypto,
+        }
+        results = {}
+
+        for name, case in cases.items():
+            if selected and name not in selected:
+                continue
+
+            result = case()
+
+            if "median_ms" in result:
+                results[name] = result
+            else:
+                results.update(result)
+
+        return results
+
+
+def git_revision() -> str:
+    """The current commit, if run from a git checkout."""
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base: dict, head: dict, threshold: float) -> dict:
+    """Compare the case medians of two result files.
+
+    :param base: Results of the base commit.
+    :param head: Results of the change.
+    :param threshold: Relative slowdown of the median flagged as a regression.
+    :return: The per-case changes and the list of regressions.
+    """
+
+    cases = {}
+    regressions = []
+
+    for name, result in head["results"].items():
+        before = base["results"].get(name)
+
+        if not before:
+            continue
+
+        change = result["median_ms"] / before["median_ms"] - 1
+
+        if change > threshold:
+            status = "regression"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+
+        cases[name] = {
+            "base_median_ms": before["median_ms"],
+            "head_median_ms": result["median_ms"],
+            "change": round(change, 4),
+            "status": status,
+        }
+
+    return {
+        "base": base.get("revision"),
+        "head": head.get("revision"),
+        "threshold": threshold,
+        "cases": cases,
+        "regressions": regressions,
+    }
+
+
+def main():
+    """Command line interface for the benchmark suite."""
+
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per case")
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=["login", "logs", "projects", "publish", "classify", "crypto"],
+        help="cases to run (default: all)",
+    )
+    parser.add_argument(
+        "--database",
+        choices=["sqlite", "mysql"],
+        default="sqlite",
+        help="sqlite, or mysql to use the MYSQL_* settings",
+    )
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASE", "HEAD"),
+        help="compare two result files instead of running",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative median slowdown flagged as a regression",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as base_file:
+            base = json.load(base_file)
+
+        with open(args.compare[1], encoding="utf-8") as head_file:
+            head = json.load(head_file)
+
+        comparison = compare(base, head, args.threshold)
+        print(json.dumps(comparison, indent=4))
+        sys.exit(1 if comparison["regressions"] else 0)
+
+    env = offline.setup(database=args.database)
+    suite = Suite(env, runs=args.runs)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": args.database,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": suite.run(args.cases),
+    }
+    output = json.dumps(report, indent=4)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m benchmarks.suite --output results.json
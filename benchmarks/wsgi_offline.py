@@ -0,0 +1,19 @@
+"""WSGI entry point serving the application with the stand-in broker.
+
+Lets mod_wsgi-express run the real process and thread topology without MySQL
+or RabbitMQ, for sizing with benchmarks.load. All processes share the SQLite
+file named by BENCHMARK_DATABASE; provision accounts into the same file with
+`python -m benchmarks.load --database`.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks import offline
+
+application = offline.setup(path=os.environ["BENCHMARK_DATABASE"]).app
+
+# BENCHMARK_DATABASE=/tmp/deku.db PROMETHEUS_MULTIPROC_DIR=/tmp/deku-metrics mod_wsgi-express start-server benchmarks/wsgi_offline.py --processes 4 --threads 8
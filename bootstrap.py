@@ -0,0 +1,93 @@
+"""Module to bootstrap the database schema.
+
+Creates the database and any missing tables. Run this once per deployment
+before starting the server, model imports do not touch the database. Metrics
+files left over from a previous run are cleared as well.
+"""
+
+from contextlib import closing
+
+import mysql.connector
+
+from src.orm.peewee.connector import (
+    database,
+    MYSQL_HOST,
+    MYSQL_USER,
+    MYSQL_PASSWORD,
+    MYSQL_DATABASE,
+)
+from src.orm.peewee.models.user import User
+from src.orm.peewee.models.project import Project
+from src.orm.peewee.models.log import Log
+from src.orm.peewee.models.session import Session
+from src.orm.peewee.models.job import Job, JobBatch
+from src.orm.peewee.models.deletion import AccountDeletion
+from src.orm.peewee.models.outbox import OutboxMessage
+from src.orm.peewee.models.broker import BrokerAssignment
+from src.utils.metrics import clear_multiprocess_directory
+
+MODELS = [
+    User,
+    Project,
+    Log,
+    Session,
+    Job,
+    JobBatch,
+    AccountDeletion,
+    OutboxMessage,
+    BrokerAssignment,
+]
+
+
+def create_database_if_not_exists(
+    user: str, password: str, host: str, database_name: str
+) -> None:
+    """
+    Creates a database if it doesn't exist.
+
+    Parameters:
+        user (str): database user.
+        password (str): database password.
+        host (str): database host.
+        database_name (str): database name.
+
+    Returns:
+        None.
+    """
+    # MySQL
+    with closing(
+        mysql.connector.connect(
+            user=user,
+            password=password,
+            host=host,
+            auth_plugin="mysql_native_password",
+        )
+    ) as connection:
+        query = f"CREATE DATABASE IF NOT EXISTS {database_name}"
+
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(query)
+
+
+def bootstrap() -> None:
+    """Create the database and all missing tables."""
+
+    create_database_if_not_exists(
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        host=MYSQL_HOST,
+        database_name=MYSQL_DATABASE,
+    )
+
+    with database.connection_context():
+        database.create_tables(MODELS, safe=True)
+
+    clear_multiprocess_directory()
+
+    print("✅ Database bootstrapped successfully.")
+
+
+if __name__ == "__main__":
+    bootstrap()
+
+# python bootstrap.py
@@ -0,0 +1,64 @@
+"""Module to build the offline breached password filter."""
+
+import argparse
+import logging
+
+from src.security.breach_filter import build_filter
+
+
+def read_digests(path: str):
+    """Yield SHA-1 digests from a Pwned Passwords hash list.
+
+    Lines are expected in the "SHA1:COUNT" format of the downloaded
+    ordered-by-hash list. Blank lines are skipped.
+
+    :param path: Path to the hash list.
+    """
+
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            digest = line.split(":", 1)[0].strip()
+
+            if len(digest) == 40:
+                yield digest.upper()
+
+
+def main():
+    """Command line interface for building the breached password filter."""
+
+    parser = argparse.ArgumentParser(
+        description="Build the offline breached password filter"
+    )
+    parser.add_argument("hash_list", help="path to the SHA-1 Pwned Passwords list")
+    parser.add_argument("output", help="path of the filter file to write")
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.001,
+        help="acceptable false positive rate (default: 0.001)",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        help="number of digests in the list (counted from the list if omitted)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    capacity = args.capacity or sum(1 for _ in read_digests(args.hash_list))
+
+    added = build_filter(
+        path=args.output,
+        digests=read_digests(args.hash_list),
+        capacity=capacity,
+        error_rate=args.error_rate,
+    )
+
+    print(f"✅ Added {added} digests to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+
+# python build_breach_filter.py pwnedpasswords.txt pwnedpasswords.bloom
@@ -0,0 +1,35 @@
+"""Module to build the compact carrier data file.
+
+Packs the MCC/MNC source tables of src/utils/std_carrier_lib/MCCMNC.py into
+the memory-mapped data file read by the carrier helpers. Run it after editing
+the source tables.
+"""
+
+import argparse
+
+from src.utils.std_carrier_lib import MCCMNC
+from src.utils.std_carrier_lib.carrier_data import DATA_PATH, build_carrier_data
+
+
+def main():
+    """Command line interface for building the carrier data file."""
+
+    parser = argparse.ArgumentParser(description="Build the carrier data file")
+    parser.add_argument(
+        "--output",
+        default=DATA_PATH,
+        help=f"path of the data file (default: {DATA_PATH})",
+    )
+    args = parser.parse_args()
+
+    size = build_carrier_data(
+        mcc_dict=MCCMNC.MCC_dict, mnc_dict=MCCMNC.MNC_dict, path=args.output
+    )
+
+    print(f"✅ Wrote {args.output} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
+
+# python build_carrier_data.py
@@ -0,0 +1,112 @@
+"""Job worker.
+
+Publish requests are run as jobs by the API process that accepted them. If
+that process stops mid-way, e.g. in a restart, its jobs stop being updated.
+This process periodically claims such stale jobs and resumes them from the
+last batch they recorded. Account deletions left stale are resumed the same
+way.
+
+It also runs the scheduler, which releases the batches of messages deferred
+with send_at. The scheduler sleeps until the earliest batch is due, read from
+the due_at index, waking at least every SCHEDULER_MAX_WAIT seconds to pick
+up batches scheduled since by the API.
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from settings import Configurations
+from src.controllers.job import resume_stale_jobs, release_due_batches, get_next_due
+from src.controllers.deletion import resume_stale_deletions
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(interval: float) -> None:
+    """
+    Resume stale jobs and account deletions every interval seconds.
+
+    :param interval: float - Seconds between checks for stale jobs.
+    """
+
+    while True:
+        try:
+            threads = resume_stale_jobs()
+
+            if threads:
+                logger.info("Resuming %s stale job(s)", len(threads))
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to resume stale jobs: %s", error)
+
+        try:
+            threads = resume_stale_deletions()
+
+            if threads:
+                logger.info("Resuming %s stale account deletion(s)", len(threads))
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to resume stale account deletions: %s", error)
+
+        time.sleep(interval)
+
+
+def run_scheduler(max_wait: float, batch_limit: int) -> None:
+    """
+    Release deferred batches as they fall due.
+
+    :param max_wait: float - The maximum seconds to sleep between checks.
+    :param batch_limit: int - The maximum number of batches released per check.
+    """
+
+    while True:
+        try:
+            while release_due_batches(limit=batch_limit) >= batch_limit:
+                continue
+
+            next_due = get_next_due()
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to release scheduled messages: %s", error)
+            next_due = None
+
+        if next_due is None:
+            time.sleep(max_wait)
+        else:
+            time.sleep(min(max_wait, max(0, next_due - time.time())))
+
+
+def main():
+    """Command line interface for the job worker."""
+
+    parser = argparse.ArgumentParser(description="Resume interrupted publish jobs")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=Configurations.JOB_RESUME_INTERVAL,
+        help="seconds between checks for stale jobs",
+    )
+    parser.add_argument("--logs", default="info", help="Set log level")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.logs.upper()))
+
+    threading.Thread(
+        target=run_scheduler,
+        kwargs={
+            "max_wait": Configurations.SCHEDULER_MAX_WAIT,
+            "batch_limit": Configurations.SCHEDULER_BATCH_LIMIT,
+        },
+        name="scheduler",
+        daemon=True,
+    ).start()
+
+    run_worker(interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
+
+# python job_worker.py --interval 60
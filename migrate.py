@@ -20,6 +20,38 @@ db = MySQLDatabase(
 
 migrator = MySQLMigrator(db)
 
+
+class RenameDuplicates:
+    """Rename the duplicates of a column within groups of rows, so a unique
+    index can be added over them.
+
+    The oldest row of each group keeps its value, the others get "~<id>"
+    appended, truncated to fit the column's max_length.
+    """
+
+    def __init__(self, table, columns, column, max_length=255):
+        self.table = table
+        self.columns = columns
+        self.column = column
+        self.max_length = max_length
+
+    def run(self):
+        """Execute the rename."""
+        conditions = " AND ".join(f"t.`{name}` = d.`{name}`" for name in self.columns)
+        names = ", ".join(f"`{name}`" for name in self.columns)
+        cursor = db.execute_sql(
+            f"UPDATE `{self.table}` AS t JOIN ("
+            f"SELECT {names}, MIN(`id`) AS keep_id FROM `{self.table}` "
+            f"WHERE `{self.column}` IS NOT NULL "
+            f"GROUP BY {names} HAVING COUNT(*) > 1"
+            f") AS d ON {conditions} AND t.`id` <> d.keep_id "
+            f"SET t.`{self.column}` = CONCAT("
+            f"LEFT(t.`{self.column}`, %s - 1 - CHAR_LENGTH(t.`id`)), '~', t.`id`)",
+            (self.max_length,),
+        )
+        print(f" {cursor.rowcount} duplicates renamed", end="")
+
+
 ACTIONS = {
     "add_column": migrator.add_column,
     "drop_column": migrator.drop_column,
@@ -29,9 +61,11 @@ ACTIONS = {
     "rename_table": migrator.rename_table,
     "add_index": migrator.add_index,
     "drop_index": migrator.drop_index,
+    "alter_column_type": migrator.alter_column_type,
+    "rename_duplicates": RenameDuplicates,
 }
 
-ALLOWED_FIELDS = ["IntegerField", "CharField", "BooleanField"]
+ALLOWED_FIELDS = ["IntegerField", "BigIntegerField", "CharField", "BooleanField"]
 
 PENDING = "⏳"
 SUCCESS = "✅"
@@ -110,6 +144,8 @@ drop_not_null: "table", "column"
 rename_table: "old_name", "new_name"
 add_index: "table", "columns", "unique"
 drop_index: "table", "index_name"
+rename_duplicates: "table", "columns", "column", "max_length"
+alter_column_type: "table", "column", "field"
 
 Sample spec file format:\n
 [
@@ -0,0 +1,87 @@
+"""Outbox relay.
+
+With OUTBOX_ACTIVE, the API writes the messages for Deku clients to the
+outbox table in the transaction that creates their logs, instead of
+publishing them itself. This process publishes them, OUTBOX_BATCH_SIZE at a
+time, over persistent AMQP connections with publisher confirms, and marks
+them sent. Batches are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+several relays can run side by side.
+
+Sent messages are kept for OUTBOX_RETENTION seconds, then purged while the
+relay is idle.
+"""
+
+import argparse
+import logging
+import time
+
+from settings import Configurations
+from src.controllers.outbox import relay_outbox, purge_sent_messages
+from src.utils.rabbitmq import ConfirmedPublisher
+
+logger = logging.getLogger(__name__)
+
+
+def run_relay(batch_size: int, interval: float) -> None:
+    """
+    Relay outbox messages, polling every interval seconds once it is empty.
+
+    :param batch_size: int - The maximum number of messages per batch.
+    :param interval: float - Seconds between polls of an empty outbox.
+    """
+    publisher = ConfirmedPublisher(
+        max_connections=Configurations.OUTBOX_MAX_CONNECTIONS
+    )
+
+    while True:
+        try:
+            relayed = relay_outbox(publisher=publisher, limit=batch_size)
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to relay outbox messages: %s", error)
+            publisher.close()
+            relayed = 0
+
+        if relayed >= batch_size:
+            continue
+
+        try:
+            purged = purge_sent_messages()
+
+            if purged:
+                logger.info("Purged %s sent outbox message(s)", purged)
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to purge sent outbox messages: %s", error)
+
+        time.sleep(interval)
+
+
+def main():
+    """Command line interface for the outbox relay."""
+
+    parser = argparse.ArgumentParser(description="Relay outbox messages to RabbitMQ")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=Configurations.OUTBOX_BATCH_SIZE,
+        help="maximum messages per batch",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=Configurations.OUTBOX_POLL_INTERVAL,
+        help="seconds between polls of an empty outbox",
+    )
+    parser.add_argument("--logs", default="info", help="Set log level")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.logs.upper()))
+
+    run_relay(batch_size=args.batch_size, interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
+
+# python outbox_relay.py --batch-size 500 --interval 1
@@ -0,0 +1,75 @@
+"""Module to view and set the publish rate limits of an account."""
+
+import argparse
+
+from src.orm.peewee.handlers.user import UserHandler
+from src.utils.rate_limiter import RATE_LIMIT_FIELDS
+
+
+def set_rate_limits(account_sid: str, reset: bool = False, **limits) -> bool:
+    """Set the rate limits of an account.
+
+    Limits not given are left unchanged. Running servers pick up the new
+    limits within RATE_LIMIT_CACHE_TTL seconds.
+
+    :param account_sid: The account ID of the user.
+    :param reset: Whether to restore the configured defaults first.
+    :param limits: The rate_limit_* fields to set, 0 for no limit.
+    :return: True if the limits were updated, False otherwise.
+    """
+
+    user_handler = UserHandler()
+    [user_total, users_list] = user_handler.get_users_by_field(account_sid=account_sid)
+
+    if user_total < 1 and len(users_list) < 1:
+        print(f"❌ Account {account_sid} not found.")
+        return False
+
+    update_fields = {field: None for field in RATE_LIMIT_FIELDS} if reset else {}
+    update_fields.update(
+        {field: value for field, value in limits.items() if value is not None}
+    )
+
+    if update_fields:
+        user_handler.update_user(user_id=users_list[0].id, **update_fields)
+
+    current = user_handler.get_rate_limits(account_sid=account_sid)
+
+    for field in RATE_LIMIT_FIELDS:
+        value = current[field]
+        print(f"{field}: {'default' if value is None else value}")
+
+    print("✅ Rate limits updated successfully.")
+    return True
+
+
+def main():
+    """Command line interface for setting rate limits."""
+
+    parser = argparse.ArgumentParser(description="Set account rate limits")
+    parser.add_argument(
+        "-u", "--username", required=True, help="The account ID of the user"
+    )
+    parser.add_argument("--requests", type=int, help="Requests per second")
+    parser.add_argument("--request-burst", type=int, help="Request burst")
+    parser.add_argument("--messages", type=int, help="Messages per second")
+    parser.add_argument("--message-burst", type=int, help="Message burst")
+    parser.add_argument(
+        "--reset", action="store_true", help="Restore the configured defaults"
+    )
+    args = parser.parse_args()
+
+    set_rate_limits(
+        args.username,
+        reset=args.reset,
+        rate_limit_requests=args.requests,
+        rate_limit_request_burst=args.request_burst,
+        rate_limit_messages=args.messages,
+        rate_limit_message_burst=args.message_burst,
+    )
+
+
+if __name__ == "__main__":
+    main()
+
+# python rate_limits.py -u myaccountid --messages 5000 --message-burst 50000
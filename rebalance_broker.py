@@ -0,0 +1,158 @@
+"""Module to view and move the RabbitMQ node of accounts."""
+
+import argparse
+
+from settings import Configurations
+from src.orm.peewee.handlers.broker import BrokerHandler
+from src.orm.peewee.handlers.project import ProjectHandler
+from src.orm.peewee.handlers.user import UserHandler
+from src.utils import rabbitmq
+from src.utils.broker_topology import topology
+
+
+def show_nodes() -> None:
+    """Print the number of accounts assigned to each node."""
+
+    counts = BrokerHandler().count_by_node()
+
+    for node in dict.fromkeys(topology.nodes + [topology.default_node]):
+        print(f"{node}: {counts.pop(node, 0)} assigned accounts")
+
+    for node, total in counts.items():
+        print(f"{node} (not configured): {total} assigned accounts")
+
+    print(f"Accounts without an assignment are on {topology.default_node}.")
+
+
+def move_account(account_sid: str, node: str) -> bool:
+    """Move an account to a node.
+
+    The account's RabbitMQ user, virtual host and project exchanges are
+    created on the node, then the account is assigned to it. Running servers
+    publish to the new node within BROKER_ASSIGNMENT_CACHE_TTL seconds. The
+    virtual host on the old node is kept, so Deku clients can drain its queues
+    before they reconnect to the new node; remove it with --cleanup.
+
+    :param account_sid: The account ID of the user.
+    :param node: The node to move the account to, one of RABBITMQ_NODES.
+    :return: True if the account was moved, False otherwise.
+    """
+
+    [user_total, users_list] = UserHandler().get_users_by_field(account_sid=account_sid)
+
+    if user_total < 1 and len(users_list) < 1:
+        print(f"❌ Account {account_sid} not found.")
+        return False
+
+    if node not in topology.nodes:
+        print(f"❌ Node {node} is not one of RABBITMQ_NODES.")
+        return False
+
+    source = topology.node_of(account_sid)
+
+    if source == node:
+        print(f"✅ Account {account_sid} is already on {node}.")
+        return True
+
+    user = users_list[0]
+    [_, projects] = ProjectHandler().get_projects_by_field(user_id=user.id)
+
+    try:
+        rabbitmq.create_virtual_host(name=account_sid, node=node)
+        rabbitmq.create_user(
+            username=account_sid,
+            password=user.auth_token,
+            node=node,
+            tags="management",
+        )
+        rabbitmq.set_permissions(
+            configure=".*",
+            write=".*",
+            read=".*",
+            username=account_sid,
+            virtual_host=account_sid,
+            node=node,
+        )
+
+        for project in projects:
+            rabbitmq.create_exchange(
+                name=project.reference,
+                virtual_host=account_sid,
+                node=node,
+                type="topic",
+                durable=True,
+            )
+
+    except Exception as error:
+        print(f"❌ Failed to prepare {node}, the account stays on {source}: {error}")
+        return False
+
+    topology.assign(account_sid=account_sid, node=node)
+
+    print(f"✅ Account {account_sid} moved from {source} to {node}.")
+    ttl = Configurations.BROKER_ASSIGNMENT_CACHE_TTL
+    print(
+        f"Servers follow within {ttl:g} seconds. "
+        "Point the account's Deku clients to the new node, then run:"
+    )
+    print(f"python rebalance_broker.py -u {account_sid} --cleanup {source}")
+    return True
+
+
+def cleanup_account(account_sid: str, node: str, force: bool = False) -> bool:
+    """Delete an account's RabbitMQ user and virtual host from a node it was moved from.
+
+    :param account_sid: The account ID of the user.
+    :param node: The node the account was moved from.
+    :param force: Whether to delete messages still queued on the node.
+    :return: True if the node was cleaned up, False otherwise.
+    """
+
+    if topology.node_of(account_sid) == node:
+        print(f"❌ Account {account_sid} is assigned to {node}, move it first.")
+        return False
+
+    virtual_host = rabbitmq.get_virtual_host(name=account_sid, node=node)
+
+    if virtual_host and virtual_host.get("messages") and not force:
+        print(
+            f"❌ {virtual_host['messages']} messages are still queued on {node}. "
+            "Retry once the Deku clients drained them, or pass --force."
+        )
+        return False
+
+    rabbitmq.delete_user(username=account_sid, node=node)
+    rabbitmq.delete_virtual_host(name=account_sid, node=node)
+
+    print(f"✅ Account {account_sid} removed from {node}.")
+    return True
+
+
+def main():
+    """Command line interface for rebalancing accounts across RabbitMQ nodes."""
+
+    parser = argparse.ArgumentParser(description="Move accounts across RabbitMQ nodes")
+    parser.add_argument("-u", "--username", help="The account ID of the user")
+    parser.add_argument("--node", help="The node to move the account to")
+    parser.add_argument("--cleanup", help="The node to remove the account from")
+    parser.add_argument(
+        "--force", action="store_true", help="Clean up even if messages are queued"
+    )
+    args = parser.parse_args()
+
+    if not args.username:
+        show_nodes()
+    elif args.node:
+        move_account(args.username, args.node)
+    elif args.cleanup:
+        cleanup_account(args.username, args.cleanup, force=args.force)
+    else:
+        print(f"{args.username}: {topology.node_of(args.username)}")
+
+
+if __name__ == "__main__":
+    main()
+
+# python rebalance_broker.py
+# python rebalance_broker.py -u myaccountid --node rabbitmq-2
+# python rebalance_broker.py -u myaccountid --cleanup rabbitmq-1
@@ -4,23 +4,35 @@ import argparse
 import json
 import logging
 
-from flask import Flask
+from flask import Flask, Response
 from flask_cors import CORS
 
 from settings import Configurations
 
 from src.api_v1 import v1
+from src.utils.metrics import generate_metrics
+from src.utils.json_provider import create_json_provider
 
 HOST = Configurations.HOST
 PORT = Configurations.PORT
 ORIGINS = Configurations.ORIGINS
 
 app = Flask(__name__)
+app.json = create_json_provider(app)
 
 CORS(app, origins=json.loads(ORIGINS), supports_credentials=True)
 
 app.register_blueprint(v1, name="v1", url_prefix="/v1")
 
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus Metrics Endpoint"""
+    body, content_type = generate_metrics()
+
+    return Response(body, content_type=content_type)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--logs", help="Set log level")
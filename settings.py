@@ -39,6 +39,9 @@ class Configurations(BaseConfig):
     MYSQL_USER = os.environ.get("MYSQL_USER")
     MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD")
     MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE")
+    MYSQL_MAX_CONNECTIONS = int(os.environ.get("MYSQL_MAX_CONNECTIONS") or 20)
+    MYSQL_STALE_TIMEOUT = int(os.environ.get("MYSQL_STALE_TIMEOUT") or 300)
+    MYSQL_POOL_TIMEOUT = int(os.environ.get("MYSQL_POOL_TIMEOUT") or 10)
 
     ENCRYPTION_KEY = os.environ["ENCRYPTION_KEY"]
     HASH_SALT = os.environ["HASH_SALT"]
@@ -63,3 +66,97 @@ class Configurations(BaseConfig):
         os.environ.get("RABBITMQ_MANAGEMENT_PORT_SSL") or "15671"
     )
     RABBITMQ_SERVER_PORT_SSL = os.environ.get("RABBITMQ_SERVER_PORT_SSL") or "5671"
+    RABBITMQ_STATUS_QUEUE = os.environ.get("RABBITMQ_STATUS_QUEUE") or "status"
+
+    STATUS_BATCH_SIZE = int(os.environ.get("STATUS_BATCH_SIZE") or 500)
+    STATUS_FLUSH_INTERVAL = float(os.environ.get("STATUS_FLUSH_INTERVAL") or 1)
+    STATUS_REFRESH_INTERVAL = float(os.environ.get("STATUS_REFRESH_INTERVAL") or 60)
+    STATUS_SHARDS = int(os.environ.get("STATUS_SHARDS") or 1)
+
+    PWNED_PASSWORDS_URL = (
+        os.environ.get("PWNED_PASSWORDS_URL") or "https://api.pwnedpasswords.com/range"
+    )
+    PWNED_PASSWORDS_TIMEOUT = float(os.environ.get("PWNED_PASSWORDS_TIMEOUT") or 3)
+    PWNED_PASSWORDS_CACHE_SIZE = int(
+        os.environ.get("PWNED_PASSWORDS_CACHE_SIZE") or 4096
+    )
+    PWNED_PASSWORDS_FILTER = os.environ.get("PWNED_PASSWORDS_FILTER")
+
+    CARRIER_ROUTER = (os.environ.get("CARRIER_ROUTER") or "phonenumbers").lower()
+
+    TRACING_EXPORTER = (os.environ.get("TRACING_EXPORTER") or "").lower()
+    TRACING_FILE = os.environ.get("TRACING_FILE") or "traces.jsonl"
+
+    RATE_LIMIT_REQUESTS = float(os.environ.get("RATE_LIMIT_REQUESTS") or 10)
+    RATE_LIMIT_REQUEST_BURST = int(os.environ.get("RATE_LIMIT_REQUEST_BURST") or 20)
+    RATE_LIMIT_MESSAGES = float(os.environ.get("RATE_LIMIT_MESSAGES") or 1000)
+    RATE_LIMIT_MESSAGE_BURST = int(os.environ.get("RATE_LIMIT_MESSAGE_BURST") or 10000)
+    RATE_LIMIT_PROJECT_REQUESTS = float(
+        os.environ.get("RATE_LIMIT_PROJECT_REQUESTS") or 0
+    )
+    RATE_LIMIT_PROJECT_REQUEST_BURST = int(
+        os.environ.get("RATE_LIMIT_PROJECT_REQUEST_BURST") or 20
+    )
+    RATE_LIMIT_PROJECT_MESSAGES = float(
+        os.environ.get("RATE_LIMIT_PROJECT_MESSAGES") or 0
+    )
+    RATE_LIMIT_PROJECT_MESSAGE_BURST = int(
+        os.environ.get("RATE_LIMIT_PROJECT_MESSAGE_BURST") or 10000
+    )
+    RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND") or "memory"
+    RATE_LIMIT_CACHE_TTL = float(os.environ.get("RATE_LIMIT_CACHE_TTL") or 60)
+
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE") or 50000)
+
+    JSON_PROVIDER = (os.environ.get("JSON_PROVIDER") or "orjson").lower()
+    JSON_DATETIME_FORMAT = (os.environ.get("JSON_DATETIME_FORMAT") or "http").lower()
+
+    COMPRESSION_ACTIVE = os.environ.get("COMPRESSION_ACTIVE", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE") or 1024)
+
+    AMQP_COMPRESSION_MIN_SIZE = int(os.environ.get("AMQP_COMPRESSION_MIN_SIZE") or 1024)
+
+    JOB_BATCH_SIZE = int(os.environ.get("JOB_BATCH_SIZE") or 500)
+    JOB_LEASE_TIMEOUT = float(os.environ.get("JOB_LEASE_TIMEOUT") or 600)
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS") or 3)
+    JOB_RESUME_INTERVAL = float(os.environ.get("JOB_RESUME_INTERVAL") or 60)
+
+    SCHEDULER_MAX_WAIT = float(os.environ.get("SCHEDULER_MAX_WAIT") or 10)
+    SCHEDULER_BATCH_LIMIT = int(os.environ.get("SCHEDULER_BATCH_LIMIT") or 100)
+    SEND_AT_MAX_DELAY = int(os.environ.get("SEND_AT_MAX_DELAY") or 366 * 24 * 3600)
+
+    DISPATCH_HIGH_WORKERS = int(os.environ.get("DISPATCH_HIGH_WORKERS") or 8)
+    DISPATCH_BULK_WORKERS = int(os.environ.get("DISPATCH_BULK_WORKERS") or 2)
+    DISPATCH_HIGH_MAX_MESSAGES = int(
+        os.environ.get("DISPATCH_HIGH_MAX_MESSAGES") or 100
+    )
+
+    ACCOUNT_DELETION_CHUNK_SIZE = int(
+        os.environ.get("ACCOUNT_DELETION_CHUNK_SIZE") or 1000
+    )
+
+    RABBITMQ_CONNECT_TIMEOUT = float(os.environ.get("RABBITMQ_CONNECT_TIMEOUT") or 3)
+    RABBITMQ_MANAGEMENT_TIMEOUT = float(
+        os.environ.get("RABBITMQ_MANAGEMENT_TIMEOUT") or 10
+    )
+    RABBITMQ_AMQP_TIMEOUT = float(os.environ.get("RABBITMQ_AMQP_TIMEOUT") or 10)
+    RABBITMQ_BREAKER_FAILURES = int(os.environ.get("RABBITMQ_BREAKER_FAILURES") or 5)
+    RABBITMQ_BREAKER_RESET_TIMEOUT = float(
+        os.environ.get("RABBITMQ_BREAKER_RESET_TIMEOUT") or 30
+    )
+
+    OUTBOX_ACTIVE = os.environ.get("OUTBOX_ACTIVE", "false").lower() == "true"
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE") or 500)
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL") or 1)
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS") or 5)
+    OUTBOX_RETENTION = float(os.environ.get("OUTBOX_RETENTION") or 3600)
+    OUTBOX_MAX_CONNECTIONS = int(os.environ.get("OUTBOX_MAX_CONNECTIONS") or 100)
+
+    RABBITMQ_NODES = [
+        node.strip()
+        for node in (os.environ.get("RABBITMQ_NODES") or "").split(",")
+        if node.strip()
+    ] or [RABBITMQ_HOST]
+    BROKER_ASSIGNMENT_CACHE_TTL = float(
+        os.environ.get("BROKER_ASSIGNMENT_CACHE_TTL") or 60
+    )
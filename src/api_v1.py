@@ -4,10 +4,8 @@ import logging
 import json
 from datetime import timedelta
 import csv
-import threading
 
-from flask import request, Blueprint, Response, jsonify, after_this_request
-from playhouse.shortcuts import model_to_dict
+from flask import request, Blueprint, Response, jsonify, after_this_request, g
 
 from werkzeug.exceptions import (
     InternalServerError,
@@ -15,17 +13,22 @@ from werkzeug.exceptions import (
     Conflict,
     Unauthorized,
     NotFound,
+    TooManyRequests,
+    ServiceUnavailable,
 )
 
 from settings import Configurations
-from src.orm.peewee.connector import database
+from src.orm.peewee.connector import database, get_pool_stats
 
 from src.security.password_policy import check_password_policy
 
 from src.orm.peewee.handlers.session import SessionHandler
 from src.orm.peewee.handlers.log import LogHandler
 from src.orm.peewee.handlers.user import UserHandler
-from src.controllers import user, project, service
+from src.controllers import user, project, log, job, deletion
+from src.utils import metrics, tracing, idempotency, conditional, dispatcher
+from src.utils.compression import compress_response
+from src.utils.rate_limiter import get_rate_limiter
 
 
 logger = logging.getLogger(__name__)
@@ -35,12 +38,30 @@ v1 = Blueprint("v1", __name__)
 COOKIE_NAME = Configurations.COOKIE_NAME
 
 
+@v1.before_request
+def before_request():
+    """Check out a database connection for the request"""
+    metrics.start_request()
+    g.trace = tracing.start_span(
+        f"{request.method} {request.endpoint}", path=request.path
+    )
+    database.connect(reuse_if_open=True)
+
+
+@v1.teardown_request
+def teardown_request(exception):
+    """Return the request's database connection"""
+    if not database.is_closed():
+        database.close()
+
+    metrics.end_request()
+    tracing.end_span(*g.pop("trace", (None, None)), error=exception)
+
+
 @v1.after_request
 def after_request(response):
     """After request decorator"""
     try:
-        database.close()
-
         response.headers[
             "Strict-Transport-Security"
         ] = "max-age=63072000; includeSubdomains"
@@ -54,6 +75,12 @@ def after_request(response):
             "Permissions-Policy"
         ] = "accelerometer=(), ambient-light-sensor=(), autoplay=(), battery=(), camera=(), clipboard-read=(), clipboard-write=(), cross-origin-isolated=(), display-capture=(), document-domain=(), encrypted-media=(), execution-while-not-rendered=(), execution-while-out-of-viewport=(), fullscreen=(), gamepad=(), geolocation=(), gyroscope=(), magnetometer=(), microphone=(), midi=(), navigation-override=(), payment=(), picture-in-picture=(), publickey-credentials-get=(), screen-wake-lock=(), speaker=(), speaker-selection=(), sync-xhr=(), usb=(), web-share=(), xr-spatial-tracking=()"
 
+        compress_response(response)
+        metrics.observe_response(response)
+
+        if g.get("trace") and g.trace[0]:
+            g.trace[0].set_attribute("status", response.status_code)
+
         return response
 
     except Exception as error:
@@ -61,6 +88,18 @@ def after_request(response):
         return "Internal Server Error", 500
 
 
+@v1.route("/health", methods=["GET"])
+def health():
+    """Health Endpoint"""
+
+    try:
+        return jsonify({"database": get_pool_stats()}), 200
+
+    except Exception as error:
+        logger.exception(error)
+        return "Internal Server Error", 500
+
+
 @v1.route("/signup", methods=["POST"])
 def signup():
     """Signup Endpoint"""
@@ -106,6 +145,9 @@ def signup():
     except Conflict as err:
         return str(err), 409
 
+    except ServiceUnavailable as err:
+        return str(err), 503
+
     except InternalServerError as err:
         logger.exception(err)
         return "Internal Server Error", 500
@@ -216,6 +258,8 @@ def index():
         if not session:
             raise Unauthorized()
 
+        status_code = 200
+
         if method == "get":
             current_user = user.get_user_by_id(user_id=session.unique_identifier)
 
@@ -236,10 +280,29 @@ def index():
         if method == "delete":
             json_data = request.json
 
-            if not user.delete_user(user_id=session.unique_identifier, **json_data):
+            started = deletion.delete_account(
+                user_id=session.unique_identifier, password=json_data.get("password")
+            )
+
+            if not started:
                 raise Unauthorized()
 
-            res = Response()
+            account_deletion, worker = started
+
+            def delete_account():
+                with database.connection_context():
+                    deletion.run_deletion(deletion=account_deletion, worker=worker)
+
+            @after_this_request
+            def delete_account_after_request(response):
+                if worker:
+                    dispatcher.submit(dispatcher.BULK, delete_account)
+                return response
+
+            res = jsonify(
+                deletion.get_deletion(reference=account_deletion["reference"])
+            )
+            status_code = 202
 
         session = session_handler.update_session(session_id=sid)
 
@@ -254,7 +317,7 @@ def index():
             samesite=session_data["samesite"],
         )
 
-        return res, 200
+        return res, status_code
 
     except BadRequest as err:
         return str(err), 400
@@ -302,7 +365,13 @@ def project_endpoint():
         if not session:
             raise Unauthorized()
 
+        res = None
+
         if method == "get":
+            etag = conditional.data_etag(user_id=session.unique_identifier)
+            res = conditional.not_modified(etag)
+
+        if method == "get" and res is None:
             input_data = {}
 
             if request.args.get("filter"):
@@ -320,6 +389,7 @@ def project_endpoint():
             )
 
             res = jsonify(projects_list)
+            res.set_etag(etag, weak=True)
 
             if request.args.get("range"):
                 res.headers[
@@ -378,7 +448,7 @@ def project_endpoint():
             samesite=session_data["samesite"],
         )
 
-        return res, 200
+        return res, res.status_code
 
     except BadRequest as err:
         return str(err), 400
@@ -389,6 +459,9 @@ def project_endpoint():
     except Conflict as err:
         return str(err), 409
 
+    except ServiceUnavailable as err:
+        return str(err), 503
+
     except InternalServerError as err:
         logger.exception(err)
         return "Internal Server Error", 500
@@ -475,6 +548,9 @@ def single_project_endpoint(project_id):
     except NotFound as err:
         return str(err), 404
 
+    except ServiceUnavailable as err:
+        return str(err), 503
+
     except InternalServerError as err:
         logger.exception(err)
         return "Internal Server Error", 500
@@ -484,7 +560,7 @@ def single_project_endpoint(project_id):
         return "Internal Server Error", 500
 
 
-@v1.route("/logs", methods=["GET"])
+@v1.route("/logs", methods=["GET", "PUT"])
 def log_endpoint():
     """Manage Logs"""
 
@@ -513,7 +589,13 @@ def log_endpoint():
         if not session:
             raise Unauthorized()
 
+        res = None
+
         if method == "get":
+            etag = conditional.data_etag(user_id=session.unique_identifier)
+            res = conditional.not_modified(etag)
+
+        if method == "get" and res is None:
             input_data = {}
 
             if request.args.get("filter"):
@@ -528,9 +610,11 @@ def log_endpoint():
             [total, logs_list] = log_handler.get_logs_by_field(
                 user_id=session.unique_identifier,
                 **input_data,
+                as_dicts=True,
             )
 
-            res = jsonify([model_to_dict(log, recurse=False) for log in logs_list])
+            res = jsonify(logs_list)
+            res.set_etag(etag, weak=True)
 
             if request.args.get("range"):
                 res.headers[
@@ -538,6 +622,17 @@ def log_endpoint():
                 ] = f"rows {input_data['data_range'][0]}-{input_data['data_range'][1]}/{total}"
                 res.headers["Access-Control-Expose-Headers"] = "Content-Range"
 
+        if method == "put":
+            json_data = request.json
+
+            if not isinstance(json_data, list) or not json_data:
+                logger.error("Expected a list of log updates")
+                raise BadRequest("Expected a list of log updates")
+
+            res = jsonify(
+                log.update_logs(user_id=session.unique_identifier, items=json_data)
+            )
+
         session = session_handler.update_session(session_id=sid)
 
         session_data = json.loads(session.data)
@@ -551,7 +646,7 @@ def log_endpoint():
             samesite=session_data["samesite"],
         )
 
-        return res, 200
+        return res, res.status_code
 
     except BadRequest as err:
         return str(err), 400
@@ -614,6 +709,8 @@ def single_log_endpoint(log_id):
             if not log_handler.update_log(log_id=log_id, status=status):
                 raise NotFound(f"Log with ID '{log_id}' not found")
 
+            UserHandler().bump_data_version(user_id=session.unique_identifier)
+
             current_log = ""
 
         res = jsonify(current_log)
@@ -656,6 +753,7 @@ def publish_endpoint(reference: str, service_id: str):
     """Publish Endpoint"""
 
     results = {"message": "", "errors": [], "warnings": [], "response": []}
+    rate_limit = None
 
     try:
         if not request.authorization:
@@ -674,149 +772,257 @@ def publish_endpoint(reference: str, service_id: str):
             logger.error("Invalid service: %s", service_id)
             raise BadRequest()
 
+        priority = (request.args.get("priority") or "").lower() or None
+
+        if priority and priority not in dispatcher.PRIORITIES:
+            logger.error("Invalid priority: %s", priority)
+            raise BadRequest(f"Invalid priority: {priority}")
+
         username = request.authorization.get("username")
         password = request.authorization.get("password")
 
-        # Handle JSON payload
-        payload = []
-        required_keys = {"body", "to"}
+        user_handler = UserHandler()
 
-        if request.is_json:
-            json_data = request.get_json()
+        with tracing.span("auth_lookup"):
+            [user_total, users_list] = user_handler.get_users_by_field(
+                account_sid=username, auth_token=password
+            )
 
-            if isinstance(json_data, list):
-                for item in json_data:
-                    result = {
-                        "sid": item.get("sid"),
-                        "message": "",
-                        "errors": [],
-                        "warnings": [],
-                    }
+        if user_total < 1 and len(users_list) < 1:
+            logger.error("User not found.")
+            raise Unauthorized()
 
-                    missing_keys = required_keys.difference(item.keys())
+        # The account bucket is charged once the credentials match, so
+        # requests with made-up credentials cannot drain it
+        rate_limiter = get_rate_limiter()
+        rate_limit = rate_limiter.check_account(account_sid=username)
 
-                    if missing_keys:
-                        missing_key = missing_keys.pop()
-                        result["errors"].append(f"Missing required key '{missing_key}'")
+        if rate_limit and not rate_limit.allowed:
+            logger.error("Rate limit exceeded for %s", username)
+            raise TooManyRequests()
 
-                    else:
-                        payload.append(
-                            {
-                                "body": item["body"],
-                                "to": item["to"],
-                                "sid": item.get("sid"),
-                            }
-                        )
-                        result["message"] = "queued"
+        with tracing.span("user_decrypt"):
+            current_user = user.get_user_by_id(user_id=users_list[0].id)
 
-                    results["response"].append(result)
-            elif isinstance(json_data, dict):
-                result = {
-                    "sid": json_data.get("sid"),
-                    "message": "",
-                    "errors": [],
-                    "warnings": [],
-                }
+        with tracing.span("project_lookup"):
+            [project_total, projects_list] = project.get_projects_by_field(
+                reference=reference, user_id=current_user.get("id")
+            )
 
-                missing_keys = required_keys.difference(json_data.keys())
+        if project_total < 1 and len(projects_list) < 1:
+            err_message = f"Project with reference {reference} not found"
+            logger.error(err_message)
+            raise NotFound(err_message)
 
-                if missing_keys:
-                    missing_key = missing_keys.pop()
-                    result["errors"].append(f"Missing required key '{missing_key}'")
+        project_limit = rate_limiter.check_project(
+            account_sid=username, project_reference=reference
+        )
 
-                else:
-                    payload.append(
-                        {
-                            "body": json_data["body"],
-                            "to": json_data["to"],
-                            "sid": json_data.get("sid"),
-                        }
-                    )
-                    result["message"] = "queued"
+        if project_limit and not project_limit.allowed:
+            logger.error("Rate limit exceeded for project %s", reference)
+            rate_limit = project_limit
+            raise TooManyRequests()
 
-                results["response"].append(result)
-            else:
-                results["errors"].append(f"Invalid JSON payload format: {json_data}")
+        rate_limit = rate_limit or project_limit
 
-        # Handle uploaded CSV file
-        if "file" in request.files:
-            file = request.files["file"]
+        if rate_limit:
 
-            if file and file.filename.endswith(".csv"):
-                csv_data = csv.DictReader(file.read().decode("utf-8").splitlines())
+            @after_this_request
+            def add_rate_limit_headers(response):
+                response.headers.extend(rate_limit.headers())
+                return response
 
-                for idx, row in enumerate(csv_data, start=1):
+        with tracing.span("parse_payload"):
+            # Handle JSON payload
+            payload = []
+            required_keys = {"body", "to"}
+
+            if request.is_json:
+                json_data = request.get_json()
+
+                if isinstance(json_data, list):
+                    for item in json_data:
+                        result = {
+                            "sid": item.get("sid"),
+                            "message": "",
+                            "errors": [],
+                            "warnings": [],
+                        }
+
+                        missing_keys = required_keys.difference(item.keys())
+
+                        if missing_keys:
+                            missing_key = missing_keys.pop()
+                            result["errors"].append(
+                                f"Missing required key '{missing_key}'"
+                            )
+
+                        else:
+                            try:
+                                payload.append(
+                                    {
+                                        "body": item["body"],
+                                        "to": item["to"],
+                                        "sid": item.get("sid"),
+                                        "send_at": job.parse_send_at(
+                                            item.get("send_at")
+                                        ),
+                                    }
+                                )
+                                result["message"] = "queued"
+                            except ValueError as error:
+                                result["errors"].append(str(error))
+
+                        results["response"].append(result)
+                elif isinstance(json_data, dict):
                     result = {
-                        "sid": row.get("sid"),
+                        "sid": json_data.get("sid"),
                         "message": "",
                         "errors": [],
                         "warnings": [],
                     }
 
-                    missing_keys = required_keys.difference(row.keys())
+                    missing_keys = required_keys.difference(json_data.keys())
 
                     if missing_keys:
                         missing_key = missing_keys.pop()
-                        result["errors"].append(
-                            f"Missing required key '{missing_key}' at line {idx+1}"
-                        )
+                        result["errors"].append(f"Missing required key '{missing_key}'")
 
                     else:
-                        payload.append(
-                            {
-                                "body": row["body"],
-                                "to": row["to"],
-                                "sid": row.get("sid"),
-                            }
-                        )
-                        result["message"] = "queued"
+                        try:
+                            payload.append(
+                                {
+                                    "body": json_data["body"],
+                                    "to": json_data["to"],
+                                    "sid": json_data.get("sid"),
+                                    "send_at": job.parse_send_at(
+                                        json_data.get("send_at")
+                                    ),
+                                }
+                            )
+                            result["message"] = "queued"
+                        except ValueError as error:
+                            result["errors"].append(str(error))
 
                     results["response"].append(result)
-            else:
-                results["errors"].append("Invalid file format or no file uploaded")
+                else:
+                    results["errors"].append(
+                        f"Invalid JSON payload format: {json_data}"
+                    )
+
+            # Handle uploaded CSV file
+            if "file" in request.files:
+                file = request.files["file"]
+
+                if file and file.filename.endswith(".csv"):
+                    csv_data = csv.DictReader(file.read().decode("utf-8").splitlines())
+
+                    for idx, row in enumerate(csv_data, start=1):
+                        result = {
+                            "sid": row.get("sid"),
+                            "message": "",
+                            "errors": [],
+                            "warnings": [],
+                        }
+
+                        missing_keys = required_keys.difference(row.keys())
+
+                        if missing_keys:
+                            missing_key = missing_keys.pop()
+                            result["errors"].append(
+                                f"Missing required key '{missing_key}' at line {idx+1}"
+                            )
+
+                        else:
+                            try:
+                                payload.append(
+                                    {
+                                        "body": row["body"],
+                                        "to": row["to"],
+                                        "sid": row.get("sid"),
+                                        "send_at": job.parse_send_at(
+                                            row.get("send_at")
+                                        ),
+                                    }
+                                )
+                                result["message"] = "queued"
+                            except ValueError as error:
+                                result["errors"].append(f"{error} at line {idx+1}")
+
+                        results["response"].append(result)
+                else:
+                    results["errors"].append("Invalid file format or no file uploaded")
 
         if not payload:
             results["warnings"].append("No valid payload found. No message was sent")
 
             return jsonify(results), 200
 
-        user_handler = UserHandler()
+        # Parsing marks a result "queued" for each message added to the payload
+        queued_results = [
+            result for result in results["response"] if result["message"] == "queued"
+        ]
 
-        [user_total, users_list] = user_handler.get_users_by_field(
-            account_sid=username, auth_token=password
-        )
+        with tracing.span("dedupe", messages=len(payload)):
+            duplicates = idempotency.find_duplicates(
+                user_id=current_user.get("id"), items=payload
+            )
 
-        if user_total < 1 and len(users_list) < 1:
-            logger.error("User not found.")
-            raise Unauthorized()
+        for result, duplicate in zip(queued_results, duplicates):
+            if duplicate:
+                result["message"] = "duplicate"
+
+        payload = [
+            {**item, "sid": item.get("sid") or None}
+            for item, duplicate in zip(payload, duplicates)
+            if not duplicate
+        ]
 
-        current_user = user.get_user_by_id(user_id=users_list[0].id)
+        if not payload:
+            results["warnings"].append(
+                "All messages are duplicates. No message was sent"
+            )
+
+            return jsonify(results), 200
 
-        [project_total, projects_list] = project.get_projects_by_field(
-            reference=reference, user_id=current_user.get("id")
+        metrics.MESSAGES_QUEUED.labels(service_id.lower()).inc(len(payload))
+
+        lane = dispatcher.choose_priority(requested=priority, messages=len(payload))
+
+        if priority and lane != priority:
+            results["warnings"].append(
+                f"More than {Configurations.DISPATCH_HIGH_MAX_MESSAGES} messages, "
+                f"sent with {lane} priority"
+            )
+
+        with tracing.span("job_create", messages=len(payload)):
+            new_job, batches, worker = job.create_job(
+                user_id=current_user.get("id"),
+                project_reference=reference,
+                service_id=service_id,
+                items=payload,
+                priority=lane,
+            )
+
+        # Only messages stored in a job are deduplicated and charged, so a
+        # request failing before this point can be retried
+        idempotency.remember(user_id=current_user.get("id"), items=payload)
+        rate_limiter.charge_messages(
+            account_sid=username, project_reference=reference, count=len(payload)
         )
 
-        if project_total < 1 and len(projects_list) < 1:
-            err_message = f"Project with reference {reference} not found"
-            logger.error(err_message)
-            raise NotFound(err_message)
+        results["job_id"] = new_job["id"]
 
         def send_messages():
-            for item in payload:
-                service.publish_to_service(
-                    service_id=service_id,
-                    content=item["body"],
-                    project_reference=reference,
-                    phone_number=item["to"].replace(" ", ""),
-                    user=current_user,
-                    sid=item["sid"],
-                )
+            with tracing.span("send_messages", messages=len(payload)):
+                with database.connection_context():
+                    job.run_job(
+                        job=new_job, user=current_user, worker=worker, batches=batches
+                    )
 
         @after_this_request
         def send_messages_after_request(response):
-            # Start a new thread to send messages
-            thread = threading.Thread(target=send_messages)
-            thread.start()
+            dispatcher.submit(lane, send_messages)
             return response
 
         if any(result["errors"] for result in results["response"]):
@@ -837,6 +1043,85 @@ def publish_endpoint(reference: str, service_id: str):
     except NotFound as err:
         return str(err), 404
 
+    except TooManyRequests as err:
+        return str(err), 429, rate_limit.headers()
+
+    except ServiceUnavailable as err:
+        return str(err), 503
+
+    except InternalServerError as err:
+        logger.exception(err)
+        return "Internal Server Error", 500
+
+    except Exception as error:
+        logger.exception(error)
+        return "Internal Server Error", 500
+
+
+@v1.route("/jobs/<int:job_id>", methods=["GET"])
+def single_job_endpoint(job_id: int):
+    """Single Job Endpoint"""
+
+    try:
+        if not request.authorization:
+            logger.error("No Authorization header")
+            raise Unauthorized()
+
+        username = request.authorization.get("username")
+        password = request.authorization.get("password")
+
+        if not username or not password:
+            logger.error("No username or password")
+            raise BadRequest()
+
+        [user_total, users_list] = UserHandler().get_users_by_field(
+            account_sid=username, auth_token=password
+        )
+
+        if user_total < 1 and len(users_list) < 1:
+            logger.error("User not found.")
+            raise Unauthorized()
+
+        current_job = job.get_job(job_id=job_id, user_id=users_list[0].id)
+
+        if not current_job:
+            raise NotFound(f"Job with ID '{job_id}' not found")
+
+        return jsonify(current_job), 200
+
+    except BadRequest as err:
+        return str(err), 400
+
+    except Unauthorized as err:
+        return str(err), 401
+
+    except NotFound as err:
+        return str(err), 404
+
+    except InternalServerError as err:
+        logger.exception(err)
+        return "Internal Server Error", 500
+
+    except Exception as error:
+        logger.exception(error)
+        return "Internal Server Error", 500
+
+
+@v1.route("/deletions/<string:reference>", methods=["GET"])
+def single_deletion_endpoint(reference: str):
+    """Single Account Deletion Endpoint"""
+
+    try:
+        current_deletion = deletion.get_deletion(reference=reference)
+
+        if not current_deletion:
+            raise NotFound(f"Account deletion '{reference}' not found")
+
+        return jsonify(current_deletion), 200
+
+    except NotFound as err:
+        return str(err), 404
+
     except InternalServerError as err:
         logger.exception(err)
         return "Internal Server Error", 500
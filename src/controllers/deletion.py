@@ -0,0 +1,237 @@
+"""Controller Functions for Account Deletion Operations"""
+
+import logging
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from playhouse.shortcuts import model_to_dict
+
+from settings import Configurations
+from src.security.crypto import DataSecurity
+from src.orm.peewee.connector import database
+from src.orm.peewee.handlers.deletion import DeletionHandler
+from src.orm.peewee.handlers.user import UserHandler
+from src.orm.peewee.handlers.project import ProjectHandler
+from src.orm.peewee.handlers.log import LogHandler
+from src.orm.peewee.handlers.job import JobHandler
+from src.orm.peewee.handlers.outbox import OutboxHandler
+from src.controllers.job import new_worker_id
+from src.utils import rabbitmq, tracing
+from src.utils.broker_topology import topology
+
+logger = logging.getLogger(__name__)
+
+
+def delete_account(user_id: int, password: str) -> Optional[tuple]:
+    """
+    Starts deleting a user's account, to be run by run_deletion.
+
+    The user's auth token is replaced, so the account cannot publish while
+    it is being deleted, and logins are refused by verify_user.
+
+    :param user_id: int - The ID of the user to delete.
+    :param password: str - The user's password.
+
+    :return: Optional[tuple] - The deletion as a dict and the worker leasing
+        it, or None if the password is wrong. The worker is None if the
+        account is already being deleted.
+    """
+    user_handler = UserHandler()
+    deletion_handler = DeletionHandler()
+    data_security = DataSecurity()
+
+    user = user_handler.get_user_by_id(user_id=user_id)
+
+    if not user or not data_security.check_password(
+        password=password, hashed_password=user.password
+    ):
+        return None
+
+    running = deletion_handler.get_deletion(user_id=user_id, status="running")
+
+    if running:
+        return running, None
+
+    worker = new_worker_id()
+
+    with database.atomic():
+        user_handler.update_user(user_id=user_id, auth_token=secrets.token_hex(32))
+        new_deletion = deletion_handler.create_deletion(
+            user_id=user_id, account_sid=user.account_sid, worker=worker
+        )
+
+    return model_to_dict(new_deletion), worker
+
+
+def run_deletion(deletion: dict, worker: str) -> bool:
+    """
+    Deletes an account's data, one stage at a time.
+
+    The RabbitMQ virtual host is dropped once, which removes the exchanges
+    of all the account's projects with it. Logs are deleted in chunks of
+    ACCOUNT_DELETION_CHUNK_SIZE. Every stage and chunk is recorded on the
+    deletion, which also renews the worker's lease on it. All stages can be
+    repeated, so a deletion that stops is run again from the start by
+    resume_stale_deletions.
+
+    :param deletion: dict - The deletion.
+    :param worker: str - The worker leasing the deletion.
+
+    :return: bool - True if the account was deleted by this worker.
+    """
+    deletion_handler = DeletionHandler()
+    log_handler = LogHandler()
+    user_handler = UserHandler()
+    user_id = deletion["user_id"]
+
+    def record(stage: str, **counts) -> bool:
+        if deletion_handler.record_progress(
+            deletion_id=deletion["id"], worker=worker, stage=stage, **counts
+        ):
+            return True
+
+        logger.warning(
+            "Account deletion %s was taken over by another worker", deletion["id"]
+        )
+        return False
+
+    try:
+        if not record("broker"):
+            return False
+
+        rabbitmq.delete_user(username=deletion["account_sid"])
+        rabbitmq.delete_virtual_host(name=deletion["account_sid"])
+
+        if not record("jobs"):
+            return False
+
+        # Running jobs stop at their next batch once their row is gone,
+        # messages not relayed yet are dropped with the virtual host
+        jobs_deleted = JobHandler().delete_jobs(user_id=user_id)
+        OutboxHandler().delete_messages(user_id=user_id)
+
+        if not record("logs", jobs_deleted=jobs_deleted):
+            return False
+
+        while True:
+            with tracing.span("delete_logs_chunk"):
+                logs_deleted = log_handler.delete_logs_chunk(
+                    user_id=user_id, limit=Configurations.ACCOUNT_DELETION_CHUNK_SIZE
+                )
+
+            if not logs_deleted:
+                break
+
+            if not record("logs", logs_deleted=logs_deleted):
+                return False
+
+        projects_deleted = ProjectHandler().delete_projects(user_id=user_id)
+
+        if not record("user", projects_deleted=projects_deleted):
+            return False
+
+        user = user_handler.get_user_by_id(user_id=user_id)
+
+        if user:
+            # Fails if a job still running added logs since, the deletion
+            # is then resumed and deletes them first
+            user.delete_instance()
+
+        topology.forget(account_sid=deletion["account_sid"])
+
+        return deletion_handler.finish_deletion(
+            deletion_id=deletion["id"], status="completed", worker=worker
+        )
+
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        logger.error(
+            "Account deletion %s stopped, it will be resumed: %s",
+            deletion["id"],
+            error,
+        )
+        return False
+
+
+def resume_deletion(deletion_id: int, worker: str) -> bool:
+    """
+    Runs a claimed deletion again.
+
+    :param deletion_id: int - The ID of the deletion.
+    :param worker: str - The worker that claimed the deletion.
+
+    :return: bool - True if the account was deleted by this worker.
+    """
+    with database.connection_context():
+        deletion = DeletionHandler().get_deletion(id=deletion_id)
+
+        if not deletion:
+            return False
+
+        logger.info(
+            "Resuming account deletion %s at stage %s", deletion_id, deletion["stage"]
+        )
+
+        with tracing.span("resume_deletion"):
+            return run_deletion(deletion=deletion, worker=worker)
+
+
+def resume_stale_deletions() -> list:
+    """
+    Claims the deletions whose worker stopped, e.g. in a restart, and resumes them.
+
+    Deletions go stale and fail after the same JOB_LEASE_TIMEOUT and
+    JOB_MAX_ATTEMPTS as publish jobs.
+
+    :return: list - The threads resuming the claimed deletions.
+    """
+    worker = new_worker_id()
+    stale_before = datetime.now() - timedelta(seconds=Configurations.JOB_LEASE_TIMEOUT)
+
+    with database.connection_context():
+        deletion_ids = DeletionHandler().claim_stale_deletions(
+            worker=worker,
+            stale_before=stale_before,
+            max_attempts=Configurations.JOB_MAX_ATTEMPTS,
+        )
+
+    threads = []
+
+    for deletion_id in deletion_ids:
+        thread = threading.Thread(
+            target=resume_deletion,
+            args=(deletion_id, worker),
+            name=f"deletion-{deletion_id}",
+        )
+        thread.start()
+        threads.append(thread)
+
+    return threads
+
+
+def get_deletion(reference: str) -> Optional[dict]:
+    """
+    Retrieves an account deletion's progress.
+
+    :param reference: str - The reference of the deletion.
+
+    :return: Optional[dict] - The deletion's status, stage and counters, or
+        None if no such deletion exists.
+    """
+    deletion = DeletionHandler().get_deletion(reference=reference)
+
+    if not deletion:
+        return None
+
+    return {
+        "reference": deletion["reference"],
+        "status": deletion["status"],
+        "stage": deletion["stage"],
+        "logs_deleted": deletion["logs_deleted"],
+        "projects_deleted": deletion["projects_deleted"],
+        "jobs_deleted": deletion["jobs_deleted"],
+        "created_at": deletion["created_at"],
+        "updated_at": deletion["updated_at"],
+        "finished_at": deletion["finished_at"],
+    }
@@ -0,0 +1,349 @@
+"""Controller Functions for Job Operations"""
+
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from peewee import chunked
+from playhouse.shortcuts import model_to_dict
+
+from settings import Configurations
+from src.orm.peewee.connector import database
+from src.orm.peewee.handlers.job import JobHandler
+from src.controllers import service
+from src.controllers.user import get_user_by_id
+from src.utils import tracing, dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+def new_worker_id() -> str:
+    """Returns a unique name for a run of a job, to lease the job with."""
+    return f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(4)}"
+
+
+def parse_send_at(value) -> Optional[int]:
+    """
+    Parses the send_at of a message, an ISO 8601 date or a Unix timestamp.
+
+    :param value: The send_at value, dates without an offset are in UTC.
+
+    :return: Optional[int] - The Unix time, or None if the value is empty.
+    :raises ValueError: If the value is not a date or timestamp, or is more
+        than SEND_AT_MAX_DELAY seconds ahead, e.g. a timestamp in milliseconds.
+    """
+    if value is None or value == "":
+        return None
+
+    try:
+        send_at = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        try:
+            date = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError as error:
+            raise ValueError(f"Invalid send_at '{value}'") from error
+
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+
+        send_at = int(date.timestamp())
+
+    if not 0 <= send_at <= time.time() + Configurations.SEND_AT_MAX_DELAY:
+        raise ValueError(f"send_at '{value}' is out of range")
+
+    return send_at
+
+
+def create_job(
+    user_id: int,
+    project_reference: str,
+    service_id: str,
+    items: list,
+    priority: str = dispatcher.BULK,
+) -> tuple:
+    """
+    Creates a job for a publish request, split into batches of JOB_BATCH_SIZE.
+
+    Messages with a future "send_at" are batched by the time they are due,
+    and released by release_due_batches.
+
+    :param user_id: int - The ID of the user publishing.
+    :param project_reference: str - The reference of the project to publish to.
+    :param service_id: str - The ID of the service to publish to.
+    :param items: list - The messages, each a dict with "body", "to", "sid"
+        and optionally "send_at".
+    :param priority: str - The priority lane of the job, "high" or "bulk".
+
+    :return: tuple - The job as a dict, its batches to publish now and the
+        worker leasing it.
+    """
+    now = time.time()
+    immediate = []
+    deferred = {}
+
+    for item in items:
+        send_at = item.pop("send_at", None)
+
+        if send_at and send_at > now:
+            deferred.setdefault(send_at, []).append(item)
+        else:
+            immediate.append(item)
+
+    batches = [
+        list(batch) for batch in chunked(immediate, Configurations.JOB_BATCH_SIZE)
+    ]
+    scheduled = [
+        (due_at, list(batch))
+        for due_at, group in sorted(deferred.items())
+        for batch in chunked(group, Configurations.JOB_BATCH_SIZE)
+    ]
+    worker = new_worker_id()
+
+    new_job = JobHandler().create_job(
+        user_id=user_id,
+        project_reference=project_reference,
+        service_id=service_id,
+        batches=batches,
+        worker=worker,
+        scheduled=scheduled,
+        priority=priority,
+    )
+
+    return model_to_dict(new_job, recurse=False), batches, worker
+
+
+def run_job(job: dict, user: dict, worker: str, batches: list = None) -> bool:
+    """
+    Publishes a job's messages from its cursor, one batch at a time.
+
+    The job's counters and cursor are updated once per batch, which also
+    renews the worker's lease on the job. If the worker stops, the job is
+    resumed from the last recorded batch by resume_stale_jobs.
+
+    :param job: dict - The job.
+    :param user: dict - The user the job belongs to.
+    :param worker: str - The worker leasing the job.
+    :param batches: list - The job's batches, read from the database if None.
+
+    :return: bool - True if the job was completed by this worker.
+    """
+    job_handler = JobHandler()
+
+    try:
+        # The job may have waited in its lane for longer than the lease
+        if not job_handler.renew_lease(job_id=job["id"], worker=worker):
+            logger.warning("Job %s was taken over by another worker", job["id"])
+            return False
+
+        for position in range(job["next_batch"], job["batches"]):
+            if batches is not None:
+                items = batches[position]
+            else:
+                items = job_handler.get_batch_items(job_id=job["id"], position=position)
+
+            with tracing.span("job_batch", position=position, messages=len(items)):
+                counts = service.publish_to_services(
+                    service_id=job["service_id"],
+                    project_reference=job["project_reference"],
+                    items=items,
+                    user=user,
+                    priority=job["priority"],
+                )
+
+            if not job_handler.record_batch(job_id=job["id"], worker=worker, **counts):
+                logger.warning("Job %s was taken over by another worker", job["id"])
+                return False
+
+        finished = job_handler.finish_job(
+            job_id=job["id"], status="completed", worker=worker
+        )
+
+        # Deferred batches may have been released while the job was running
+        job_handler.complete_scheduled_job(job_id=job["id"])
+
+        return finished
+
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        logger.error("Job %s stopped, it will be resumed: %s", job["id"], error)
+        return False
+
+
+def resume_job(job_id: int, worker: str) -> bool:
+    """
+    Resumes a claimed job from its cursor.
+
+    :param job_id: int - The ID of the job.
+    :param worker: str - The worker that claimed the job.
+
+    :return: bool - True if the job was completed by this worker.
+    """
+    with database.connection_context():
+        job = JobHandler().get_job(job_id=job_id)
+
+        if not job:
+            return False
+
+        logger.info("Resuming job %s from batch %s", job_id, job["next_batch"])
+
+        with tracing.span("resume_job", messages=job["total"]):
+            return run_job(
+                job=job, user=get_user_by_id(user_id=job["user_id"]), worker=worker
+            )
+
+
+def resume_stale_jobs() -> list:
+    """
+    Claims the jobs whose worker stopped, e.g. in a restart, and resumes them.
+
+    A job is stale once it has not been updated for JOB_LEASE_TIMEOUT seconds.
+    Jobs that were already run JOB_MAX_ATTEMPTS times are failed instead.
+
+    :return: list - The threads resuming the claimed jobs.
+    """
+    worker = new_worker_id()
+    stale_before = datetime.now() - timedelta(seconds=Configurations.JOB_LEASE_TIMEOUT)
+
+    with database.connection_context():
+        job_ids = JobHandler().claim_stale_jobs(
+            worker=worker,
+            stale_before=stale_before,
+            max_attempts=Configurations.JOB_MAX_ATTEMPTS,
+        )
+
+    threads = []
+
+    for job_id in job_ids:
+        thread = threading.Thread(
+            target=resume_job, args=(job_id, worker), name=f"job-{job_id}"
+        )
+        thread.start()
+        threads.append(thread)
+
+    return threads
+
+
+def release_due_batches(limit: int) -> int:
+    """
+    Publishes the deferred batches that are due, earliest first.
+
+    Each batch is claimed before it is published, by postponing it for
+    JOB_LEASE_TIMEOUT seconds. A batch whose release is interrupted is
+    released again once the claim expires. A batch that cannot be published
+    is recorded as failed, and a batch whose job no longer exists is deleted,
+    so neither holds up the batches due after it.
+
+    :param limit: int - The maximum number of batches to release.
+
+    :return: int - The number of batches released.
+    """
+    job_handler = JobHandler()
+    released = 0
+    users = {}
+
+    with database.connection_context():
+        now = int(time.time())
+
+        for batch in job_handler.get_due_batches(now=now, limit=limit):
+            if not job_handler.claim_batch(
+                batch_id=batch["id"],
+                due_at=batch["due_at"],
+                lease_until=now + int(Configurations.JOB_LEASE_TIMEOUT),
+            ):
+                continue
+
+            job = job_handler.get_job(job_id=batch["job_id"])
+
+            if not job:
+                logger.warning(
+                    "Deleting batch %s of missing job %s", batch["id"], batch["job_id"]
+                )
+                job_handler.delete_batch(batch_id=batch["id"])
+                continue
+
+            items = []
+
+            try:
+                items = job_handler.get_batch_items(
+                    job_id=batch["job_id"], position=batch["position"]
+                )
+
+                if job["user_id"] not in users:
+                    users[job["user_id"]] = get_user_by_id(user_id=job["user_id"])
+
+                if not users[job["user_id"]]:
+                    raise ValueError(f"User {job['user_id']} not found")
+
+                with tracing.span("release_batch", messages=len(items)):
+                    counts = service.publish_to_services(
+                        service_id=job["service_id"],
+                        project_reference=job["project_reference"],
+                        items=items,
+                        user=users[job["user_id"]],
+                        priority=job["priority"],
+                    )
+
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logger.error(
+                    "Batch %s of job %s failed: %s", batch["id"], batch["job_id"], error
+                )
+                counts = {"published": 0, "failed": len(items)}
+
+            job_handler.record_scheduled_batch(
+                batch_id=batch["id"], job_id=batch["job_id"], **counts
+            )
+            job_handler.complete_scheduled_job(job_id=batch["job_id"])
+            released += 1
+
+    return released
+
+
+def get_next_due() -> Optional[int]:
+    """
+    Returns when the earliest deferred batch is due.
+
+    :return: Optional[int] - The Unix time, or None if nothing is deferred.
+    """
+    with database.connection_context():
+        return JobHandler().get_next_due()
+
+
+def get_job(job_id: int, user_id: int) -> Optional[dict]:
+    """
+    Retrieves a job's progress.
+
+    :param job_id: int - The ID of the job.
+    :param user_id: int - The ID of the user the job must belong to.
+
+    :return: Optional[dict] - The job's status, counters and throughput in
+        messages per second, or None if the user has no such job.
+    """
+    job = JobHandler().get_job(job_id=job_id, user_id=user_id)
+
+    if not job:
+        return None
+
+    processed = job["published"] + job["failed"]
+    elapsed = (
+        (job["finished_at"] or job["updated_at"]) - job["created_at"]
+    ).total_seconds()
+
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "project_reference": job["project_reference"],
+        "service_id": job["service_id"],
+        "priority": job["priority"],
+        "total": job["total"],
+        "queued": job["total"] - processed,
+        "published": job["published"],
+        "failed": job["failed"],
+        "throughput": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job["finished_at"],
+    }
@@ -0,0 +1,165 @@
+"""Controller Functions for Log Operations"""
+
+import logging
+
+from src.orm.peewee.connector import database
+from src.orm.peewee.handlers.log import LogHandler
+from src.orm.peewee.handlers.user import UserHandler
+
+logger = logging.getLogger(__name__)
+
+LOG_STATUSES = ["delivered", "failed"]
+
+
+def is_log_key(value) -> bool:
+    """
+    Checks that a log id or sid can be looked up.
+
+    :param value: The id or sid of a status update.
+
+    :return: bool - True for an int or str, False otherwise.
+    """
+    return isinstance(value, (int, str)) and not isinstance(value, bool)
+
+
+def update_logs_status(user_id: int, items: list) -> dict:
+    """
+    Applies status updates to a user's logs, one UPDATE per status.
+
+    :param user_id: int - The ID of the user the logs belong to.
+    :param items: list - Status updates, each a dict with "status" and "id" or "sid".
+
+    :return: dict - The number of logs updated for each status.
+    """
+    log_handler = LogHandler()
+
+    groups = {}
+
+    for item in items:
+        if not isinstance(item, dict):
+            logger.error("Invalid status update: %s", item)
+            continue
+
+        status = str(item.get("status") or "").lower()
+
+        if status not in LOG_STATUSES:
+            logger.error("Invalid log status: %s", item.get("status"))
+            continue
+
+        if (item.get("id") is not None and not is_log_key(item["id"])) or (
+            item.get("sid") and not is_log_key(item["sid"])
+        ):
+            logger.error("Invalid log id or sid: %s", item)
+            continue
+
+        group = groups.setdefault(status, {"log_ids": set(), "sids": set()})
+
+        if item.get("id") is not None:
+            group["log_ids"].add(item["id"])
+        elif item.get("sid"):
+            group["sids"].add(item["sid"])
+        else:
+            logger.error("Status update without id or sid: %s", item)
+
+    updated = {}
+
+    with database.atomic():
+        for status, group in groups.items():
+            updated[status] = log_handler.update_logs_status(
+                user_id=user_id,
+                status=status,
+                log_ids=list(group["log_ids"]),
+                sids=list(group["sids"]),
+            )
+
+        if any(updated.values()):
+            UserHandler().bump_data_version(user_id=user_id)
+
+    return updated
+
+
+def update_logs(user_id: int, items: list) -> list:
+    """
+    Validates and applies status updates to a user's logs.
+
+    Existing logs are looked up with one SELECT and updated with one UPDATE
+    per status, in a single transaction.
+
+    :param user_id: int - The ID of the user the logs belong to.
+    :param items: list - Status updates, each a dict with "status" and "id" or "sid".
+
+    :return: list - A result for each item, in the order given.
+    """
+    log_handler = LogHandler()
+
+    results = []
+    valid_items = []
+
+    for item in items:
+        if not isinstance(item, dict):
+            results.append(
+                {
+                    "id": None,
+                    "sid": None,
+                    "status": None,
+                    "message": "",
+                    "errors": [f"Invalid log update: {item}"],
+                }
+            )
+            continue
+
+        result = {
+            "id": item.get("id"),
+            "sid": item.get("sid"),
+            "status": item.get("status"),
+            "message": "",
+            "errors": [],
+        }
+
+        if item.get("id") is None and not item.get("sid"):
+            result["errors"].append("Missing required key 'id' or 'sid'")
+        elif item.get("id") is not None and not is_log_key(item["id"]):
+            result["errors"].append(f"Invalid log id: {item['id']}")
+        elif item.get("sid") and not is_log_key(item["sid"]):
+            result["errors"].append(f"Invalid log sid: {item['sid']}")
+        elif str(item.get("status") or "").lower() not in LOG_STATUSES:
+            result["errors"].append(f"Invalid log status: {item.get('status')}")
+        else:
+            valid_items.append((result, item))
+
+        results.append(result)
+
+    log_ids = [item["id"] for _, item in valid_items if item.get("id") is not None]
+    sids = [item["sid"] for _, item in valid_items if item.get("id") is None]
+
+    existing_ids = set()
+    existing_sids = set()
+
+    # The lookup and the updates share a transaction, so a failed update
+    # rolls back the others and no log is reported as updated
+    with database.atomic():
+        for log_id, sid in log_handler.get_log_keys(
+            user_id=user_id, log_ids=log_ids, sids=sids
+        ):
+            existing_ids.add(str(log_id))
+            existing_sids.add(sid)
+
+        found_items = []
+
+        for result, item in valid_items:
+            if item.get("id") is not None:
+                found = str(item["id"]) in existing_ids
+            else:
+                found = item["sid"] in existing_sids
+
+            if not found:
+                result["errors"].append("Log not found")
+                continue
+
+            result["message"] = "updated"
+            found_items.append(item)
+
+        if found_items:
+            update_logs_status(user_id=user_id, items=found_items)
+
+    return results
@@ -0,0 +1,130 @@
+"""Controller Functions for Outbox Operations"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+
+from settings import Configurations
+from src.orm.peewee.connector import database
+from src.orm.peewee.handlers.outbox import OutboxHandler
+from src.orm.peewee.handlers.log import LogHandler
+from src.orm.peewee.handlers.user import UserHandler
+from src.utils import metrics, tracing
+from src.utils.message_encoding import Encoding
+from src.utils.rabbitmq import ConfirmedPublisher
+
+logger = logging.getLogger(__name__)
+
+
+def relay_outbox(publisher: ConfirmedPublisher, limit: int) -> int:
+    """
+    Publishes a batch of outbox messages, oldest first.
+
+    The messages are locked with SELECT ... FOR UPDATE SKIP LOCKED for the
+    duration of the batch, so relays running side by side take different
+    batches. Confirmed messages are marked sent and their logs set to
+    "requested" in the same transaction, unless a client already reported
+    them delivered or failed, and the users' data versions are bumped so
+    cached log listings are refreshed. Messages the broker rejected are
+    retried by later batches, up to OUTBOX_MAX_ATTEMPTS times, then removed
+    and their logs set to "failed". If the broker becomes unavailable the
+    transaction is rolled back and the whole batch is retried, so a message
+    may be published twice but is never lost.
+
+    :param publisher: ConfirmedPublisher - The relay's publisher.
+    :param limit: int - The maximum number of messages to publish.
+
+    :return: int - The number of messages handled.
+    :raises BrokerUnavailable: If the broker did not answer, or the breaker is open.
+    """
+    outbox_handler = OutboxHandler()
+    log_handler = LogHandler()
+    user_handler = UserHandler()
+
+    with database.connection_context(), database.atomic():
+        messages = outbox_handler.claim_pending(limit=limit)
+
+        if not messages:
+            return 0
+
+        sent = []
+        rejected = []
+
+        with tracing.span("outbox_relay", messages=len(messages)):
+            for message in messages:
+                encoding = Encoding(
+                    message["content_type"], message["content_encoding"]
+                )
+                data, content_encoding = encoding.encode(json.loads(message["body"]))
+
+                if publisher.publish(
+                    virtual_host=message["virtual_host"],
+                    exchange=message["exchange"],
+                    routing_key=message["routing_key"],
+                    data=data,
+                    content_type=encoding.content_type,
+                    content_encoding=content_encoding,
+                    priority=message["priority"],
+                ):
+                    sent.append(message)
+                else:
+                    rejected.append(message)
+
+        outbox_handler.mark_sent(message_ids=[message["id"] for message in sent])
+        outbox_handler.record_failures(
+            message_ids=[message["id"] for message in rejected]
+        )
+
+        expired = [
+            message
+            for message in rejected
+            if message["attempts"] + 1 >= Configurations.OUTBOX_MAX_ATTEMPTS
+        ]
+        outbox_handler.delete_messages(
+            message_ids=[message["id"] for message in expired]
+        )
+
+        updated_users = set()
+
+        for status, group in (("requested", sent), ("failed", expired)):
+            log_ids = {}
+
+            for message in group:
+                log_ids.setdefault(message["user_id"], []).append(message["log_id"])
+
+            for user_id, ids in log_ids.items():
+                if log_handler.update_logs_status(
+                    user_id=user_id, status=status, log_ids=ids, from_status=""
+                ):
+                    updated_users.add(user_id)
+
+        for user_id in updated_users:
+            user_handler.bump_data_version(user_id=user_id)
+
+    metrics.OUTBOX_RELAYED.labels("sent").inc(len(sent))
+    metrics.OUTBOX_RELAYED.labels("rejected").inc(len(rejected))
+
+    return len(messages)
+
+
+def purge_sent_messages() -> int:
+    """
+    Deletes the outbox messages sent more than OUTBOX_RETENTION seconds ago,
+    in chunks of OUTBOX_BATCH_SIZE.
+
+    :return: int - The number of messages deleted.
+    """
+    outbox_handler = OutboxHandler()
+    sent_before = datetime.now() - timedelta(seconds=Configurations.OUTBOX_RETENTION)
+    purged = 0
+
+    with database.connection_context():
+        while True:
+            deleted = outbox_handler.purge_sent(
+                sent_before=sent_before, limit=Configurations.OUTBOX_BATCH_SIZE
+            )
+
+            if not deleted:
+                return purged
+
+            purged += deleted
@@ -14,6 +14,26 @@ from src.utils import rabbitmq
 logger = logging.getLogger(__name__)
 
 
+def has_exchange(reference: str, virtual_host: str) -> bool:
+    """Checks that a project's RabbitMQ exchange still exists.
+
+    If RabbitMQ is unavailable the exchange is assumed to exist, so projects
+    can still be listed and published to with Twilio.
+
+    :param reference: str - The reference of the project, the exchange's name.
+    :param virtual_host: str - The account SID of the project's user.
+
+    :return: bool - False if the exchange was deleted, True otherwise.
+    """
+    try:
+        return bool(
+            rabbitmq.get_exhange_by_name(name=reference, virtual_host=virtual_host)
+        )
+    except rabbitmq.BrokerUnavailable as error:
+        logger.warning("Could not check exchange '%s': %s", reference, error)
+        return True
+
+
 def create_project(
     friendly_name: str, description: str, user_id: int, reference: str = None
 ) -> Optional[Dict]:
@@ -52,14 +72,24 @@ def create_project(
             durable=True,
         )
     except Exception as error:
-        # Rollback changes.
-        rabbitmq.delete_exchange(
-            virtual_host=user.account_sid, name=new_project.reference
-        )
+        # Rollback changes, the project first since RabbitMQ may be down.
         new_project.delete_instance()
 
+        try:
+            rabbitmq.delete_exchange(
+                virtual_host=user.account_sid, name=new_project.reference
+            )
+        except Exception as rollback_error:
+            logger.error(
+                "Failed to roll back exchange '%s': %s",
+                new_project.reference,
+                rollback_error,
+            )
+
         raise error
 
+    user_handler.bump_data_version(user_id=user_id)
+
     return model_to_dict(new_project, recurse=False)
 
 
@@ -86,9 +116,7 @@ def get_project_by_id(project_id: str) -> Optional[Dict]:
     if not user:
         raise Unauthorized()
 
-    if not rabbitmq.get_exhange_by_name(
-        name=project.reference, virtual_host=user.account_sid
-    ):
+    if not has_exchange(reference=project.reference, virtual_host=user.account_sid):
         project.delete_instance()
         return None
 
@@ -110,25 +138,34 @@ def get_projects_by_field(user_id: int, **kwargs) -> list:
     user_handler = UserHandler()
 
     [total, projects_list] = project_handler.get_projects_by_field(
-        user_id=user_id, **kwargs
+        user_id=user_id, **kwargs, as_dicts=True
     )
 
     result = [0, []]
 
-    for project in projects_list:
-        user = user_handler.get_user_by_id(user_id=project.user_id)
+    if not projects_list:
+        return result
+
+    user = user_handler.get_user_by_id(user_id=user_id)
+
+    if not user:
+        raise Unauthorized("The user who owns this project does not exist.")
 
-        if not user:
-            raise Unauthorized("The user who owns this project does not exist.")
+    deleted = False
 
-        if not rabbitmq.get_exhange_by_name(
-            name=project.reference, virtual_host=user.account_sid
+    for project in projects_list:
+        if not has_exchange(
+            reference=project["reference"], virtual_host=user.account_sid
         ):
-            project.delete_instance()
+            project_handler.delete_project(project_id=project["id"])
+            deleted = True
             continue
 
         result[0] += 1
-        result[1].append(model_to_dict(project, recurse=False))
+        result[1].append(project)
+
+    if deleted:
+        user_handler.bump_data_version(user_id=user_id)
 
     return result
 
@@ -152,6 +189,9 @@ def update_project(
         project_id=project_id, friendly_name=friendly_name, description=description
     )
 
+    if project:
+        UserHandler().bump_data_version(user_id=project.user_id)
+
     return model_to_dict(project, recurse=False)
 
 
@@ -182,5 +222,6 @@ def delete_project(project_id: int) -> bool:
     rabbitmq.delete_exchange(name=project.reference, virtual_host=user.account_sid)
 
     project.delete_instance()
+    user_handler.bump_data_version(user_id=user.id)
 
     return True
@@ -1,5 +1,6 @@
 """Controller Functions for Service Operations"""
 
+import json
 import logging
 
 import phonenumbers
@@ -9,25 +10,50 @@ from werkzeug.exceptions import BadRequest
 from twilio.rest import Client as Twilio
 from twilio.base.exceptions import TwilioRestException
 
+from peewee import IntegrityError
 from playhouse.shortcuts import model_to_dict
 
-from src.utils import rabbitmq, carrier_services
+from src.utils import (
+    rabbitmq,
+    carrier_services,
+    metrics,
+    tracing,
+    message_encoding,
+    dispatcher,
+)
+from settings import Configurations
 from src.utils.std_carrier_lib.helpers import InvalidPhoneNUmber
+from src.orm.peewee.connector import database
 from src.orm.peewee.handlers.log import LogHandler
+from src.orm.peewee.handlers.user import UserHandler
+from src.orm.peewee.handlers.outbox import OutboxHandler
 
 logger = logging.getLogger(__name__)
 
+GENERIC_ERROR_MESSAGE = "Oops! Something went wrong. Please try again. If the issue persists, please contact the developers."
+
 
 def create_log(**kwargs):
     """
     Create a log entry with the provided information.
 
     :param kwargs: Keyword arguments for the log entry.
-    :return: The created log entry.
+    :return: The created log entry, or None if the sid was already logged.
     """
     log_handler = LogHandler()
 
-    return model_to_dict(log_handler.create_log(**kwargs), recurse=False)
+    try:
+        new_log = log_handler.create_log(**kwargs)
+    except IntegrityError:
+        logger.warning("Duplicate sid '%s' was not logged", kwargs.get("sid"))
+        return None
+
+    if kwargs.get("status") == "failed":
+        metrics.MESSAGES_FAILED.labels(
+            kwargs.get("service_id"), kwargs.get("channel") or "none"
+        ).inc()
+
+    return model_to_dict(new_log, recurse=False)
 
 
 def handle_invalid_phone_number(service_id, project_reference, phone_number, user, sid):
@@ -151,7 +177,7 @@ def handle_generic_exception(
     :param user: User information.
     :param error: The exception object.
     """
-    error_message = "Oops! Something went wrong. Please try again. If the issue persists, please contact the developers."
+    error_message = GENERIC_ERROR_MESSAGE
     create_log(
         user_id=user.get("id"),
         service_id=service_id.lower(),
@@ -165,7 +191,7 @@ def handle_generic_exception(
 
 
 def publish_with_twilio(
-    twilio_client, service_id, project_reference, content, phone_number, user
+    twilio_client, service_id, project_reference, content, phone_number, user, sid=None
 ):
     """
     Publish a message using the Twilio client.
@@ -176,9 +202,12 @@ def publish_with_twilio(
     :param content: Content of the message.
     :param phone_number: Recipient's phone number.
     :param user: User information.
+    :param sid: Client-provided sid of the message, Twilio's message sid if None.
     :return: The created log entry.
     :raises: TwilioRestException
     """
+    metrics.TWILIO_FALLBACKS.labels(service_id.lower()).inc()
+
     message = twilio_client.messages.create(
         body=content,
         messaging_service_sid=user.get("twilio_service_sid"),
@@ -186,13 +215,14 @@ def publish_with_twilio(
     )
 
     logger.info("Successfully published with Twilio client")
+    metrics.MESSAGES_PUBLISHED.labels(service_id.lower(), "twilio").inc()
 
     return create_log(
         user_id=user.get("id"),
         service_id=service_id.lower(),
         project_reference=project_reference,
         channel="twilio",
-        sid=message.sid,
+        sid=sid or message.sid,
         from_=message.from_,
         direction=message.direction,
         status=message.status,
@@ -204,7 +234,15 @@ def publish_with_twilio(
 
 
 def publish_with_deku_client(
-    service_name, service_id, project_reference, content, phone_number, user, sid
+    service_name,
+    service_id,
+    project_reference,
+    content,
+    phone_number,
+    user,
+    sid,
+    encoding=message_encoding.DEFAULT_ENCODING,
+    priority=None,
 ):
     """
     Publish a message using the Deku client.
@@ -215,44 +253,137 @@ def publish_with_deku_client(
     :param content: Content of the message.
     :param phone_number: Recipient's phone number.
     :param user: User information.
+    :param encoding: Payload encoding negotiated with the service's queue.
+    :param priority: Priority lane of the message, "high" or "bulk".
     :return: The created log entry.
     """
 
     log_handler = LogHandler()
 
-    new_log = log_handler.create_log(
-        user_id=user.get("id"),
-        service_id=service_id.lower(),
-        project_reference=project_reference,
-        channel="deku_client",
-        service_name=service_name,
-        direction="outbound-api",
-        status="",
-        to_=phone_number,
-        sid=sid,
-    )
+    with tracing.span("log_insert"):
+        new_log = log_handler.create_log(
+            user_id=user.get("id"),
+            service_id=service_id.lower(),
+            project_reference=project_reference,
+            channel="deku_client",
+            service_name=service_name,
+            direction="outbound-api",
+            status="",
+            to_=phone_number,
+            sid=sid,
+        )
 
     body = {"text": content, "to": phone_number, "id": new_log.id, "sid": sid}
 
     try:
-        rabbitmq.publish_to_exchange(
-            body=body,
-            routing_key=service_name.replace("_", "."),
-            exchange=project_reference,
-            virtual_host=user.get("account_sid"),
-        )
+        with tracing.span("amqp_publish", service_name=service_name):
+            rabbitmq.publish_to_exchange(
+                body=body,
+                routing_key=service_name.replace("_", "."),
+                exchange=project_reference,
+                virtual_host=user.get("account_sid"),
+                encoding=encoding,
+                priority=dispatcher.AMQP_PRIORITIES.get(priority),
+            )
     except Exception:
         new_log.delete_instance()
         raise
 
     logger.info("Successfully published with Deku client")
+    metrics.MESSAGES_PUBLISHED.labels(service_id.lower(), "deku_client").inc()
 
-    new_log.status = "requested"
-    new_log.save()
+    with tracing.span("log_update"):
+        new_log.status = "requested"
+        new_log.save()
 
     return model_to_dict(new_log, recurse=False)
 
 
+def publish_with_outbox(
+    service_name,
+    service_id,
+    project_reference,
+    items,
+    user,
+    encoding=message_encoding.DEFAULT_ENCODING,
+    priority=None,
+):
+    """
+    Queue messages for the Deku client in the outbox, for the relay to publish.
+
+    The logs and the outbox rows are written in a single transaction, so a
+    message is either logged and queued, or neither. The relay sets the logs
+    to "requested" once the broker confirmed the messages.
+
+    :param service_name: Name of the Deku service.
+    :param service_id: ID of the service.
+    :param project_reference: Reference to the project.
+    :param items: Messages, each a dict with "body", "to" and "sid".
+    :param user: User information.
+    :param encoding: Payload encoding negotiated with the service's queue.
+    :param priority: Priority lane of the messages, "high" or "bulk".
+    :return: The number of messages queued and failed.
+    """
+    log_handler = LogHandler()
+    counts = {"published": 0, "failed": 0}
+    messages = []
+
+    with tracing.span("outbox_insert", messages=len(items)):
+        with database.atomic():
+            for item in items:
+                try:
+                    with database.atomic():
+                        new_log = log_handler.create_log(
+                            user_id=user.get("id"),
+                            service_id=service_id.lower(),
+                            project_reference=project_reference,
+                            channel="deku_client",
+                            service_name=service_name,
+                            direction="outbound-api",
+                            status="",
+                            to_=item["to"],
+                            sid=item.get("sid"),
+                        )
+                except IntegrityError:
+                    # Another request, or an earlier run of the job, logged
+                    # the sid first and publishes the message
+                    logger.warning(
+                        "Duplicate sid '%s' was not published", item.get("sid")
+                    )
+                    counts["published"] += 1
+                    continue
+
+                body = {
+                    "text": item["body"],
+                    "to": item["to"],
+                    "id": new_log.id,
+                    "sid": item.get("sid"),
+                }
+                messages.append(
+                    {
+                        "virtual_host": user.get("account_sid"),
+                        "exchange": project_reference,
+                        "routing_key": service_name.replace("_", "."),
+                        "body": json.dumps(body),
+                        "content_type": encoding.content_type,
+                        "content_encoding": encoding.content_encoding,
+                        "priority": dispatcher.AMQP_PRIORITIES.get(priority),
+                        "log_id": new_log.id,
+                        "user_id": user.get("id"),
+                    }
+                )
+
+            OutboxHandler().add_messages(messages=messages)
+
+    logger.info("Successfully queued %d messages in the outbox", len(messages))
+    metrics.MESSAGES_PUBLISHED.labels(service_id.lower(), "deku_client").inc(
+        len(messages)
+    )
+    counts["published"] += len(messages)
+
+    return counts
+
+
 def publish_to_service(
     service_id, content, project_reference, user, phone_number=None, sid=None
 ):
@@ -295,6 +426,7 @@ def publish_to_service(
                         content=content,
                         phone_number=phone_number,
                         user=user,
+                        sid=sid,
                     )
 
                 logger.info("Failed to publish SMS")
@@ -355,3 +487,293 @@ def publish_to_service(
             error=error,
             sid=sid,
         )
+
+
+def log_failed_message(service_id, project_reference, phone_number, user, sid, reason):
+    """
+    Create a failed log entry for a message that could not be published.
+
+    :param service_id: ID of the service.
+    :param project_reference: Reference to the project.
+    :param phone_number: Recipient's phone number.
+    :param user: User information.
+    :param sid: Client-provided sid of the message.
+    :param reason: Why the message failed.
+    :return: The created log entry.
+    """
+    return create_log(
+        user_id=user.get("id"),
+        service_id=service_id.lower(),
+        project_reference=project_reference,
+        status="failed",
+        reason=reason,
+        to_=phone_number,
+        sid=sid,
+    )
+
+
+def publish_to_service_group(
+    service_id, project_reference, service_name, items, user, priority=None
+):
+    """
+    Publish messages that are all routed to the same service.
+
+    The service's queue is checked once for the whole group. Failures are
+    logged per message and do not stop the rest of the group. If RabbitMQ is
+    unavailable, the messages are sent with Twilio when the user has it, and
+    logged as failed with the reason otherwise.
+    With OUTBOX_ACTIVE, messages for the Deku client are queued in the outbox
+    instead, see publish_with_outbox.
+
+    :param service_id: ID of the service.
+    :param project_reference: Reference to the project.
+    :param service_name: Name of the service the messages are routed to.
+    :param items: Messages, each a dict with "body", "to" and "sid".
+    :param user: User information.
+    :param priority: Priority lane of the messages, "high" or "bulk".
+    :return: The number of messages published and failed.
+    """
+    twilio_account_sid = user.get("twilio_account_sid")
+    twilio_auth_token = user.get("twilio_auth_token")
+
+    has_twilio = all((twilio_account_sid, twilio_auth_token))
+    counts = {"published": 0, "failed": 0}
+
+    try:
+        with tracing.span("queue_check", service_name=service_name):
+            has_queue = rabbitmq.get_queue_by_name(
+                name=service_name, virtual_host=user.get("account_sid")
+            )
+    except rabbitmq.BrokerUnavailable as error:
+        if not has_twilio:
+            for item in items:
+                log_failed_message(
+                    service_id=service_id,
+                    project_reference=project_reference,
+                    phone_number=item["to"],
+                    user=user,
+                    sid=item.get("sid"),
+                    reason=error.description,
+                )
+
+            counts["failed"] = len(items)
+            return counts
+
+        logger.warning("Publishing '%s' with Twilio: %s", service_name, error)
+        has_queue = None
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        logger.error("Failed to check queue '%s': %s", service_name, error)
+
+        for item in items:
+            log_failed_message(
+                service_id=service_id,
+                project_reference=project_reference,
+                phone_number=item["to"],
+                user=user,
+                sid=item.get("sid"),
+                reason=GENERIC_ERROR_MESSAGE,
+            )
+
+        counts["failed"] = len(items)
+        return counts
+
+    twilio_client = None
+    encoding = message_encoding.negotiate(has_queue)
+
+    if not has_queue and has_twilio:
+        twilio_client = Twilio(username=twilio_account_sid, password=twilio_auth_token)
+
+    if has_queue and Configurations.OUTBOX_ACTIVE:
+        try:
+            return publish_with_outbox(
+                service_name=service_name,
+                service_id=service_id,
+                project_reference=project_reference,
+                items=items,
+                user=user,
+                encoding=encoding,
+                priority=priority,
+            )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.exception(error)
+
+            for item in items:
+                log_failed_message(
+                    service_id=service_id,
+                    project_reference=project_reference,
+                    phone_number=item["to"],
+                    user=user,
+                    sid=item.get("sid"),
+                    reason=GENERIC_ERROR_MESSAGE,
+                )
+
+            counts["failed"] = len(items)
+            return counts
+
+    for item in items:
+        try:
+            if has_queue:
+                try:
+                    publish_with_deku_client(
+                        service_name=service_name,
+                        service_id=service_id,
+                        project_reference=project_reference,
+                        content=item["body"],
+                        phone_number=item["to"],
+                        user=user,
+                        sid=item.get("sid"),
+                        encoding=encoding,
+                        priority=priority,
+                    )
+                    counts["published"] += 1
+                    continue
+
+                except rabbitmq.BrokerUnavailable as error:
+                    if not has_twilio:
+                        raise
+
+                    # The rest of the group is sent with Twilio too, instead
+                    # of waiting on the broker for each message
+                    logger.warning(
+                        "Publishing '%s' with Twilio: %s", service_name, error
+                    )
+                    has_queue = None
+                    twilio_client = Twilio(
+                        username=twilio_account_sid, password=twilio_auth_token
+                    )
+
+            if twilio_client:
+                publish_with_twilio(
+                    twilio_client=twilio_client,
+                    service_id=service_id,
+                    project_reference=project_reference,
+                    content=item["body"],
+                    phone_number=item["to"],
+                    user=user,
+                    sid=item.get("sid"),
+                )
+                counts["published"] += 1
+
+            else:
+                handle_no_client_exception(
+                    service_name=service_name,
+                    service_id=service_id,
+                    project_reference=project_reference,
+                    phone_number=item["to"],
+                    user=user,
+                    sid=item.get("sid"),
+                )
+                counts["failed"] += 1
+
+        except IntegrityError:
+            # Another request, or an earlier run of the job, logged the sid
+            # first and publishes the message
+            logger.warning("Duplicate sid '%s' was not published", item.get("sid"))
+            counts["published"] += 1
+
+        except rabbitmq.BrokerUnavailable as error:
+            logger.error("Failed to publish with Deku client: %s", error)
+            log_failed_message(
+                service_id=service_id,
+                project_reference=project_reference,
+                phone_number=item["to"],
+                user=user,
+                sid=item.get("sid"),
+                reason=error.description,
+            )
+            counts["failed"] += 1
+
+        except TwilioRestException as error:
+            logger.error("Failed to publish with Twilio client")
+            create_log(
+                user_id=user.get("id"),
+                service_id=service_id.lower(),
+                project_reference=project_reference,
+                channel="twilio",
+                status="failed",
+                reason=error.msg,
+                to_=item["to"],
+                sid=item.get("sid"),
+            )
+            counts["failed"] += 1
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.exception(error)
+            log_failed_message(
+                service_id=service_id,
+                project_reference=project_reference,
+                phone_number=item["to"],
+                user=user,
+                sid=item.get("sid"),
+                reason=GENERIC_ERROR_MESSAGE,
+            )
+            counts["failed"] += 1
+
+    return counts
+
+
+def publish_to_services(service_id, project_reference, items, user, priority=None):
+    """
+    Publish a batch of messages, classifying all recipients up front.
+
+    Recipients are grouped by the service they are routed to, so queue checks
+    happen once per group instead of once per message. Rows whose recipient
+    cannot be classified are logged as failed. The user's data version is
+    bumped as each group's logs land, so log listings are revalidated.
+
+    :param service_id: ID of the service.
+    :param project_reference: Reference to the project.
+    :param items: Messages, each a dict with "body", "to" and "sid".
+    :param user: User information.
+    :param priority: Priority lane of the messages, "high" or "bulk".
+    :return: The number of messages published and failed.
+    """
+    with tracing.span("classify", recipients=len(items)):
+        groups, errors = carrier_services.classify_recipients(
+            service_id=service_id,
+            project_reference=project_reference,
+            recipients=items,
+        )
+
+    for error in errors:
+        recipient = error["recipient"]
+
+        if isinstance(error["error"], InvalidPhoneNUmber):
+            reason = f"Invalid phone number: '{recipient['to']}'"
+        else:
+            reason = str(error["error"])
+
+        log_failed_message(
+            service_id=service_id,
+            project_reference=project_reference,
+            phone_number=recipient["to"],
+            user=user,
+            sid=recipient.get("sid"),
+            reason=reason,
+        )
+
+    user_handler = UserHandler()
+    counts = {"published": 0, "failed": len(errors)}
+
+    if errors:
+        user_handler.bump_data_version(user_id=user.get("id"))
+
+    for service_name, group in groups.items():
+        with tracing.span(
+            "publish_group", service_name=service_name, messages=len(group)
+        ):
+            group_counts = publish_to_service_group(
+                service_id=service_id,
+                project_reference=project_reference,
+                service_name=service_name,
+                items=group,
+                user=user,
+                priority=priority,
+            )
+
+        user_handler.bump_data_version(user_id=user.get("id"))
+
+        counts["published"] += group_counts["published"]
+        counts["failed"] += group_counts["failed"]
+
+    return counts
@@ -7,10 +7,10 @@ from playhouse.shortcuts import model_to_dict
 
 from src.security.crypto import DataSecurity
 from src.orm.peewee.handlers.user import UserHandler
-from src.orm.peewee.handlers.project import ProjectHandler
-from src.orm.peewee.handlers.log import LogHandler
-from src.controllers.project import delete_project
+from src.orm.peewee.handlers.deletion import DeletionHandler
 from src.utils import rabbitmq
+from src.utils.broker_topology import topology
+from src.utils.rate_limiter import RATE_LIMIT_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +85,12 @@ def create_user(email: str, password: str, **kwargs) -> Optional[Dict]:
     data_security = DataSecurity()
     user_handler = UserHandler()
 
+    # Rate limits are set by administrators only, see rate_limits.py
+    for field in RATE_LIMIT_FIELDS:
+        kwargs.pop(field, None)
+
+    kwargs.pop("data_version", None)
+
     user_data = encrypt_user_data(user=kwargs)
 
     new_user = user_handler.create_user(
@@ -95,6 +101,8 @@ def create_user(email: str, password: str, **kwargs) -> Optional[Dict]:
 
     if new_user:
         try:
+            topology.place(account_sid=new_user.account_sid)
+
             if rabbitmq.create_virtual_host(name=new_user.account_sid):
                 if rabbitmq.create_user(
                     username=new_user.account_sid,
@@ -110,11 +118,20 @@ def create_user(email: str, password: str, **kwargs) -> Optional[Dict]:
                     )
 
         except Exception as error:
-            # Rollback changes.
-            rabbitmq.delete_user(username=new_user.account_sid)
-            rabbitmq.delete_virtual_host(name=new_user.account_sid)
+            # Rollback changes, the user first since RabbitMQ may be down.
             new_user.delete_instance()
 
+            try:
+                rabbitmq.delete_user(username=new_user.account_sid)
+                rabbitmq.delete_virtual_host(name=new_user.account_sid)
+                topology.forget(account_sid=new_user.account_sid)
+            except Exception as rollback_error:
+                logger.error(
+                    "Failed to roll back RabbitMQ user '%s': %s",
+                    new_user.account_sid,
+                    rollback_error,
+                )
+
             raise error
 
     return new_user
@@ -146,6 +163,10 @@ def verify_user(email: str, password: str) -> Optional[Dict]:
         logger.error("Wrong password for user %s", email)
         return None
 
+    if DeletionHandler().is_deleting(user_id=user.id):
+        logger.error("User %s is being deleted", email)
+        return None
+
     return model_to_dict(user)
 
 
@@ -186,49 +207,15 @@ def update_user(user_id: int, **kwargs: dict) -> Dict[str, Union[int, str]]:
     if kwargs.get("password"):
         del kwargs["password"]
 
+    # Rate limits are set by administrators only, see rate_limits.py
+    for field in RATE_LIMIT_FIELDS:
+        kwargs.pop(field, None)
+
+    kwargs.pop("data_version", None)
+
     user_data = encrypt_user_data(user=kwargs)
     user = user_handler.update_user(user_id=user_id, **user_data)
     user = model_to_dict(user)
     user = decrypt_user_data(user)
 
     return user
-
-
-def delete_user(user_id: int, **kwargs: dict) -> bool:
-    """
-    Delete a user by ID, and all associated projects.
-
-    :param user_id: int - The ID of the user to delete.
-    :param kwargs: dict - Optional keyword arguments for deleting user.
-
-    :return: bool - True if user was successfully deleted and False otherwise.
-    """
-    user_handler = UserHandler()
-    project_handler = ProjectHandler()
-    log_handler = LogHandler()
-    data_security = DataSecurity()
-
-    user = user_handler.get_user_by_id(user_id=user_id)
-
-    if not data_security.check_password(
-        password=kwargs.get("password"), hashed_password=user.password
-    ):
-        return None
-
-    # delete all the user's projects before deleting the user
-    projects_list = project_handler.get_projects_by_field(user_id=user_id)[1]
-
-    # delete all the user's logs before deleting the user
-    logs_list = log_handler.get_logs_by_field(user_id=user_id)[1]
-
-    for project in projects_list:
-        delete_project(project_id=project.id)
-
-    for log in logs_list:
-        log_handler.delete_log(log_id=log.id)
-
-    rabbitmq.delete_user(username=user.account_sid)
-    rabbitmq.delete_virtual_host(name=user.account_sid)
-    user.delete_instance()
-
-    return True
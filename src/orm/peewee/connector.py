@@ -1,9 +1,7 @@
 """Peewee connector"""
 
-from contextlib import closing
-
 from peewee import MySQLDatabase
-import mysql.connector
+from playhouse.pool import PooledDatabase, PooledMySQLDatabase
 
 from settings import Configurations
 
@@ -11,46 +9,42 @@ MYSQL_HOST = Configurations.MYSQL_HOST
 MYSQL_USER = Configurations.MYSQL_USER
 MYSQL_PASSWORD = Configurations.MYSQL_PASSWORD
 MYSQL_DATABASE = Configurations.MYSQL_DATABASE
-
-
-def create_database_if_not_exists(
-    user: str, password: str, host: str, database_name: str
-) -> None:
+MYSQL_MAX_CONNECTIONS = Configurations.MYSQL_MAX_CONNECTIONS
+MYSQL_STALE_TIMEOUT = Configurations.MYSQL_STALE_TIMEOUT
+MYSQL_POOL_TIMEOUT = Configurations.MYSQL_POOL_TIMEOUT
+
+if MYSQL_MAX_CONNECTIONS > 0:
+    # Connections are returned to the pool on close() and recycled once
+    # they are older than the stale timeout.
+    database = PooledMySQLDatabase(
+        MYSQL_DATABASE,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        host=MYSQL_HOST,
+        max_connections=MYSQL_MAX_CONNECTIONS,
+        stale_timeout=MYSQL_STALE_TIMEOUT,
+        timeout=MYSQL_POOL_TIMEOUT,
+    )
+else:
+    database = MySQLDatabase(
+        MYSQL_DATABASE, user=MYSQL_USER, password=MYSQL_PASSWORD, host=MYSQL_HOST
+    )
+
+
+def get_pool_stats() -> dict:
     """
-    Creates a database if it doesn't exist.
-
-    Parameters:
-        user (str): database user.
-        password (str): database password.
-        host (str): database host.
-        database_name (str): database name.
+    Returns the connection pool statistics of this process.
 
     Returns:
-        None.
+        dict: The pool size limit, connections checked out and idle connections.
     """
-    # MySQL
-    with closing(
-        mysql.connector.connect(
-            user=user,
-            password=password,
-            host=host,
-            auth_plugin="mysql_native_password",
-        )
-    ) as connection:
-        query = f"CREATE DATABASE IF NOT EXISTS {database_name}"
-
-        with closing(connection.cursor()) as cursor:
-            cursor.execute(query)
-
-
-# Connect to the MySQL database using Peewee
-create_database_if_not_exists(
-    user=MYSQL_USER,
-    password=MYSQL_PASSWORD,
-    host=MYSQL_HOST,
-    database_name=MYSQL_DATABASE,
-)
-
-database = MySQLDatabase(
-    MYSQL_DATABASE, user=MYSQL_USER, password=MYSQL_PASSWORD, host=MYSQL_HOST
-)
+    if not isinstance(database, PooledDatabase):
+        return {"pooled": False}
+
+    # pylint: disable=protected-access
+    return {
+        "pooled": True,
+        "max_connections": database._max_connections,
+        "in_use": len(database._in_use),
+        "available": len(database._connections),
+    }
@@ -0,0 +1,73 @@
+"""Peewee Handler for broker assignment model"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from peewee import fn
+
+from src.orm.peewee.models.broker import BrokerAssignment
+
+logger = logging.getLogger(__name__)
+
+
+class BrokerHandler:
+    """
+    A class for handling CRUD operations on the BrokerAssignment model.
+    """
+
+    def get_node(self, account_sid: str) -> Optional[str]:
+        """Retrieve the RabbitMQ node an account is assigned to.
+
+        :param account_sid: str - The account SID of the user.
+
+        :return: Optional[str] - The node, or None if the account has no assignment.
+        """
+        assignment = (
+            BrokerAssignment.select(BrokerAssignment.node)
+            .where(BrokerAssignment.account_sid == account_sid)
+            .first()
+        )
+
+        return assignment.node if assignment else None
+
+    def assign_node(self, account_sid: str, node: str) -> None:
+        """Assign an account to a RabbitMQ node, replacing any previous assignment.
+
+        :param account_sid: str - The account SID of the user.
+        :param node: str - The node.
+        """
+        updated = (
+            BrokerAssignment.update(node=node, updated_at=datetime.now())
+            .where(BrokerAssignment.account_sid == account_sid)
+            .execute()
+        )
+
+        if not updated:
+            BrokerAssignment.create(account_sid=account_sid, node=node)
+
+        logger.info("Successfully assigned account to broker node '%s'", node)
+
+    def delete_assignment(self, account_sid: str) -> bool:
+        """Delete the assignment of an account.
+
+        :param account_sid: str - The account SID of the user.
+
+        :return: bool - True if an assignment was deleted.
+        """
+        return bool(
+            BrokerAssignment.delete()
+            .where(BrokerAssignment.account_sid == account_sid)
+            .execute()
+        )
+
+    def count_by_node(self) -> dict:
+        """Count the accounts assigned to each node.
+
+        :return: dict - The number of accounts per node.
+        """
+        query = BrokerAssignment.select(
+            BrokerAssignment.node, fn.COUNT(BrokerAssignment.id).alias("total")
+        ).group_by(BrokerAssignment.node)
+
+        return {row.node: row.total for row in query}
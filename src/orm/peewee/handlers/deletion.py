@@ -0,0 +1,181 @@
+"""Peewee Handler for account deletion model"""
+
+import logging
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from src.orm.peewee.models.deletion import AccountDeletion
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionHandler:
+    """
+    A class for handling CRUD operations on the AccountDeletion model.
+    """
+
+    def create_deletion(
+        self, user_id: int, account_sid: str, worker: str
+    ) -> AccountDeletion:
+        """
+        Create a new account deletion.
+
+        :param user_id: int - The ID of the user to delete.
+        :param account_sid: str - The account SID of the user, its RabbitMQ
+            user and virtual host.
+        :param worker: str - The worker that runs the deletion.
+
+        :return: AccountDeletion - The newly created deletion.
+        """
+        deletion = AccountDeletion.create(
+            reference=secrets.token_hex(16),
+            user_id=user_id,
+            account_sid=account_sid,
+            worker=worker,
+        )
+
+        logger.info("Successfully created account deletion")
+
+        return deletion
+
+    def get_deletion(self, **kwargs) -> Optional[dict]:
+        """Retrieve the latest account deletion with the given field(s).
+
+        :param kwargs: dict - fields of the deletion, e.g. id, reference or user_id.
+
+        :return: Optional[dict] - The deletion, or None if no such deletion exists.
+        """
+        query = AccountDeletion.select()
+
+        for field, value in kwargs.items():
+            query = query.where(getattr(AccountDeletion, field) == value)
+
+        return query.order_by(AccountDeletion.id.desc()).dicts().first()
+
+    def is_deleting(self, user_id: int) -> bool:
+        """Check whether a user's account is being deleted.
+
+        :param user_id: int - The ID of the user.
+
+        :return: bool - True if a deletion of the account is running.
+        """
+        return (
+            AccountDeletion.select()
+            .where(
+                AccountDeletion.user_id == user_id,
+                AccountDeletion.status == "running",
+            )
+            .exists()
+        )
+
+    def record_progress(
+        self, deletion_id: int, worker: str, stage: str, **counts
+    ) -> bool:
+        """Set a deletion's stage and add to its counters.
+
+        :param deletion_id: int - The ID of the deletion.
+        :param worker: str - The worker running the deletion.
+        :param stage: str - The stage the deletion is at.
+        :param counts: dict - Numbers of logs_deleted, projects_deleted or
+            jobs_deleted to add.
+
+        :return: bool - True if recorded, False if the worker no longer owns the deletion.
+        """
+        fields = {
+            field: getattr(AccountDeletion, field) + count
+            for field, count in counts.items()
+        }
+
+        updated = (
+            AccountDeletion.update(stage=stage, updated_at=datetime.now(), **fields)
+            .where(AccountDeletion.id == deletion_id, AccountDeletion.worker == worker)
+            .execute()
+        )
+
+        return updated > 0
+
+    def finish_deletion(
+        self, deletion_id: int, status: str, worker: str = None
+    ) -> bool:
+        """Set a deletion's final status.
+
+        :param deletion_id: int - The ID of the deletion.
+        :param status: str - "completed" or "failed".
+        :param worker: str - The worker running the deletion, None to finish it regardless.
+
+        :return: bool - True if finished, False if the worker no longer owns the deletion.
+        """
+        query = AccountDeletion.update(
+            status=status,
+            worker=None,
+            updated_at=datetime.now(),
+            finished_at=datetime.now(),
+        ).where(AccountDeletion.id == deletion_id)
+
+        if worker is not None:
+            query = query.where(AccountDeletion.worker == worker)
+
+        if not query.execute():
+            return False
+
+        logger.info("Account deletion %s %s", deletion_id, status)
+
+        return True
+
+    def claim_stale_deletions(
+        self, worker: str, stale_before: datetime, max_attempts: int
+    ) -> list:
+        """Claim the running deletions whose worker stopped updating them.
+
+        Claims are conditional on the deletion being unchanged since it was
+        read, so a deletion is claimed by one worker only. Deletions that
+        already used max_attempts are failed instead.
+
+        :param worker: str - The worker claiming the deletions.
+        :param stale_before: datetime - Deletions not updated since are stale.
+        :param max_attempts: int - The maximum number of times a deletion is run.
+
+        :return: list - The IDs of the claimed deletions.
+        """
+        stale_deletions = list(
+            AccountDeletion.select(
+                AccountDeletion.id, AccountDeletion.attempts, AccountDeletion.updated_at
+            )
+            .where(
+                AccountDeletion.status == "running",
+                AccountDeletion.updated_at < stale_before,
+            )
+            .dicts()
+        )
+
+        claimed = []
+
+        for deletion in stale_deletions:
+            if deletion["attempts"] >= max_attempts:
+                logger.error(
+                    "Account deletion %s failed after %s attempts",
+                    deletion["id"],
+                    max_attempts,
+                )
+                self.finish_deletion(deletion_id=deletion["id"], status="failed")
+                continue
+
+            updated = (
+                AccountDeletion.update(
+                    worker=worker,
+                    attempts=AccountDeletion.attempts + 1,
+                    updated_at=datetime.now(),
+                )
+                .where(
+                    AccountDeletion.id == deletion["id"],
+                    AccountDeletion.status == "running",
+                    AccountDeletion.updated_at == deletion["updated_at"],
+                )
+                .execute()
+            )
+
+            if updated:
+                claimed.append(deletion["id"])
+
+        return claimed
@@ -0,0 +1,357 @@
+"""Peewee Handler for job model"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from peewee import chunked, fn
+
+from src.orm.peewee.connector import database
+from src.orm.peewee.models.job import Job, JobBatch
+
+logger = logging.getLogger(__name__)
+
+# Batches hold up to JOB_BATCH_SIZE messages each, keep inserts well under
+# MySQL's max_allowed_packet
+BATCH_INSERT_SIZE = 10
+
+
+class JobHandler:
+    """
+    A class for handling CRUD operations on the Job model.
+    """
+
+    def create_job(
+        self,
+        user_id: int,
+        project_reference: str,
+        service_id: str,
+        batches: list,
+        worker: str,
+        scheduled: list = None,
+        priority: str = "bulk",
+    ) -> Job:
+        """
+        Create a new job and persist its messages.
+
+        :param user_id: int - The ID of the user the job belongs to.
+        :param project_reference: str - The reference of the project to publish to.
+        :param service_id: str - The ID of the service to publish to.
+        :param batches: list - The messages to publish now, as lists of dicts.
+        :param worker: str - The worker that runs the job.
+        :param scheduled: list - The deferred messages, as (due_at, batch) tuples.
+        :param priority: str - The priority lane of the job, "high" or "bulk".
+
+        :return: Job - The newly created job.
+        """
+        scheduled = scheduled or []
+
+        with database.atomic():
+            job = Job.create(
+                user_id=user_id,
+                project_reference=project_reference,
+                service_id=service_id,
+                priority=priority,
+                total=sum(len(batch) for batch in batches)
+                + sum(len(batch) for _, batch in scheduled),
+                batches=len(batches),
+                worker=worker,
+            )
+
+            rows = [
+                {
+                    "job_id": job.id,
+                    "position": position,
+                    "items": json.dumps(batch),
+                    "due_at": due_at,
+                }
+                for position, (due_at, batch) in enumerate(
+                    [(None, batch) for batch in batches] + scheduled
+                )
+            ]
+
+            for rows_chunk in chunked(rows, BATCH_INSERT_SIZE):
+                JobBatch.insert_many(rows_chunk).execute()
+
+        logger.info("Successfully created job")
+
+        return job
+
+    def get_job(self, job_id: int, user_id: int = None) -> Optional[dict]:
+        """Retrieve a job by its ID.
+
+        :param job_id: int - The ID of the job to retrieve.
+        :param user_id: int - The ID of the user the job must belong to.
+
+        :return: Optional[dict] - The job, or None if no such job exists.
+        """
+        query = Job.select().where(Job.id == job_id)
+
+        if user_id is not None:
+            query = query.where(Job.user_id == user_id)
+
+        return query.dicts().first()
+
+    def get_batch_items(self, job_id: int, position: int) -> list:
+        """Retrieve the messages of a job's batch.
+
+        :param job_id: int - The ID of the job.
+        :param position: int - The position of the batch in the job.
+
+        :return: list - The messages, or an empty list if the batch does not exist.
+        """
+        items = (
+            JobBatch.select(JobBatch.items)
+            .where(JobBatch.job_id == job_id, JobBatch.position == position)
+            .scalar()
+        )
+
+        return json.loads(items) if items else []
+
+    def renew_lease(self, job_id: int, worker: str) -> bool:
+        """Mark a job as alive, before its worker starts on it.
+
+        :param job_id: int - The ID of the job.
+        :param worker: str - The worker running the job.
+
+        :return: bool - True if renewed, False if the worker no longer owns the job.
+        """
+        updated = (
+            Job.update(updated_at=datetime.now())
+            .where(Job.id == job_id, Job.worker == worker)
+            .execute()
+        )
+
+        return updated > 0
+
+    def record_batch(
+        self, job_id: int, worker: str, published: int, failed: int
+    ) -> bool:
+        """Add a processed batch to a job's counters and advance its cursor.
+
+        :param job_id: int - The ID of the job.
+        :param worker: str - The worker running the job.
+        :param published: int - The number of messages published in the batch.
+        :param failed: int - The number of messages that failed in the batch.
+
+        :return: bool - True if recorded, False if the worker no longer owns the job.
+        """
+        updated = (
+            Job.update(
+                published=Job.published + published,
+                failed=Job.failed + failed,
+                next_batch=Job.next_batch + 1,
+                updated_at=datetime.now(),
+            )
+            .where(Job.id == job_id, Job.worker == worker)
+            .execute()
+        )
+
+        return updated > 0
+
+    def finish_job(self, job_id: int, status: str, worker: str = None) -> bool:
+        """Set a job's final status and delete its persisted messages.
+
+        A completed job that still has deferred messages is set to "scheduled"
+        instead, and keeps them.
+
+        :param job_id: int - The ID of the job.
+        :param status: str - "completed" or "failed".
+        :param worker: str - The worker running the job, None to finish it regardless.
+
+        :return: bool - True if finished, False if the worker no longer owns the job.
+        """
+        batches = JobBatch.delete().where(JobBatch.job_id == job_id)
+
+        if status == "completed":
+            batches = batches.where(JobBatch.due_at.is_null())
+
+            if self.has_scheduled_batches(job_id=job_id):
+                status = "scheduled"
+
+        query = Job.update(
+            status=status,
+            worker=None,
+            updated_at=datetime.now(),
+            finished_at=None if status == "scheduled" else datetime.now(),
+        ).where(Job.id == job_id)
+
+        if worker is not None:
+            query = query.where(Job.worker == worker)
+
+        with database.atomic():
+            if not query.execute():
+                return False
+
+            batches.execute()
+
+        logger.info("Job %s %s", job_id, status)
+
+        return True
+
+    def has_scheduled_batches(self, job_id: int) -> bool:
+        """Check whether a job has deferred messages left.
+
+        :param job_id: int - The ID of the job.
+
+        :return: bool - True if any of the job's batches is due later.
+        """
+        return (
+            JobBatch.select()
+            .where(JobBatch.job_id == job_id, JobBatch.due_at.is_null(False))
+            .exists()
+        )
+
+    def get_next_due(self) -> Optional[int]:
+        """Retrieve when the earliest deferred batch is due, from the due_at index.
+
+        :return: Optional[int] - The Unix time, or None if nothing is deferred.
+        """
+        return JobBatch.select(fn.MIN(JobBatch.due_at)).scalar()
+
+    def get_due_batches(self, now: int, limit: int) -> list:
+        """Retrieve the deferred batches that are due, earliest first.
+
+        :param now: int - The current Unix time.
+        :param limit: int - The maximum number of batches to retrieve.
+
+        :return: list - Dicts with the "id", "job_id", "position" and "due_at" of the batches.
+        """
+        return list(
+            JobBatch.select(
+                JobBatch.id, JobBatch.job_id, JobBatch.position, JobBatch.due_at
+            )
+            .where(JobBatch.due_at <= now)
+            .order_by(JobBatch.due_at)
+            .limit(limit)
+            .dicts()
+        )
+
+    def claim_batch(self, batch_id: int, due_at: int, lease_until: int) -> bool:
+        """Claim a due batch by postponing it until the claim expires.
+
+        If the claimer stops before recording the batch, it is due again at
+        lease_until. The claim is conditional on due_at being unchanged, so a
+        batch is claimed by one worker only.
+
+        :param batch_id: int - The ID of the batch.
+        :param due_at: int - The due time the batch was read with.
+        :param lease_until: int - The Unix time the claim expires at.
+
+        :return: bool - True if claimed.
+        """
+        updated = (
+            JobBatch.update(due_at=lease_until)
+            .where(JobBatch.id == batch_id, JobBatch.due_at == due_at)
+            .execute()
+        )
+
+        return updated > 0
+
+    def record_scheduled_batch(
+        self, batch_id: int, job_id: int, published: int, failed: int
+    ) -> None:
+        """Add a released deferred batch to its job's counters and delete it.
+
+        :param batch_id: int - The ID of the batch.
+        :param job_id: int - The ID of the job.
+        :param published: int - The number of messages published in the batch.
+        :param failed: int - The number of messages that failed in the batch.
+        """
+        with database.atomic():
+            JobBatch.delete().where(JobBatch.id == batch_id).execute()
+            Job.update(
+                published=Job.published + published,
+                failed=Job.failed + failed,
+                updated_at=datetime.now(),
+            ).where(Job.id == job_id).execute()
+
+    def delete_batch(self, batch_id: int) -> bool:
+        """Delete a batch.
+
+        :param batch_id: int - The ID of the batch.
+
+        :return: bool - True if the batch was deleted.
+        """
+        return bool(JobBatch.delete().where(JobBatch.id == batch_id).execute())
+
+    def complete_scheduled_job(self, job_id: int) -> bool:
+        """Complete a scheduled job once none of its deferred messages are left.
+
+        :param job_id: int - The ID of the job.
+
+        :return: bool - True if the job was completed.
+        """
+        pending = JobBatch.select().where(JobBatch.job_id == job_id)
+
+        updated = (
+            Job.update(status="completed", finished_at=datetime.now())
+            .where(Job.id == job_id, Job.status == "scheduled", ~fn.EXISTS(pending))
+            .execute()
+        )
+
+        return updated > 0
+
+    def claim_stale_jobs(
+        self, worker: str, stale_before: datetime, max_attempts: int
+    ) -> list:
+        """Claim the running jobs whose worker stopped updating them.
+
+        Claims are conditional on the job being unchanged since it was read,
+        so a job is claimed by one worker only. Jobs that already used
+        max_attempts are failed instead.
+
+        :param worker: str - The worker claiming the jobs.
+        :param stale_before: datetime - Jobs not updated since are stale.
+        :param max_attempts: int - The maximum number of times a job is run.
+
+        :return: list - The IDs of the claimed jobs.
+        """
+        stale_jobs = list(
+            Job.select(Job.id, Job.attempts, Job.updated_at)
+            .where(Job.status == "running", Job.updated_at < stale_before)
+            .dicts()
+        )
+
+        claimed = []
+
+        for job in stale_jobs:
+            if job["attempts"] >= max_attempts:
+                logger.error("Job %s failed after %s attempts", job["id"], max_attempts)
+                self.finish_job(job_id=job["id"], status="failed")
+                continue
+
+            updated = (
+                Job.update(
+                    worker=worker,
+                    attempts=Job.attempts + 1,
+                    updated_at=datetime.now(),
+                )
+                .where(
+                    Job.id == job["id"],
+                    Job.status == "running",
+                    Job.updated_at == job["updated_at"],
+                )
+                .execute()
+            )
+
+            if updated:
+                claimed.append(job["id"])
+
+        return claimed
+
+    def delete_jobs(self, user_id: int) -> int:
+        """Delete all jobs of a user and their persisted messages.
+
+        :param user_id: int - The ID of the user.
+
+        :return: int - The number of jobs deleted.
+        """
+        job_ids = Job.select(Job.id).where(Job.user_id == user_id)
+
+        with database.atomic():
+            JobBatch.delete().where(JobBatch.job_id.in_(job_ids)).execute()
+            deleted = Job.delete().where(Job.user_id == user_id).execute()
+
+        return deleted
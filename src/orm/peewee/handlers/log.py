@@ -67,12 +67,17 @@ class LogHandler:
             return None
 
     def get_logs_by_field(
-        self, data_range: list = None, sort: list = None, **kwargs
+        self,
+        data_range: list = None,
+        sort: list = None,
+        as_dicts: bool = False,
+        **kwargs,
     ) -> list:
         """Retrieve all logs with the given field(s).
 
         :param data_range: list - A list of two int values representing the offset and limit of the data to retrieve. Default is None, which retrieves all logs.
         :param sort: list - A list of field and order to sort the logs by. Default is None, which returns the logs in the order they were retrieved.
+        :param as_dicts: bool - Return the rows as dicts instead of model instances.
         :param kwargs: dict - fields for logs to retrieve. Default is None, which retrieves all logs.
 
         :return: list - A list of the total number of records retrieved and the retrieved logs, or an empty list if no logs.
@@ -122,6 +127,9 @@ class LogHandler:
 
             logger.info("Successfully retrieved logs")
 
+            if as_dicts:
+                logs = logs.dicts()
+
             return [total, list(logs)]
 
         except Exception as error:
@@ -167,6 +175,95 @@ class LogHandler:
             logger.error("Error updating log: %s", error)
             raise
 
+    def get_log_keys(
+        self, user_id: int, log_ids: list = None, sids: list = None
+    ) -> list:
+        """Retrieve the IDs and sids of a user's logs matching the given keys.
+
+        :param user_id: int - The ID of the user the logs belong to.
+        :param log_ids: list - The IDs of the logs to look up.
+        :param sids: list - The sids of the logs to look up.
+
+        :return: list - (id, sid) tuples of the logs that exist.
+        """
+        conditions = []
+
+        if log_ids:
+            conditions.append(Log.id.in_(log_ids))
+
+        if sids:
+            conditions.append(Log.sid.in_(sids))
+
+        if not conditions:
+            return []
+
+        match = conditions[0]
+
+        for condition in conditions[1:]:
+            match = match | condition
+
+        try:
+            return list(
+                Log.select(Log.id, Log.sid)
+                .where(Log.user_id == user_id, match)
+                .tuples()
+            )
+
+        except Exception as error:
+            logger.error("Error retrieving log keys.")
+            raise error
+
+    def update_logs_status(
+        self,
+        user_id: int,
+        status: str,
+        log_ids: list = None,
+        sids: list = None,
+        from_status: str = None,
+    ) -> int:
+        """Update the status of many logs with a single UPDATE.
+
+        :param user_id: int - The ID of the user the logs belong to.
+        :param status: str - The new status of the logs.
+        :param log_ids: list - The IDs of the logs to update.
+        :param sids: list - The sids of the logs to update.
+        :param from_status: str - Only update the logs still in this status,
+            None to update them whatever their status.
+
+        :return: int - The number of logs updated.
+        """
+        conditions = []
+
+        if log_ids:
+            conditions.append(Log.id.in_(log_ids))
+
+        if sids:
+            conditions.append(Log.sid.in_(sids))
+
+        if not conditions:
+            return 0
+
+        try:
+            match = conditions[0]
+
+            for condition in conditions[1:]:
+                match = match | condition
+
+            query = Log.update(status=status).where(Log.user_id == user_id, match)
+
+            if from_status is not None:
+                query = query.where(Log.status == from_status)
+
+            updated = query.execute()
+
+            logger.info("Successfully updated %d logs to '%s'.", updated, status)
+
+            return updated
+
+        except Exception as error:
+            logger.error("Error updating logs: %s", error)
+            raise
+
     def delete_log(self, log_id: int) -> bool:
         """Delete a log by its ID.
 
@@ -191,3 +288,25 @@ class LogHandler:
         except Exception as error:
             logger.error("Error deleting log: %s", error)
             return False
+
+    def delete_logs_chunk(self, user_id: int, limit: int) -> int:
+        """Delete up to limit logs of a user.
+
+        The IDs are read from the user_id index without sorting, so each chunk
+        is bounded and holds its row locks briefly, however many logs the
+        user has.
+
+        :param user_id: int - The ID of the user.
+        :param limit: int - The maximum number of logs to delete.
+
+        :return: int - The number of logs deleted, 0 once none are left.
+        """
+        log_ids = [
+            row.id
+            for row in Log.select(Log.id).where(Log.user_id == user_id).limit(limit)
+        ]
+
+        if not log_ids:
+            return 0
+
+        return Log.delete().where(Log.id.in_(log_ids)).execute()
@@ -0,0 +1,132 @@
+"""Peewee Handler for outbox model"""
+
+import logging
+from datetime import datetime
+
+from peewee import chunked
+
+from src.orm.peewee.connector import database
+from src.orm.peewee.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Rows hold a message body each, keep inserts well under MySQL's
+# max_allowed_packet
+OUTBOX_INSERT_SIZE = 100
+
+
+class OutboxHandler:
+    """
+    A class for handling CRUD operations on the OutboxMessage model.
+    """
+
+    def add_messages(self, messages: list) -> int:
+        """
+        Append messages to the outbox with multi-row inserts.
+
+        Call it in the transaction that creates the messages' logs.
+
+        :param messages: list - The messages, as dicts of OutboxMessage fields.
+
+        :return: int - The number of messages added.
+        """
+        for messages_chunk in chunked(messages, OUTBOX_INSERT_SIZE):
+            OutboxMessage.insert_many(messages_chunk).execute()
+
+        return len(messages)
+
+    def claim_pending(self, limit: int) -> list:
+        """Lock the oldest messages not sent yet, skipping those locked by
+        other relays.
+
+        Call it in a transaction, the messages stay locked until it ends.
+
+        :param limit: int - The maximum number of messages to claim.
+
+        :return: list - The messages, as dicts.
+        """
+        query = (
+            OutboxMessage.select()
+            .where(OutboxMessage.sent_at.is_null())
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+        )
+
+        # SQLite has a single writer and no row locks
+        if database.for_update:
+            query = query.for_update("FOR UPDATE SKIP LOCKED")
+
+        return list(query.dicts())
+
+    def mark_sent(self, message_ids: list) -> int:
+        """Mark messages as sent.
+
+        :param message_ids: list - The IDs of the messages.
+
+        :return: int - The number of messages marked.
+        """
+        if not message_ids:
+            return 0
+
+        return (
+            OutboxMessage.update(sent_at=datetime.now())
+            .where(OutboxMessage.id.in_(message_ids))
+            .execute()
+        )
+
+    def record_failures(self, message_ids: list) -> int:
+        """Count a failed relay attempt of messages.
+
+        :param message_ids: list - The IDs of the messages.
+
+        :return: int - The number of messages updated.
+        """
+        if not message_ids:
+            return 0
+
+        return (
+            OutboxMessage.update(attempts=OutboxMessage.attempts + 1)
+            .where(OutboxMessage.id.in_(message_ids))
+            .execute()
+        )
+
+    def delete_messages(self, message_ids: list = None, user_id: int = None) -> int:
+        """Delete messages by ID, or all messages of a user.
+
+        :param message_ids: list - The IDs of the messages.
+        :param user_id: int - The ID of the user.
+
+        :return: int - The number of messages deleted.
+        """
+        if not message_ids and user_id is None:
+            return 0
+
+        query = OutboxMessage.delete()
+
+        if message_ids is not None:
+            query = query.where(OutboxMessage.id.in_(message_ids))
+
+        if user_id is not None:
+            query = query.where(OutboxMessage.user_id == user_id)
+
+        return query.execute()
+
+    def purge_sent(self, sent_before: datetime, limit: int) -> int:
+        """Delete up to limit messages sent before a date.
+
+        :param sent_before: datetime - Messages sent before are deleted.
+        :param limit: int - The maximum number of messages to delete.
+
+        :return: int - The number of messages deleted, 0 once none are left.
+        """
+        message_ids = [
+            row.id
+            for row in OutboxMessage.select(OutboxMessage.id)
+            .where(OutboxMessage.sent_at < sent_before)
+            .limit(limit)
+        ]
+
+        if not message_ids:
+            return 0
+
+        return self.delete_messages(message_ids=message_ids)
@@ -114,12 +114,17 @@ class ProjectHandler:
             return None
 
     def get_projects_by_field(
-        self, data_range: list = None, sort: list = None, **kwargs
+        self,
+        data_range: list = None,
+        sort: list = None,
+        as_dicts: bool = False,
+        **kwargs,
     ) -> list:
         """Retrieve all projects with the given field(s).
 
         :param data_range: list - A list of two int values representing the offset and limit of the data to retrieve. Default is None, which retrieves all projects.
         :param sort: list - A list of field and order to sort the projects by. Default is None, which returns the projects in the order they were retrieved.
+        :param as_dicts: bool - Return the rows as dicts instead of model instances.
         :param kwargs: dict - fields for projects to retrieve. Default is None, which retrieves all projects.
 
         :return: list - A list of the total number of records retrieved and the retrieved projects, or an empty list if no projects.
@@ -169,6 +174,9 @@ class ProjectHandler:
 
             logger.info("Successfully retrieved projects")
 
+            if as_dicts:
+                projects = projects.dicts()
+
             return [total, list(projects)]
 
         except Exception as error:
@@ -238,3 +246,16 @@ class ProjectHandler:
         except Exception as error:
             logger.error("Error deleting project: %s", error)
             return False
+
+    def delete_projects(self, user_id: int) -> int:
+        """Delete all projects of a user.
+
+        :param user_id: int - The ID of the user.
+
+        :return: int - The number of projects deleted.
+        """
+        deleted = Project.delete().where(Project.user_id == user_id).execute()
+
+        logger.info("Deleted %s project(s) of user %s", deleted, user_id)
+
+        return deleted
@@ -78,6 +78,51 @@ class UserHandler:
             logger.error("User with ID %s does not exist.", user_id)
             return None
 
+    def get_rate_limits(self, account_sid: str) -> Optional[dict]:
+        """Retrieve the rate limits of a user by account SID.
+
+        Args:
+            account_sid (str): The account SID of the user.
+
+        Returns:
+            A dict of the user's rate_limit_* fields, None for the ones not set,
+            or None if no user with that account SID exists.
+        """
+        row = (
+            User.select(
+                User.rate_limit_requests,
+                User.rate_limit_request_burst,
+                User.rate_limit_messages,
+                User.rate_limit_message_burst,
+            )
+            .where(User.account_sid == account_sid)
+            .dicts()
+            .first()
+        )
+
+        return row
+
+    def get_data_version(self, user_id: int) -> Optional[int]:
+        """Retrieve the version of a user's projects and logs.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            The version, or None if no user with that ID exists.
+        """
+        return User.select(User.data_version).where(User.id == user_id).scalar()
+
+    def bump_data_version(self, user_id: int) -> None:
+        """Increment the version of a user's projects and logs after they change.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        User.update(data_version=User.data_version + 1).where(
+            User.id == user_id
+        ).execute()
+
     def get_users_by_field(
         self, data_range: list = None, sort: list = None, **kwargs
     ) -> list:
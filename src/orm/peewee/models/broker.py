@@ -0,0 +1,26 @@
+"""Peewee broker assignment model."""
+
+from datetime import datetime
+
+from peewee import Model, CharField, DateTimeField
+
+from src.orm.peewee.connector import database
+
+
+class BrokerAssignment(Model):
+    """A model for the broker_assignments table, the RabbitMQ node of each account.
+
+    Keyed by account_sid, the name of the account's RabbitMQ user and virtual
+    host. Accounts without a row live on RABBITMQ_HOST.
+    """
+
+    account_sid = CharField(unique=True)
+    node = CharField(index=True)
+    created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        """A Meta class that specifies the database for the model."""
+
+        database = database
+        table_name = "broker_assignments"
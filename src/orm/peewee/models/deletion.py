@@ -0,0 +1,35 @@
+"""Peewee account deletion model."""
+
+from datetime import datetime
+
+from peewee import Model, CharField, DateTimeField, IntegerField
+
+from src.orm.peewee.connector import database
+
+
+class AccountDeletion(Model):
+    """A model for the account_deletions table, one row per deleted account.
+
+    The row outlives the user it deletes, so user_id is not a foreign key.
+    """
+
+    reference = CharField(unique=True)
+    user_id = IntegerField(index=True)
+    account_sid = CharField()
+    status = CharField(default="running")
+    stage = CharField(default="broker")
+    logs_deleted = IntegerField(default=0)
+    projects_deleted = IntegerField(default=0)
+    jobs_deleted = IntegerField(default=0)
+    attempts = IntegerField(default=1)
+    worker = CharField(null=True)
+    created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now)
+    finished_at = DateTimeField(null=True)
+
+    class Meta:
+        """A Meta class that specifies the database for the model."""
+
+        database = database
+        table_name = "account_deletions"
+        indexes = ((("status", "updated_at"), False),)
@@ -0,0 +1,69 @@
+"""Peewee job model."""
+
+from datetime import datetime
+
+from peewee import (
+    Model,
+    CharField,
+    DateTimeField,
+    IntegerField,
+    BigIntegerField,
+    TextField,
+    ForeignKeyField,
+)
+
+from src.orm.peewee.connector import database
+from src.orm.peewee.models.user import User
+
+
+class MediumTextField(TextField):
+    """A text field for values larger than MySQL's 64 KB TEXT limit."""
+
+    field_type = "MEDIUMTEXT"
+
+
+class Job(Model):
+    """A model for the jobs table, one row per publish request."""
+
+    project_reference = CharField()
+    service_id = CharField()
+    priority = CharField(default="bulk")
+    status = CharField(default="running")
+    total = IntegerField(default=0)
+    published = IntegerField(default=0)
+    failed = IntegerField(default=0)
+    batches = IntegerField(default=0)
+    next_batch = IntegerField(default=0)
+    attempts = IntegerField(default=1)
+    worker = CharField(null=True)
+    user_id = ForeignKeyField(User)
+    created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now)
+    finished_at = DateTimeField(null=True)
+
+    class Meta:
+        """A Meta class that specifies the database for the model."""
+
+        database = database
+        table_name = "jobs"
+        indexes = ((("status", "updated_at"), False),)
+
+
+class JobBatch(Model):
+    """A model for the job_batches table, the pending messages of a job.
+
+    Batches of messages deferred with send_at have the Unix time they are due
+    at, the others have none.
+    """
+
+    position = IntegerField()
+    items = MediumTextField()
+    due_at = BigIntegerField(null=True, index=True)
+    job_id = ForeignKeyField(Job)
+
+    class Meta:
+        """A Meta class that specifies the database for the model."""
+
+        database = database
+        table_name = "job_batches"
+        indexes = ((("job_id", "position"), True),)
@@ -11,7 +11,7 @@ from src.orm.peewee.models.user import User
 class Log(Model):
     """A model for the log table."""
 
-    sid = CharField()
+    sid = CharField(null=True)
     service_id = CharField(null=True)
     service_name = CharField(null=True)
     project_reference = CharField(null=True)
@@ -29,8 +29,4 @@ class Log(Model):
 
         database = database
         table_name = "logs"
-
-
-# Check if the table exists and create it if it doesn't
-if not Log.table_exists():
-    database.create_tables([Log])
+        indexes = ((("user_id", "sid"), True),)
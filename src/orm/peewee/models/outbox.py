@@ -0,0 +1,43 @@
+"""Peewee outbox model."""
+
+from datetime import datetime
+
+from peewee import (
+    Model,
+    CharField,
+    DateTimeField,
+    IntegerField,
+    TextField,
+    ForeignKeyField,
+)
+
+from src.orm.peewee.connector import database
+from src.orm.peewee.models.user import User
+
+
+class OutboxMessage(Model):
+    """A model for the outbox table, messages waiting to be relayed to RabbitMQ.
+
+    Rows are written in the transaction that creates their logs, and marked
+    sent by the relay once the broker confirmed them.
+    """
+
+    virtual_host = CharField()
+    exchange = CharField()
+    routing_key = CharField()
+    body = TextField()
+    content_type = CharField(default="application/json")
+    content_encoding = CharField(null=True)
+    priority = IntegerField(null=True)
+    attempts = IntegerField(default=0)
+    log_id = IntegerField()
+    user_id = ForeignKeyField(User)
+    created_at = DateTimeField(default=datetime.now)
+    sent_at = DateTimeField(null=True)
+
+    class Meta:
+        """A Meta class that specifies the database for the model."""
+
+        database = database
+        table_name = "outbox"
+        indexes = ((("sent_at", "id"), False),)
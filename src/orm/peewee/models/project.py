@@ -22,8 +22,3 @@ class Project(Model):
 
         database = database
         table_name = "projects"
-
-
-# Check if the table exists and create it if it doesn't
-if not Project.table_exists():
-    database.create_tables([Project])
@@ -25,8 +25,3 @@ class Session(Model):
 
         database = database
         table_name = "sessions"
-
-
-# Check if the table exists and create it if it doesn't
-if not Session.table_exists():
-    database.create_tables([Session])
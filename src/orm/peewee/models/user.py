@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from peewee import Model, CharField, DateTimeField
+from peewee import Model, CharField, DateTimeField, IntegerField
 
 from src.orm.peewee.connector import database
 
@@ -20,6 +20,11 @@ class User(Model):
     twilio_account_sid = CharField(null=True)
     twilio_auth_token = CharField(null=True)
     twilio_service_sid = CharField(null=True)
+    rate_limit_requests = IntegerField(null=True)
+    rate_limit_request_burst = IntegerField(null=True)
+    rate_limit_messages = IntegerField(null=True)
+    rate_limit_message_burst = IntegerField(null=True)
+    data_version = IntegerField(default=0)
     created_at = DateTimeField(default=datetime.now)
 
     class Meta:
@@ -27,8 +32,3 @@ class User(Model):
 
         database = database
         table_name = "users"
-
-
-# Check if the table exists and create it if it doesn't
-if not User.table_exists():
-    database.create_tables([User])
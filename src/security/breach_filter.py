@@ -0,0 +1,165 @@
+"""Offline Breached Password Filter Module"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DKBF"
+VERSION = 1
+
+# magic, version, number of hash functions, number of bits
+HEADER = struct.Struct("<4sB3xIQ")
+
+
+def _bit_positions(sha1_hex: str, num_bits: int, num_hashes: int) -> Iterable[int]:
+    """
+    Derive the bit positions of a SHA-1 digest using double hashing.
+
+    The digest is already uniformly distributed, so two 64-bit words taken
+    from it are used directly instead of hashing the value again.
+
+    :param sha1_hex: str - The SHA-1 digest in hexadecimal.
+    :param num_bits: int - The size of the bit array.
+    :param num_hashes: int - The number of positions to derive.
+
+    :return: Iterable[int] - The bit positions for the digest.
+    """
+    digest = bytes.fromhex(sha1_hex)
+    first = int.from_bytes(digest[0:8], "little")
+    second = int.from_bytes(digest[8:16], "little") | 1
+
+    for index in range(num_hashes):
+        yield (first + index * second) % num_bits
+
+
+class BreachFilter:
+    """
+    A read-only Bloom filter of breached password SHA-1 digests.
+
+    The filter file is memory-mapped, so its pages live in the OS page cache
+    and are shared between all worker processes on the host.
+
+    Attributes:
+        path (str): Path to the filter file.
+        num_bits (int): The size of the bit array.
+        num_hashes (int): The number of bit positions per digest.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens and memory-maps a filter file built with `build_filter`.
+
+        Args:
+            path (str): Path to the filter file.
+
+        Raises:
+            ValueError: If the file is not a valid filter file.
+        """
+        self.path = path
+
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_hashes, self.num_bits = HEADER.unpack_from(
+            self._mmap, 0
+        )
+
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Invalid breached password filter file: {path}")
+
+        logger.info(
+            "Loaded breached password filter '%s' (%d bits, %d hashes)",
+            path,
+            self.num_bits,
+            self.num_hashes,
+        )
+
+    def __contains__(self, sha1_hex: str) -> bool:
+        """
+        Checks if a SHA-1 digest is (probably) in the filter.
+
+        Args:
+            sha1_hex (str): The SHA-1 digest in hexadecimal.
+
+        Returns:
+            bool: False if the digest is definitely not in the filter, True otherwise.
+        """
+        for position in _bit_positions(sha1_hex, self.num_bits, self.num_hashes):
+            if not self._mmap[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def close(self) -> None:
+        """Unmaps the filter file."""
+        self._mmap.close()
+
+
+def optimal_parameters(capacity: int, error_rate: float) -> tuple:
+    """
+    Computes the size of the bit array and the number of hash functions.
+
+    :param capacity: int - The number of digests the filter will hold.
+    :param error_rate: float - The acceptable false positive rate.
+
+    :return: tuple - The number of bits and the number of hash functions.
+    """
+    num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+
+    return num_bits, num_hashes
+
+
+def build_filter(
+    path: str, digests: Iterable[str], capacity: int, error_rate: float = 0.001
+) -> int:
+    """
+    Builds a filter file from SHA-1 digests.
+
+    The bit array is written through a memory map of the output file, so the
+    build does not need the whole filter in process memory.
+
+    :param path: str - Path of the filter file to write.
+    :param digests: Iterable[str] - SHA-1 digests in hexadecimal.
+    :param capacity: int - The number of digests the filter will hold.
+    :param error_rate: float - The acceptable false positive rate.
+
+    :return: int - The number of digests added to the filter.
+    """
+    num_bits, num_hashes = optimal_parameters(
+        capacity=max(capacity, 1), error_rate=error_rate
+    )
+    size = HEADER.size + (num_bits + 7) // 8
+
+    with open(path, "wb") as file:
+        file.truncate(size)
+
+    added = 0
+
+    with open(path, "r+b") as file:
+        with mmap.mmap(file.fileno(), size) as bits:
+            HEADER.pack_into(bits, 0, MAGIC, VERSION, num_hashes, num_bits)
+
+            for digest in digests:
+                for position in _bit_positions(digest, num_bits, num_hashes):
+                    offset = HEADER.size + (position >> 3)
+                    bits[offset] |= 1 << (position & 7)
+
+                added += 1
+
+            bits.flush()
+
+    logger.info(
+        "Built breached password filter '%s' with %d digests (%d bytes)",
+        path,
+        added,
+        os.path.getsize(path),
+    )
+
+    return added
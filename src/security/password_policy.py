@@ -2,12 +2,118 @@
 
 import logging
 import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 import requests
 
 from werkzeug.exceptions import BadRequest
 
+from settings import Configurations
+from src.security.breach_filter import BreachFilter
+
 logger = logging.getLogger(__name__)
 
+PWNED_PASSWORDS_URL = Configurations.PWNED_PASSWORDS_URL
+PWNED_PASSWORDS_TIMEOUT = Configurations.PWNED_PASSWORDS_TIMEOUT
+PWNED_PASSWORDS_CACHE_SIZE = Configurations.PWNED_PASSWORDS_CACHE_SIZE
+PWNED_PASSWORDS_FILTER = Configurations.PWNED_PASSWORDS_FILTER
+
+_range_cache = OrderedDict()
+_range_cache_lock = threading.Lock()
+
+_breach_filter = None
+_breach_filter_lock = threading.Lock()
+
+
+def get_breach_filter() -> Optional[BreachFilter]:
+    """
+    Returns the offline breached password filter, opening it on first use.
+
+    :return: Optional[BreachFilter] - The filter, or None if none is configured.
+    """
+    global _breach_filter  # pylint: disable=global-statement
+
+    if not PWNED_PASSWORDS_FILTER:
+        return None
+
+    if _breach_filter is None:
+        with _breach_filter_lock:
+            if _breach_filter is None:
+                _breach_filter = BreachFilter(path=PWNED_PASSWORDS_FILTER)
+
+    return _breach_filter
+
+
+def get_pwned_range(prefix: str) -> Optional[str]:
+    """
+    Fetches a k-anonymity range from the Pwned Passwords API.
+
+    Successful responses are kept in an in-process LRU cache, failed requests
+    are not cached.
+
+    :param prefix: str - The first 5 characters of the SHA-1 digest.
+
+    :return: Optional[str] - The range response body, or None if it could not be fetched.
+    """
+    with _range_cache_lock:
+        if prefix in _range_cache:
+            _range_cache.move_to_end(prefix)
+            return _range_cache[prefix]
+
+    try:
+        response = requests.get(
+            f"{PWNED_PASSWORDS_URL}/{prefix}", timeout=PWNED_PASSWORDS_TIMEOUT
+        )
+    except requests.exceptions.RequestException as error:
+        logger.error("Failed to fetch Pwned Passwords range: %s", error)
+        return None
+
+    if response.status_code != 200:
+        logger.error(
+            "Failed to fetch Pwned Passwords range: status %s", response.status_code
+        )
+        return None
+
+    with _range_cache_lock:
+        _range_cache[prefix] = response.text
+        _range_cache.move_to_end(prefix)
+
+        while len(_range_cache) > PWNED_PASSWORDS_CACHE_SIZE:
+            _range_cache.popitem(last=False)
+
+    return response.text
+
+
+def is_password_breached(password: str) -> Optional[bool]:
+    """
+    Checks if a password has previously been compromised in a data breach.
+
+    Uses the offline filter when one is configured, otherwise the cached
+    Pwned Passwords range API.
+
+    :param password: str - The password to check.
+
+    :return: Optional[bool] - True if breached, False if not, None if it could not be checked.
+    """
+    password_hash = hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+
+    breach_filter = get_breach_filter()
+
+    if breach_filter:
+        return password_hash in breach_filter
+
+    prefix, suffix = password_hash[:5], password_hash[5:]
+    pwned_range = get_pwned_range(prefix=prefix)
+
+    if pwned_range is None:
+        return None
+
+    # Range lines are "SUFFIX:COUNT" with fixed-length suffixes, so a
+    # substring match can only hit a whole suffix.
+    return f"{suffix}:" in pwned_range
+
 
 def check_password_policy(password) -> bool:
     """
@@ -50,19 +156,16 @@ def check_password_policy(password) -> bool:
         raise BadRequest(message)
 
     # Check if password has been previously compromised in a data breach
-    password_hash = hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
-    prefix, suffix = password_hash[:5], password_hash[5:]
-    response = requests.get(f"https://api.pwnedpasswords.com/range/{prefix}")
+    breached = is_password_breached(password=password)
 
-    if response.status_code != 200:
+    if breached is None:
         logger.error("Unable to check password against Have I Been Pwned database")
         return True
 
-    for line in response.text.splitlines():
-        if line.split(":")[0] == suffix:
-            message = "Password has previously been compromised in a data breach. Use another password"
-            logger.error(message)
-            raise BadRequest(message)
+    if breached:
+        message = "Password has previously been compromised in a data breach. Use another password"
+        logger.error(message)
+        raise BadRequest(message)
 
     # If all checks pass, return True
     return True
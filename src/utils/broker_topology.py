@@ -0,0 +1,166 @@
+"""Broker Topology Module
+
+Accounts' RabbitMQ users and virtual hosts are spread over the nodes listed in
+RABBITMQ_NODES, independent brokers sharing the same credentials and ports. A
+new account is placed on a node by consistent hashing of its account_sid, and
+the placement is stored in the broker_assignments table, so adding a node
+never moves existing accounts. Accounts are moved by rebalance_broker.py.
+Accounts without an assignment, created before the nodes were added, live on
+RABBITMQ_HOST.
+
+Assignments are cached per process for BROKER_ASSIGNMENT_CACHE_TTL seconds.
+"""
+
+import bisect
+import hashlib
+import threading
+import time
+
+from settings import Configurations
+from src.orm.peewee.handlers.broker import BrokerHandler
+
+RING_REPLICAS = 100
+ASSIGNMENT_CACHE_SIZE = 10000
+
+
+def hash_key(key: str) -> int:
+    """Returns the position of a key on the hash ring."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+class HashRing:
+    """
+    A consistent hash ring. Each node is placed RING_REPLICAS times on the
+    ring, and a key belongs to the first node after it, so adding a node only
+    takes keys from the others in equal shares.
+    """
+
+    def __init__(self, nodes: list, replicas: int = RING_REPLICAS):
+        """
+        :param nodes: list - The nodes.
+        :param replicas: int - The number of points of each node on the ring.
+        """
+        self.ring = sorted(
+            (hash_key(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self.keys = [key for key, _ in self.ring]
+
+    def get_node(self, key: str) -> str:
+        """
+        Returns the node of a key.
+
+        :param key: str - The key, e.g. an account_sid.
+
+        :return: str - The node.
+        """
+        index = bisect.bisect(self.keys, hash_key(key)) % len(self.keys)
+        return self.ring[index][1]
+
+
+class BrokerTopology:
+    """
+    Maps accounts to the RabbitMQ node holding their virtual host.
+    """
+
+    def __init__(self, nodes: list, default_node: str):
+        """
+        :param nodes: list - The nodes new accounts are placed on.
+        :param default_node: str - The node of accounts without an assignment.
+        """
+        self.nodes = list(nodes)
+        self.default_node = default_node
+        self.ring = HashRing(nodes=self.nodes)
+        self.assignments = {}
+        self.lock = threading.Lock()
+
+    def cache(self, account_sid: str, node: str) -> None:
+        """Caches the node of an account for BROKER_ASSIGNMENT_CACHE_TTL seconds."""
+        now = time.monotonic()
+
+        with self.lock:
+            if len(self.assignments) >= ASSIGNMENT_CACHE_SIZE:
+                self.assignments = {
+                    key: value
+                    for key, value in self.assignments.items()
+                    if value[0] > now
+                }
+
+            self.assignments[account_sid] = (
+                now + Configurations.BROKER_ASSIGNMENT_CACHE_TTL,
+                node,
+            )
+
+    def node_of(self, account_sid: str) -> str:
+        """
+        Returns the node of an account.
+
+        With a single node, the default one, the database is not queried.
+
+        :param account_sid: str - The account's account_sid, its virtual host.
+
+        :return: str - The node.
+        """
+        if self.nodes == [self.default_node]:
+            return self.default_node
+
+        cached = self.assignments.get(account_sid)
+
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        node = BrokerHandler().get_node(account_sid=account_sid) or self.default_node
+        self.cache(account_sid=account_sid, node=node)
+
+        return node
+
+    def place(self, account_sid: str) -> str:
+        """
+        Places a new account on a node by consistent hashing and stores the
+        assignment.
+
+        :param account_sid: str - The account's account_sid.
+
+        :return: str - The node.
+        """
+        return self.assign(
+            account_sid=account_sid, node=self.ring.get_node(account_sid)
+        )
+
+    def assign(self, account_sid: str, node: str) -> str:
+        """
+        Assigns an account to a node. Other processes follow within
+        BROKER_ASSIGNMENT_CACHE_TTL seconds.
+
+        :param account_sid: str - The account's account_sid.
+        :param node: str - The node, one of RABBITMQ_NODES.
+
+        :return: str - The node.
+        :raises ValueError: If the node is not configured.
+        """
+        if node not in self.nodes:
+            raise ValueError(f"Unknown RabbitMQ node: {node}")
+
+        BrokerHandler().assign_node(account_sid=account_sid, node=node)
+        self.cache(account_sid=account_sid, node=node)
+
+        return node
+
+    def forget(self, account_sid: str) -> None:
+        """
+        Removes the assignment of a deleted account.
+
+        :param account_sid: str - The account's account_sid.
+        """
+        BrokerHandler().delete_assignment(account_sid=account_sid)
+
+        with self.lock:
+            self.assignments.pop(account_sid, None)
+
+
+topology = BrokerTopology(
+    nodes=Configurations.RABBITMQ_NODES, default_node=Configurations.RABBITMQ_HOST
+)
@@ -1,12 +1,47 @@
 """Utility functions for working with carrier services."""
 
 import logging
+from settings import Configurations
 from src.utils.std_carrier_lib.helpers import CarrierInformation
+from src.utils.std_carrier_lib.prefix_router import get_prefix_router
 
 logger = logging.getLogger(__name__)
 carrier_information = CarrierInformation()
 
 
+def get_routing_information(phone_number: str) -> tuple:
+    """
+    Returns the country dialing code and carrier name a phone number routes to.
+
+    With CARRIER_ROUTER set to "prefix", the carrier is resolved with the
+    prefix-trie router and named by its canonical carrier id, otherwise the
+    number is parsed with phonenumbers.
+
+    :param phone_number: str - The phone number in E.164 format.
+
+    :return: tuple - The country dialing code and the carrier name.
+    """
+    if Configurations.CARRIER_ROUTER == "prefix":
+        return get_prefix_router().route(phone_number=phone_number)
+
+    return carrier_information.get_routing_information(phone_number=phone_number)
+
+
+def format_service_name(
+    project_reference: str, country_dialing_code: str, carrier_name: str
+) -> str:
+    """
+    Returns the service name of a project's carrier in a country.
+
+    :param project_reference: str - A unique reference for the project.
+    :param country_dialing_code: str - The country dialing code.
+    :param carrier_name: str - The carrier name.
+
+    :return: str - The service name in the format of "{project_reference}_{country_dialing_code}_{carrier_name}".
+    """
+    return f"{project_reference}_{country_dialing_code}_{carrier_name}"
+
+
 def get_service_name(
     service_id: str, project_reference: str, phone_number: str = None
 ) -> str:
@@ -21,13 +56,14 @@ def get_service_name(
     """
     try:
         if service_id.lower() == "sms":
-            country_dialing_code = carrier_information.get_country_code(
+            country_dialing_code, carrier_name = get_routing_information(
                 phone_number=phone_number
             )
-            carrier_name = carrier_information.get_operator_name(
-                phone_number=phone_number
+            service_name = format_service_name(
+                project_reference=project_reference,
+                country_dialing_code=country_dialing_code,
+                carrier_name=carrier_name,
             )
-            service_name = f"{project_reference}_{country_dialing_code}_{carrier_name}"
 
             logger.info("Successfully generated service name")
 
@@ -38,3 +74,72 @@ def get_service_name(
     except Exception as error:
         logger.error("Failed to generate service name for service_id '%s'", service_id)
         raise error
+
+
+def classify_recipients(
+    service_id: str, project_reference: str, recipients: list
+) -> tuple:
+    """
+    Groups recipients by the service they are routed to.
+
+    Each distinct phone number is normalized and parsed once, however many
+    rows it appears in.
+
+    :param service_id: str - The unique identifier for the service.
+    :param project_reference: str - A unique reference for the project.
+    :param recipients: list - Recipient dicts with at least a "to" phone number.
+
+    :return: tuple - A dict of service name to recipients (with normalized "to"),
+        and a list of per-row errors with the row "index", "recipient" and "error".
+    """
+    groups = {}
+    errors = []
+
+    if service_id.lower() != "sms":
+        error = ValueError(f"Unsupported service_id {service_id}")
+
+        for index, recipient in enumerate(recipients):
+            errors.append({"index": index, "recipient": recipient, "error": error})
+
+        return groups, errors
+
+    service_names = {}
+
+    for index, recipient in enumerate(recipients):
+        phone_number = str(recipient["to"]).replace(" ", "")
+
+        if phone_number not in service_names:
+            try:
+                country_dialing_code, carrier_name = get_routing_information(
+                    phone_number=phone_number
+                )
+                service_names[phone_number] = format_service_name(
+                    project_reference=project_reference,
+                    country_dialing_code=country_dialing_code,
+                    carrier_name=carrier_name,
+                )
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                service_names[phone_number] = error
+
+        service_name = service_names[phone_number]
+
+        if isinstance(service_name, Exception):
+            errors.append(
+                {
+                    "index": index,
+                    "recipient": {**recipient, "to": phone_number},
+                    "error": service_name,
+                }
+            )
+            continue
+
+        groups.setdefault(service_name, []).append({**recipient, "to": phone_number})
+
+    logger.info(
+        "Classified %d recipients into %d services with %d errors",
+        len(recipients),
+        len(groups),
+        len(errors),
+    )
+
+    return groups, errors
@@ -0,0 +1,138 @@
+"""Circuit Breaker Module
+
+A circuit breaker guards calls to a dependency. After failure_threshold
+consecutive failures it opens, and calls fail fast with CircuitOpenError
+instead of waiting for timeouts. Once reset_timeout seconds have passed it is
+half-open: a single probe call is let through, which closes the breaker if it
+succeeds and opens it again if it fails.
+
+Breakers are kept per worker process.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected by an open circuit breaker."""
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker for one class of calls, e.g. the RabbitMQ management API.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        failures: tuple = (Exception,),
+    ):
+        """
+        :param name: str - The name of the breaker, used in logs and metrics.
+        :param failure_threshold: int - Consecutive failures that open the breaker.
+        :param reset_timeout: float - Seconds the breaker stays open before a probe.
+        :param failures: tuple - The exceptions counted as failures, others
+            show the dependency answered and count as successes.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = failures
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def set_state(self, state: str) -> None:
+        """Changes the breaker's state, called with the lock held."""
+        if state == self.state:
+            return
+
+        logger.warning("Circuit breaker '%s' is %s", self.name, state)
+        self.state = state
+        metrics.BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def before_call(self) -> None:
+        """
+        Lets a call through, or rejects it.
+
+        :raises CircuitOpenError: If the breaker is open, or half-open with
+            a probe already running.
+        """
+        with self.lock:
+            if self.state == OPEN and (
+                time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                self.set_state(HALF_OPEN)
+
+            if self.state == CLOSED:
+                return
+
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+
+        metrics.BREAKER_REJECTED.labels(self.name).inc()
+        raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+
+    def record_success(self) -> None:
+        """Records a call that succeeded, closing the breaker."""
+        with self.lock:
+            self.consecutive_failures = 0
+            self.probing = False
+            self.set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """Records a call that failed, opening the breaker if needed."""
+        metrics.BREAKER_FAILURES.labels(self.name).inc()
+
+        with self.lock:
+            self.consecutive_failures += 1
+            self.probing = False
+
+            if (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self.set_state(OPEN)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Calls func through the breaker.
+
+        :param func: Callable - The call to the dependency.
+        :param args: The positional arguments of the call.
+        :param kwargs: The keyword arguments of the call.
+
+        :return: The call's return value.
+        :raises CircuitOpenError: If the call was rejected.
+        """
+        self.before_call()
+
+        try:
+            result = func(*args, **kwargs)
+        except self.failures:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+
+        self.record_success()
+        return result
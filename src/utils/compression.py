@@ -0,0 +1,94 @@
+"""Compression Module
+
+Compresses responses with brotli or gzip, whichever the client prefers
+among those it accepts, once they are larger than COMPRESSION_MIN_SIZE
+bytes. Brotli is used only if the brotli package is installed.
+"""
+
+import gzip
+
+from flask import request
+
+from settings import Configurations
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "text/",
+)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses data with a content encoding.
+
+    :param data: bytes - The data to compress.
+    :param encoding: str - "br" or "gzip".
+
+    :return: bytes - The compressed data.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding() -> str:
+    """
+    Chooses the content encoding for the current request's response.
+
+    :return: str - "br", "gzip", or None if the client accepts neither.
+    """
+    accepted = request.accept_encodings
+    choices = ["br", "gzip"] if brotli else ["gzip"]
+    qualities = {encoding: accepted[encoding] for encoding in choices}
+    encoding = max(choices, key=lambda encoding: qualities[encoding])
+
+    return encoding if qualities[encoding] > 0 else None
+
+
+def compress_response(response):
+    """
+    Compresses a response in place if the client accepts it and it is worth it.
+
+    :param response: flask.Response - The response to compress.
+
+    :return: flask.Response - The response.
+    """
+    if not Configurations.COMPRESSION_ACTIVE:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    data = response.get_data()
+
+    if len(data) < Configurations.COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = choose_encoding()
+
+    if not encoding:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+
+    return response
@@ -0,0 +1,42 @@
+"""Conditional Request Module
+
+Project and log listings are validated with weak ETags derived from the
+user's data version, a counter bumped whenever their projects or logs
+change. Checking an If-None-Match header then costs a primary key lookup
+instead of the listing queries.
+"""
+
+from flask import Response, request
+
+from src.orm.peewee.handlers.user import UserHandler
+
+
+def data_etag(user_id: int) -> str:
+    """
+    Returns the ETag of the user's project and log listings.
+
+    :param user_id: int - The ID of the user.
+
+    :return: str - The ETag value, to be sent as a weak ETag.
+    """
+    version = UserHandler().get_data_version(user_id=user_id)
+
+    return f"{user_id}-{version or 0}"
+
+
+def not_modified(etag: str):
+    """
+    Returns a 304 response if the request's If-None-Match matches the ETag.
+
+    :param etag: str - The current ETag value.
+
+    :return: flask.Response - The 304 response, or None if the client's copy
+        is stale or it sent no If-None-Match.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+
+    return response
@@ -0,0 +1,97 @@
+"""Dispatcher Module
+
+Publish jobs run on one bounded thread pool per priority lane. Transactional
+traffic (e.g. OTPs) goes to the "high" lane and large uploads to the "bulk"
+lane, so a draining bulk upload never holds the threads, nor the AMQP queue
+position, that a high priority message needs. High priority messages are
+published with a higher AMQP priority, which Deku clients honour by declaring
+their queues with x-max-priority.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from settings import Configurations
+from src.utils import metrics
+
+HIGH = "high"
+BULK = "bulk"
+PRIORITIES = (HIGH, BULK)
+
+AMQP_PRIORITIES = {HIGH: 9, BULK: None}
+
+executors = {}
+executors_lock = threading.Lock()
+
+
+def lane_workers(priority: str) -> int:
+    """Returns the number of threads of a priority lane."""
+    if priority == HIGH:
+        return Configurations.DISPATCH_HIGH_WORKERS
+
+    return Configurations.DISPATCH_BULK_WORKERS
+
+
+def get_executor(priority: str) -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of a priority lane, created on first use so each
+    worker process gets its own after forking.
+
+    :param priority: str - "high" or "bulk".
+
+    :return: ThreadPoolExecutor - The lane's thread pool.
+    """
+    with executors_lock:
+        if priority not in executors:
+            executors[priority] = ThreadPoolExecutor(
+                max_workers=lane_workers(priority),
+                thread_name_prefix=f"dispatch-{priority}",
+            )
+
+        return executors[priority]
+
+
+def choose_priority(requested: Optional[str], messages: int) -> str:
+    """
+    Chooses the lane of a publish request.
+
+    Requests without a priority go to the high lane if they have at most
+    DISPATCH_HIGH_MAX_MESSAGES messages, and to the bulk lane otherwise.
+    Larger requests asking for the high lane are sent in the bulk lane.
+
+    :param requested: str - The requested priority, "high", "bulk" or None.
+    :param messages: int - The number of messages in the request.
+
+    :return: str - "high" or "bulk".
+    """
+    if messages > Configurations.DISPATCH_HIGH_MAX_MESSAGES:
+        return BULK
+
+    return requested or HIGH
+
+
+def submit(priority: str, task: Callable) -> Future:
+    """
+    Queues a task on the thread pool of a priority lane, in the caller's
+    context so it stays in the request's trace.
+
+    :param priority: str - "high" or "bulk".
+    :param task: Callable - The task, called without arguments.
+
+    :return: Future - The task's future.
+    """
+    context = contextvars.copy_context()
+    submitted_at = time.perf_counter()
+    metrics.DISPATCH_QUEUED.labels(priority).inc()
+
+    def run():
+        metrics.DISPATCH_QUEUED.labels(priority).dec()
+        metrics.DISPATCH_WAIT.labels(priority).observe(
+            time.perf_counter() - submitted_at
+        )
+        return context.run(task)
+
+    return get_executor(priority).submit(run)
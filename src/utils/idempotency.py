@@ -0,0 +1,99 @@
+"""Idempotency Module
+
+Publish requests are idempotent on the client-provided sid of each message:
+a message whose sid the account already used is reported as a duplicate
+instead of being sent again. The logs table enforces this with a unique
+(user_id, sid) index. In front of it, each worker remembers the sids it
+recently accepted, so quick retries are answered without a query.
+"""
+
+import threading
+from collections import OrderedDict
+
+from peewee import chunked
+
+from settings import Configurations
+from src.orm.peewee.handlers.log import LogHandler
+
+LOOKUP_BATCH_SIZE = 1000
+
+
+class RecentSids:
+    """
+    A bounded set of recently accepted (user_id, sid) pairs.
+
+    Attributes:
+        capacity (int): The number of pairs kept, the oldest are evicted first.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, key: tuple) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def add_many(self, keys: list) -> None:
+        """Remembers pairs, evicting the oldest ones beyond capacity."""
+        if self.capacity <= 0:
+            return
+
+        with self.lock:
+            for key in keys:
+                self.entries[key] = None
+                self.entries.move_to_end(key)
+
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+
+recent_sids = RecentSids(Configurations.IDEMPOTENCY_CACHE_SIZE)
+
+
+def find_duplicates(user_id: int, items: list) -> list:
+    """
+    Finds the messages whose sid the user has already used.
+
+    Sids are checked against the recent sids of this worker first, and the
+    rest against the logs with one query per LOOKUP_BATCH_SIZE sids. A sid
+    repeated within items is a duplicate after its first occurrence. Messages
+    without a sid are never duplicates.
+
+    :param user_id: int - The ID of the user.
+    :param items: list - Messages, each a dict with an optional "sid".
+
+    :return: list - A bool for each item, True if it is a duplicate.
+    """
+    sids = {str(item["sid"]) for item in items if item.get("sid")}
+    seen = {sid for sid in sids if (user_id, sid) in recent_sids}
+    unknown = list(sids - seen)
+
+    for batch in chunked(unknown, LOOKUP_BATCH_SIZE):
+        seen.update(
+            sid for _, sid in LogHandler().get_log_keys(user_id=user_id, sids=batch)
+        )
+
+    duplicates = []
+
+    for item in items:
+        sid = str(item["sid"]) if item.get("sid") else None
+        duplicates.append(sid in seen)
+
+        if sid:
+            seen.add(sid)
+
+    return duplicates
+
+
+def remember(user_id: int, items: list) -> None:
+    """
+    Remembers the sids of accepted messages.
+
+    :param user_id: int - The ID of the user.
+    :param items: list - Messages, each a dict with an optional "sid".
+    """
+    recent_sids.add_many(
+        [(user_id, str(item["sid"])) for item in items if item.get("sid")]
+    )
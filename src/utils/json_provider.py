@@ -0,0 +1,148 @@
+"""JSON Provider Module
+
+A Flask JSON provider backed by orjson, which serializes list responses
+several times faster than the standard library. Output matches Flask's
+default provider: keys are sorted, and datetimes are HTTP dates unless
+JSON_DATETIME_FORMAT is "iso", which lets orjson write them natively as
+ISO 8601. Without orjson installed, or with JSON_PROVIDER set to "json",
+Flask's default provider is used.
+"""
+
+import logging
+from datetime import date, datetime, time, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+from settings import Configurations
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def http_date(value: date) -> str:
+    """
+    Formats a date or datetime as an HTTP date, like werkzeug's http_date.
+
+    Naive datetimes are taken to be UTC and dates to be midnight UTC.
+
+    :param value: date - The date or datetime.
+
+    :return: str - The HTTP date, e.g. "Mon, 05 Jan 2026 03:04:05 GMT".
+    """
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    elif value.tzinfo:
+        value = value.astimezone(timezone.utc)
+
+    return (
+        f"{DAYS[value.weekday()]}, {value.day:02d} {MONTHS[value.month - 1]} "
+        f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+def default(obj):
+    """Serializes the types orjson passes through, like Flask's provider."""
+    if isinstance(obj, date):
+        return http_date(obj)
+
+    return DefaultJSONProvider.default(obj)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serializes with orjson, falling back to the standard library for
+    anything orjson rejects and for calls with json.dumps keyword arguments.
+
+    Attributes:
+        datetime_format (str): "http" for HTTP dates, "iso" for ISO 8601.
+    """
+
+    datetime_format = "http"
+    default = staticmethod(default)
+
+    def options(self) -> int:
+        """Returns the orjson options matching the provider's settings."""
+        option = orjson.OPT_NON_STR_KEYS
+
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        if self.datetime_format != "iso":
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+
+        return option
+
+    def dumps_bytes(self, obj) -> bytes:
+        """
+        Serializes obj to UTF-8 JSON.
+
+        :param obj: The data to serialize.
+
+        :return: bytes - The JSON document.
+        """
+        try:
+            return orjson.dumps(obj, default=self.default, option=self.options())
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the standard library handles
+            return super().dumps(obj).encode("utf-8")
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(obj)
+
+        return self._app.response_class(
+            self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype
+        )
+
+
+def create_json_provider(app) -> DefaultJSONProvider:
+    """
+    Creates the JSON provider configured by JSON_PROVIDER.
+
+    :param app: Flask - The application.
+
+    :return: DefaultJSONProvider - The provider, to be set as app.json.
+    """
+    if Configurations.JSON_PROVIDER == "orjson":
+        if orjson:
+            provider = OrjsonProvider(app)
+            provider.datetime_format = Configurations.JSON_DATETIME_FORMAT
+            return provider
+
+        logger.warning("orjson is not installed, using the standard library")
+
+    return DefaultJSONProvider(app)
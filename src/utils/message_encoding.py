@@ -0,0 +1,124 @@
+"""Message Encoding Module
+
+Deku clients declare the payload encodings they can read as arguments of
+the service queues they create:
+
+- x-deku-content-types: content types in order of preference, e.g.
+  "application/msgpack,application/json".
+- x-deku-content-encodings: compressions for long bodies, e.g. "gzip".
+
+Messages are published with the first supported content type the queue
+lists, and compressed with the first supported encoding once longer than
+AMQP_COMPRESSION_MIN_SIZE bytes. Both are declared in the AMQP content_type
+and content_encoding properties. Queues without these arguments get JSON,
+as before. MessagePack requires the msgpack package.
+"""
+
+import gzip
+import json
+
+from settings import Configurations
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+CONTENT_TYPES_ARGUMENT = "x-deku-content-types"
+CONTENT_ENCODINGS_ARGUMENT = "x-deku-content-encodings"
+
+GZIP_LEVEL = 6
+
+
+def dumps_json(body: dict) -> bytes:
+    """Encodes a message as JSON."""
+    return json.dumps(body).encode("utf-8")
+
+
+SERIALIZERS = {JSON: dumps_json}
+
+if msgpack:
+    SERIALIZERS[MSGPACK] = msgpack.packb
+    SERIALIZERS["application/x-msgpack"] = msgpack.packb
+
+COMPRESSORS = {"gzip": lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0)}
+
+
+class Encoding:
+    """
+    The encoding of the messages published to a queue.
+
+    Attributes:
+        content_type (str): The serialization, e.g. "application/json".
+        content_encoding (str): The compression of long bodies, or None.
+    """
+
+    def __init__(self, content_type: str = JSON, content_encoding: str = None):
+        self.content_type = content_type
+        self.content_encoding = content_encoding
+
+    def encode(self, body: dict) -> tuple:
+        """
+        Encodes a message.
+
+        :param body: dict - The message.
+
+        :return: tuple - The encoded bytes and the content encoding applied,
+            None if the body was left uncompressed.
+        """
+        data = SERIALIZERS[self.content_type](body)
+
+        if (
+            self.content_encoding
+            and len(data) >= Configurations.AMQP_COMPRESSION_MIN_SIZE
+        ):
+            return COMPRESSORS[self.content_encoding](data), self.content_encoding
+
+        return data, None
+
+
+DEFAULT_ENCODING = Encoding()
+
+
+def parse_list(value) -> list:
+    """Returns the items of a comma separated queue argument."""
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip().lower() for item in value]
+
+    return [item.strip().lower() for item in str(value or "").split(",")]
+
+
+def negotiate(queue: dict) -> Encoding:
+    """
+    Chooses the encoding for a queue from the arguments it was declared with.
+
+    :param queue: dict - The queue, as returned by the management API.
+
+    :return: Encoding - The encoding to publish to the queue with.
+    """
+    arguments = (queue or {}).get("arguments") or {}
+
+    if not arguments:
+        return DEFAULT_ENCODING
+
+    content_type = next(
+        (
+            item
+            for item in parse_list(arguments.get(CONTENT_TYPES_ARGUMENT))
+            if item in SERIALIZERS
+        ),
+        JSON,
+    )
+    content_encoding = next(
+        (
+            item
+            for item in parse_list(arguments.get(CONTENT_ENCODINGS_ARGUMENT))
+            if item in COMPRESSORS
+        ),
+        None,
+    )
+
+    return Encoding(content_type, content_encoding)
@@ -0,0 +1,172 @@
+"""Prometheus Metrics Module
+
+Request and publish pipeline metrics, collected in-process with
+prometheus_client. When PROMETHEUS_MULTIPROC_DIR is set, every worker process
+writes its samples to memory-mapped files in that directory and the /metrics
+endpoint aggregates all of them, so a scrape sees the totals of every
+mod_wsgi process, not only the one that served it.
+"""
+
+import atexit
+import glob
+import logging
+import os
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUESTS = Counter(
+    "deku_http_requests_total",
+    "HTTP requests by endpoint, method and status code.",
+    ["endpoint", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "deku_http_request_duration_seconds",
+    "HTTP request latency by endpoint and method.",
+    ["endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "deku_http_requests_in_flight",
+    "HTTP requests being served by endpoint and method.",
+    ["endpoint", "method"],
+    multiprocess_mode="livesum",
+)
+
+MESSAGES_QUEUED = Counter(
+    "deku_messages_queued_total",
+    "Messages accepted by the publish endpoint for sending.",
+    ["service_id"],
+)
+MESSAGES_PUBLISHED = Counter(
+    "deku_messages_published_total",
+    "Messages handed to a channel.",
+    ["service_id", "channel"],
+)
+MESSAGES_FAILED = Counter(
+    "deku_messages_failed_total",
+    "Messages logged as failed.",
+    ["service_id", "channel"],
+)
+TWILIO_FALLBACKS = Counter(
+    "deku_twilio_fallbacks_total",
+    "Messages sent with Twilio because no Deku client queue was available.",
+    ["service_id"],
+)
+
+DISPATCH_QUEUED = Gauge(
+    "deku_dispatch_queued_jobs",
+    "Publish jobs waiting for a thread of their priority lane.",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+DISPATCH_WAIT = Histogram(
+    "deku_dispatch_wait_seconds",
+    "Time publish jobs wait for a thread of their priority lane.",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60, 300),
+)
+
+OUTBOX_RELAYED = Counter(
+    "deku_outbox_relayed_total",
+    "Outbox messages published by the relay, by broker confirmation.",
+    ["status"],
+)
+
+BREAKER_STATE = Gauge(
+    "deku_circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+    multiprocess_mode="max",
+)
+BREAKER_FAILURES = Counter(
+    "deku_circuit_breaker_failures_total",
+    "Calls that failed through a circuit breaker.",
+    ["breaker"],
+)
+BREAKER_REJECTED = Counter(
+    "deku_circuit_breaker_rejected_total",
+    "Calls rejected without being made by an open circuit breaker.",
+    ["breaker"],
+)
+
+
+def request_labels() -> tuple:
+    """Returns the endpoint and method labels of the current request."""
+    return request.endpoint or "unknown", request.method
+
+
+def start_request() -> None:
+    """Records the start of the current request."""
+    g.metrics_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.labels(*request_labels()).inc()
+
+
+def observe_response(response) -> None:
+    """
+    Records the status code and latency of the current request.
+
+    :param response: flask.Response - The response of the current request.
+    """
+    start = g.get("metrics_start")
+
+    if start is None:
+        return
+
+    endpoint, method = request_labels()
+
+    REQUESTS.labels(endpoint, method, str(response.status_code)).inc()
+    REQUEST_LATENCY.labels(endpoint, method).observe(time.perf_counter() - start)
+
+
+def end_request() -> None:
+    """Records the end of the current request, however it finished."""
+    if g.pop("metrics_start", None) is not None:
+        REQUESTS_IN_FLIGHT.labels(*request_labels()).dec()
+
+
+def generate_metrics() -> tuple:
+    """
+    Renders the metrics in the Prometheus text exposition format.
+
+    :return: tuple - The exposition body and its content type.
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def clear_multiprocess_directory() -> None:
+    """Removes the metrics files of previous runs, before workers start."""
+    if not MULTIPROC_DIR:
+        return
+
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.db")):
+        os.remove(path)
+
+    logger.info("Cleared metrics directory '%s'", MULTIPROC_DIR)
+
+
+if MULTIPROC_DIR:
+    # Drop the live gauges of this process from the aggregate when it exits.
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
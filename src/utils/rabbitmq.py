@@ -2,20 +2,24 @@
 
 import ssl
 import logging
-import json
+import threading
+from collections import OrderedDict
 
 import requests
 import pika
+from werkzeug.exceptions import ServiceUnavailable
 
 from settings import Configurations
+from src.utils.message_encoding import DEFAULT_ENCODING, Encoding
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.utils.broker_topology import topology
 
 logger = logging.getLogger(__name__)
 
 config = Configurations
-rabbitmq_user, rabbitmq_password, rabbitmq_host = (
+rabbitmq_user, rabbitmq_password = (
     config.RABBITMQ_USER,
     config.RABBITMQ_PASSWORD,
-    config.RABBITMQ_HOST,
 )
 rabbitmq_management_port, rabbitmq_server_port = (
     config.RABBITMQ_MANAGEMENT_PORT,
@@ -37,24 +41,113 @@ rabbitmq_active_port = (
 )
 RABBITMQ_URL_PROTOCOL = "https" if rabbitmq_ssl_active else "http"
 
-BASE_URL = f"{RABBITMQ_URL_PROTOCOL}://{rabbitmq_host}:{rabbitmq_active_port}/api"
 AUTH = (rabbitmq_user, rabbitmq_password)
 
+MANAGEMENT_TIMEOUT = (
+    config.RABBITMQ_CONNECT_TIMEOUT,
+    config.RABBITMQ_MANAGEMENT_TIMEOUT,
+)
+
+# Breakers are kept per node, so one node failing does not reject the others
+breakers = {}
+breakers_lock = threading.Lock()
+
+
+class BrokerUnavailable(ServiceUnavailable):
+    """Raised when RabbitMQ does not answer in time, or its circuit breaker is open."""
+
+    description = "The message broker is unavailable. Please try again later."
+
+
+def management_url(node: str) -> str:
+    """
+    Build the base URL of a node's management API.
+
+    :param node: str - The host of the RabbitMQ node.
+
+    :return: str - The URL, without a trailing slash.
+    """
+    return f"{RABBITMQ_URL_PROTOCOL}://{node}:{rabbitmq_active_port}/api"
+
+
+def get_breaker(kind: str, node: str) -> CircuitBreaker:
+    """
+    Returns the circuit breaker of a node's management API or AMQP connections.
+
+    :param kind: str - "management" or "amqp".
+    :param node: str - The host of the RabbitMQ node.
+
+    :return: CircuitBreaker - The breaker, created on first use.
+    """
+    with breakers_lock:
+        if (kind, node) not in breakers:
+            breakers[(kind, node)] = CircuitBreaker(
+                name=f"rabbitmq_{kind}:{node}",
+                failure_threshold=config.RABBITMQ_BREAKER_FAILURES,
+                reset_timeout=config.RABBITMQ_BREAKER_RESET_TIMEOUT,
+                failures=(requests.exceptions.RequestException,)
+                if kind == "management"
+                else (pika.exceptions.AMQPConnectionError,),
+            )
+
+        return breakers[(kind, node)]
+
+
+def management_request(method: str, node: str, path: str, **kwargs):
+    """
+    Send a request to a node's management API, with a timeout and through
+    the node's management circuit breaker. Server errors count as failures of
+    the API, client errors are returned like successful responses.
+
+    :param method: str - The HTTP method, e.g. "get".
+    :param node: str - The host of the RabbitMQ node.
+    :param path: str - The path of the request, e.g. "/vhosts/name".
+    :param kwargs: dict - Additional arguments for requests, e.g. json.
+
+    :return: requests.Response - The response.
+    :raises BrokerUnavailable: If the API did not answer, or the breaker is open.
+    """
+
+    def send():
+        response = getattr(requests, method)(
+            url=f"{management_url(node)}{path}",
+            auth=AUTH,
+            timeout=MANAGEMENT_TIMEOUT,
+            **kwargs,
+        )
+
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        return response
+
+    try:
+        return get_breaker("management", node).call(send)
+    except (
+        CircuitOpenError,
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+    ) as error:
+        logger.error("RabbitMQ management API on '%s' is unavailable: %s", node, error)
+        raise BrokerUnavailable() from error
+
 
-def create_virtual_host(name: str, **kwargs) -> bool:
+def create_virtual_host(name: str, node: str = None, **kwargs) -> bool:
     """
     Create a virtual host with the specified name.
 
     :param name: str - The name of the virtual host to create.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return :bool - True if the virtual host was created successfully.
     """
-    url = f"{BASE_URL}/vhosts/{name}"
+    node = node or topology.node_of(name)
+    path = f"/vhosts/{name}"
     data = {**kwargs}
 
     try:
-        response = requests.put(url=url, json=data, auth=AUTH)
+        response = management_request("put", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         logger.error(
@@ -66,20 +159,22 @@ def create_virtual_host(name: str, **kwargs) -> bool:
     return True
 
 
-def delete_virtual_host(name: str, **kwargs) -> bool:
+def delete_virtual_host(name: str, node: str = None, **kwargs) -> bool:
     """
     Delete a virtual host with the specified name.
 
     :param name: str - The name of the virtual host to delete.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return :bool - True if the virtual host was deleted successfully.
     """
-    url = f"{BASE_URL}/vhosts/{name}"
+    node = node or topology.node_of(name)
+    path = f"/vhosts/{name}"
     data = {**kwargs}
 
     try:
-        response = requests.delete(url=url, json=data, auth=AUTH)
+        response = management_request("delete", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
@@ -94,21 +189,51 @@ def delete_virtual_host(name: str, **kwargs) -> bool:
     return True
 
 
-def create_user(username: str, password: str, **kwargs) -> bool:
+def get_virtual_host(name: str, node: str = None) -> dict:
+    """
+    Retrieve a virtual host by its name.
+
+    :param name: str - The name of the virtual host to retrieve.
+    :param node: str - The RabbitMQ node, None for the account's node.
+
+    :return: dict - A dictionary representing the virtual host's properties, including its message counts, or None if the virtual host does not exist.
+    """
+    node = node or topology.node_of(name)
+    path = f"/vhosts/{name}"
+
+    try:
+        response = management_request("get", node=node, path=path)
+        response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
+    except requests.exceptions.HTTPError as error:
+        if error.response.status_code == 404:
+            logger.warning("Virtual Host '%s' not found", name)
+            return None
+        logger.error(
+            "Failed to retrieve virtual host '%s': %s", name, error.response.text
+        )
+        raise error
+
+    logger.info("Successfully retrieved virtual host '%s'", name)
+    return response.json()
+
+
+def create_user(username: str, password: str, node: str = None, **kwargs) -> bool:
     """
     Creates a new user with the specified username and password.
 
     :param username: str - The username of the user to be created.
     :param password: str - The password for the user to be created.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return: bool - True if the user was created successfully, False otherwise.
     """
-    url = f"{BASE_URL}/users/{username}"
+    node = node or topology.node_of(username)
+    path = f"/users/{username}"
     data = {"password": password, **kwargs}
 
     try:
-        response = requests.put(url=url, json=data, auth=AUTH)
+        response = management_request("put", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         logger.error("Failed to create user '%s': %s", username, error.response.text)
@@ -118,20 +243,22 @@ def create_user(username: str, password: str, **kwargs) -> bool:
     return True
 
 
-def delete_user(username: str, **kwargs) -> bool:
+def delete_user(username: str, node: str = None, **kwargs) -> bool:
     """
     Deletes a user with the specified username.
 
     :param username: str - The username of the user to be deleted.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return: bool - True if the user was deleted successfully, False otherwise.
     """
-    url = f"{BASE_URL}/users/{username}"
+    node = node or topology.node_of(username)
+    path = f"/users/{username}"
     data = {**kwargs}
 
     try:
-        response = requests.delete(url=url, json=data, auth=AUTH)
+        response = management_request("delete", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
@@ -145,7 +272,13 @@ def delete_user(username: str, **kwargs) -> bool:
 
 
 def set_permissions(
-    configure: str, write: str, read: str, username: str, virtual_host: str, **kwargs
+    configure: str,
+    write: str,
+    read: str,
+    username: str,
+    virtual_host: str,
+    node: str = None,
+    **kwargs,
 ) -> bool:
     """
     Set the permissions for a user on a virtual host.
@@ -155,15 +288,17 @@ def set_permissions(
     :param read: str - The read permission for the user, e.g. ".*" or "^myqueue$"
     :param username: str - The name of the user to set the permissions for.
     :param virtual_host: str - The name of the virtual host to set the permissions on.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return: bool - True if the permissions were set successfully, otherwise False.
     """
-    url = f"{BASE_URL}/permissions/{virtual_host}/{username}"
+    node = node or topology.node_of(virtual_host)
+    path = f"/permissions/{virtual_host}/{username}"
     data = {"configure": configure, "write": write, "read": read, **kwargs}
 
     try:
-        response = requests.put(url=url, json=data, auth=AUTH)
+        response = management_request("put", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         logger.error("Failed to set permissions '%s': %s", data, error.response.text)
@@ -173,21 +308,23 @@ def set_permissions(
     return True
 
 
-def create_exchange(virtual_host: str, name: str, **kwargs) -> bool:
+def create_exchange(virtual_host: str, name: str, node: str = None, **kwargs) -> bool:
     """
     Create an exchange with the specified name and arguments on the specified virtual host.
 
     :param virtual_host: str - The name of the virtual host on which to create the exchange.
     :param name: str - The name of the exchange to create.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return: bool - True if the exchange was created successfully, otherwise False.
     """
-    url = f"{BASE_URL}/exchanges/{virtual_host}/{name}"
+    node = node or topology.node_of(virtual_host)
+    path = f"/exchanges/{virtual_host}/{name}"
     data = {**kwargs}
 
     try:
-        response = requests.put(url=url, json=data, auth=AUTH)
+        response = management_request("put", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         logger.error("Failed to create exchange '%s': %s", name, error.response.text)
@@ -197,19 +334,21 @@ def create_exchange(virtual_host: str, name: str, **kwargs) -> bool:
     return True
 
 
-def get_exhange_by_name(name: str, virtual_host: str) -> dict:
+def get_exhange_by_name(name: str, virtual_host: str, node: str = None) -> dict:
     """
     Retrieve a exchange by its name and virtual host.
 
     :param name: str - The name of the exchange to retrieve.
     :param virtual_host: str - The name of the virtual host that the exchange belongs to.
+    :param node: str - The RabbitMQ node, None for the account's node.
 
     :return: dict - A dictionary representing the exchange's properties, or None if the exchange does not exist.
     """
-    url = f"{BASE_URL}/exchanges/{virtual_host}/{name}"
+    node = node or topology.node_of(virtual_host)
+    path = f"/exchanges/{virtual_host}/{name}"
 
     try:
-        response = requests.get(url=url, auth=AUTH)
+        response = management_request("get", node=node, path=path)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
@@ -224,21 +363,23 @@ def get_exhange_by_name(name: str, virtual_host: str) -> dict:
     return response.json()
 
 
-def delete_exchange(virtual_host: str, name: str, **kwargs) -> bool:
+def delete_exchange(virtual_host: str, name: str, node: str = None, **kwargs) -> bool:
     """
     Delete an exchange with the specified name and arguments on the specified virtual host.
 
     :param virtual_host: str - The name of the virtual host on which to delete the exchange.
     :param name: str - The name of the exchange to delete.
+    :param node: str - The RabbitMQ node, None for the account's node.
     :param kwargs: dict - Additional arguments to include in the request payload.
 
     :return: bool - True if the exchange was deleted successfully, otherwise False.
     """
-    url = f"{BASE_URL}/exchanges/{virtual_host}/{name}"
+    node = node or topology.node_of(virtual_host)
+    path = f"/exchanges/{virtual_host}/{name}"
     data = {**kwargs}
 
     try:
-        response = requests.delete(url=url, json=data, auth=AUTH)
+        response = management_request("delete", node=node, path=path, json=data)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
@@ -253,19 +394,21 @@ def delete_exchange(virtual_host: str, name: str, **kwargs) -> bool:
     return True
 
 
-def get_queue_by_name(name: str, virtual_host: str) -> dict:
+def get_queue_by_name(name: str, virtual_host: str, node: str = None) -> dict:
     """
     Retrieve a queue by its name and virtual host.
 
     :param name: str - The name of the queue to retrieve.
     :param virtual_host: str - The name of the virtual host that the queue belongs to.
+    :param node: str - The RabbitMQ node, None for the account's node.
 
     :return: dict - A dictionary representing the queue's properties, or None if the queue does not exist.
     """
-    url = f"{BASE_URL}/queues/{virtual_host}/{name}"
+    node = node or topology.node_of(virtual_host)
+    path = f"/queues/{virtual_host}/{name}"
 
     try:
-        response = requests.get(url=url, auth=AUTH)
+        response = management_request("get", node=node, path=path)
         response.raise_for_status()  # raise HTTPError for 4xx and 5xx errors
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
@@ -280,18 +423,17 @@ def get_queue_by_name(name: str, virtual_host: str) -> dict:
     return response.json()
 
 
-def publish_to_exchange(
-    routing_key: str, body: dict, exchange: str, virtual_host: str
-) -> bool:
+def get_connection_parameters(
+    virtual_host: str, node: str = None
+) -> pika.ConnectionParameters:
     """
-    Publish a message to an exchange on a RabbitMQ broker.
+    Build the AMQP connection parameters for a virtual host, on the node it
+    is assigned to.
 
-    :param routing_key: str - The routing key for the message.
-    :param body: dict - The message body as a dictionary.
-    :param exchange: str - The exchange to publish the message to.
     :param virtual_host: str - The virtual host on the RabbitMQ server to use.
+    :param node: str - The RabbitMQ node, None for the account's node.
 
-    :return: bool - True if the message was successfully published, False otherwise.
+    :return: pika.ConnectionParameters - The connection parameters.
     """
     credentials = pika.PlainCredentials(*AUTH)
     ssl_options = None
@@ -300,31 +442,190 @@ def publish_to_exchange(
         context = ssl.create_default_context()
         ssl_options = pika.SSLOptions(context)
 
-    conn_params = pika.ConnectionParameters(
-        host=Configurations.RABBITMQ_HOST,
+    return pika.ConnectionParameters(
+        host=node or topology.node_of(virtual_host),
         port=Configurations.RABBITMQ_SERVER_PORT_SSL
         if Configurations.RABBITMQ_SSL_ACTIVE
         else Configurations.RABBITMQ_SERVER_PORT,
         virtual_host=virtual_host,
         credentials=credentials,
         ssl_options=ssl_options,
+        socket_timeout=Configurations.RABBITMQ_CONNECT_TIMEOUT,
+        stack_timeout=Configurations.RABBITMQ_AMQP_TIMEOUT,
+        blocked_connection_timeout=Configurations.RABBITMQ_AMQP_TIMEOUT,
     )
 
-    try:
+
+def publish_to_exchange(
+    routing_key: str,
+    body: dict,
+    exchange: str,
+    virtual_host: str,
+    encoding: Encoding = DEFAULT_ENCODING,
+    priority: int = None,
+) -> bool:
+    """
+    Publish a message to an exchange on a RabbitMQ broker.
+
+    :param routing_key: str - The routing key for the message.
+    :param body: dict - The message body as a dictionary.
+    :param exchange: str - The exchange to publish the message to.
+    :param virtual_host: str - The virtual host on the RabbitMQ server to use.
+    :param encoding: Encoding - The payload encoding, JSON by default.
+    :param priority: int - The AMQP priority of the message, None for the default.
+
+    :return: bool - True if the message was successfully published, False otherwise.
+    :raises BrokerUnavailable: If the broker did not answer, or the breaker is open.
+    """
+    node = topology.node_of(virtual_host)
+    conn_params = get_connection_parameters(virtual_host=virtual_host, node=node)
+    data, content_encoding = encoding.encode(body)
+
+    def publish():
         with pika.BlockingConnection(conn_params) as connection:
             channel = connection.channel()
 
             channel.basic_publish(
                 exchange=exchange,
                 routing_key=routing_key,
-                body=json.dumps(body),
+                body=data,
                 properties=pika.BasicProperties(
-                    delivery_mode=2
-                ),  # make message persistent
+                    content_type=encoding.content_type,
+                    content_encoding=content_encoding,
+                    priority=priority,
+                    delivery_mode=2,  # make message persistent
+                ),
             )
 
-    except Exception as error:
-        raise error
+    try:
+        get_breaker("amqp", node).call(publish)
+    except (CircuitOpenError, pika.exceptions.AMQPConnectionError) as error:
+        logger.error("RabbitMQ node '%s' is unavailable: %s", node, error)
+        raise BrokerUnavailable() from error
 
     logger.info("Successfully published to queue '%s'", routing_key)
     return True
+
+
+class ConfirmedPublisher:
+    """
+    Publishes over persistent AMQP connections with publisher confirms, one
+    connection per virtual host, for the outbox relay. The least recently
+    used connection is closed once max_connections are open, and a
+    connection is reopened on the new node when its account is moved.
+    """
+
+    def __init__(self, max_connections: int):
+        """
+        :param max_connections: int - The maximum number of open connections.
+        """
+        self.max_connections = max_connections
+        self.connections = OrderedDict()
+
+    def get_channel(self, virtual_host: str, node: str):
+        """
+        Returns the confirmed channel of a virtual host, opening it if needed.
+
+        :param virtual_host: str - The virtual host to publish to.
+        :param node: str - The RabbitMQ node of the virtual host.
+
+        :return: pika.channel.Channel - The channel.
+        """
+        if virtual_host in self.connections:
+            self.connections.move_to_end(virtual_host)
+            connected_node, _, channel = self.connections[virtual_host]
+
+            if connected_node == node and channel.is_open:
+                return channel
+
+            self.close(virtual_host=virtual_host)
+
+        while len(self.connections) >= self.max_connections:
+            self.close(virtual_host=next(iter(self.connections)))
+
+        def connect():
+            connection = pika.BlockingConnection(
+                get_connection_parameters(virtual_host=virtual_host, node=node)
+            )
+            channel = connection.channel()
+            channel.confirm_delivery()
+            return connection, channel
+
+        connection, channel = get_breaker("amqp", node).call(connect)
+        self.connections[virtual_host] = (node, connection, channel)
+
+        return channel
+
+    def publish(
+        self,
+        virtual_host: str,
+        exchange: str,
+        routing_key: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str = None,
+        priority: int = None,
+    ) -> bool:
+        """
+        Publish an encoded message and wait for the broker to confirm it.
+
+        :param virtual_host: str - The virtual host to publish to.
+        :param exchange: str - The exchange to publish the message to.
+        :param routing_key: str - The routing key for the message.
+        :param data: bytes - The encoded message.
+        :param content_type: str - The serialization of the message.
+        :param content_encoding: str - The compression of the message, or None.
+        :param priority: int - The AMQP priority of the message, None for the default.
+
+        :return: bool - True if confirmed, False if the broker rejected the message.
+        :raises BrokerUnavailable: If the broker did not answer, or the breaker is open.
+        """
+        node = topology.node_of(virtual_host)
+
+        try:
+            channel = self.get_channel(virtual_host=virtual_host, node=node)
+            get_breaker("amqp", node).call(
+                channel.basic_publish,
+                exchange=exchange,
+                routing_key=routing_key,
+                body=data,
+                properties=pika.BasicProperties(
+                    content_type=content_type,
+                    content_encoding=content_encoding,
+                    priority=priority,
+                    delivery_mode=2,  # make message persistent
+                ),
+            )
+        except pika.exceptions.NackError:
+            logger.error("Message to exchange '%s' was not confirmed", exchange)
+            return False
+        except pika.exceptions.AMQPChannelError as error:
+            # e.g. the exchange was deleted, the broker closed the channel
+            logger.error("Failed to publish to exchange '%s': %s", exchange, error)
+            self.close(virtual_host=virtual_host)
+            return False
+        except (CircuitOpenError, pika.exceptions.AMQPConnectionError) as error:
+            logger.error("RabbitMQ node '%s' is unavailable: %s", node, error)
+            self.close(virtual_host=virtual_host)
+            raise BrokerUnavailable() from error
+
+        return True
+
+    def close(self, virtual_host: str = None) -> None:
+        """
+        Close the connection of a virtual host, or all connections.
+
+        :param virtual_host: str - The virtual host, None for all.
+        """
+        virtual_hosts = (
+            [virtual_host] if virtual_host is not None else list(self.connections)
+        )
+
+        for name in virtual_hosts:
+            _, connection, _ = self.connections.pop(name, (None, None, None))
+
+            try:
+                if connection is not None and connection.is_open:
+                    connection.close()
+            except pika.exceptions.AMQPError as error:
+                logger.warning("Failed to close connection to '%s': %s", name, error)
@@ -0,0 +1,411 @@
+"""Rate Limiter Module
+
+Token bucket rate limits on publishing, per account and per project, for both
+requests and messages. A bucket holds up to `burst` tokens and refills at
+`rate` tokens per second. Request buckets are charged one token before the
+payload is parsed; message buckets must not be empty at that point and are
+charged the number of messages once it is known, possibly going into debt so a
+large upload delays the account's following requests instead of being refused
+outright.
+
+Buckets live in process memory by default. Setting RATE_LIMIT_BACKEND to a
+Redis URL shares them between all processes and nodes (requires the redis
+package).
+"""
+
+import math
+import threading
+import time
+
+from settings import Configurations
+from src.orm.peewee.handlers.user import UserHandler
+
+RATE_LIMIT_FIELDS = [
+    "rate_limit_requests",
+    "rate_limit_request_burst",
+    "rate_limit_messages",
+    "rate_limit_message_burst",
+]
+
+SWEEP_INTERVAL = 1000
+ACCOUNT_CACHE_SIZE = 10000
+
+
+class Limit:
+    """
+    A token bucket limit.
+
+    Attributes:
+        rate (float): Tokens added per second, 0 to disable the limit.
+        burst (int): The bucket capacity.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+    def __bool__(self):
+        return self.rate > 0
+
+
+class RateLimitStatus:
+    """
+    The outcome of charging a bucket.
+
+    Attributes:
+        allowed (bool): Whether the charge was accepted.
+        limit (int): The bucket capacity.
+        remaining (int): Whole tokens left in the bucket.
+        reset (float): Seconds until the bucket is full again.
+        retry_after (float): Seconds until the charge would be accepted.
+    """
+
+    def __init__(
+        self,
+        allowed: bool,
+        limit: int,
+        remaining: int,
+        reset: float,
+        retry_after: float = 0,
+    ):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+    def headers(self) -> dict:
+        """Returns the rate limit response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+
+        return headers
+
+
+def charge_bucket(
+    tokens: float, updated: float, now: float, limit: Limit, amount: int, debt: bool
+) -> tuple:
+    """
+    Refills a bucket and tries to take tokens from it.
+
+    :param tokens: float - The tokens in the bucket when it was last updated.
+    :param updated: float - When the bucket was last updated.
+    :param now: float - The current time.
+    :param limit: Limit - The bucket's limit.
+    :param amount: int - The tokens to take.
+    :param debt: bool - Whether a non-empty bucket may go below zero.
+
+    :return: tuple - The tokens left and the RateLimitStatus.
+    """
+    tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+    allowed = tokens >= amount or (debt and tokens > 0)
+    retry_after = 0
+
+    if allowed:
+        tokens -= amount
+    else:
+        retry_after = ((1 if debt else amount) - tokens) / limit.rate
+
+    status = RateLimitStatus(
+        allowed=allowed,
+        limit=limit.burst,
+        remaining=math.floor(tokens),
+        reset=(limit.burst - tokens) / limit.rate,
+        retry_after=retry_after,
+    )
+
+    return tokens, status
+
+
+class MemoryBackend:
+    """Token buckets in process memory."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.charges = 0
+
+    def charge(self, key: str, limit: Limit, amount: int, debt: bool = False):
+        """Takes tokens from a bucket, see `charge_bucket`."""
+        now = time.monotonic()
+
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (limit.burst, now, limit))
+            tokens, status = charge_bucket(tokens, updated, now, limit, amount, debt)
+            self.buckets[key] = (tokens, now, limit)
+
+            self.charges += 1
+
+            if self.charges % SWEEP_INTERVAL == 0:
+                self.sweep(now)
+
+        return status
+
+    def sweep(self, now: float) -> None:
+        """Drops buckets idle long enough to have refilled completely, by
+        their own limit and including any debt."""
+        for key, (tokens, updated, limit) in list(self.buckets.items()):
+            if now - updated >= (limit.burst - tokens) / limit.rate:
+                del self.buckets[key]
+
+
+REDIS_CHARGE_SCRIPT = """
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local debt = ARGV[4] == "1"
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + (now - updated) * rate)
+
+local allowed = 0
+
+if tokens >= amount or (debt and tokens > 0) then
+    tokens = tokens - amount
+    allowed = 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil((burst - math.min(tokens, 0)) / rate) + 1)
+
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    """Token buckets in Redis, shared between processes and nodes."""
+
+    def __init__(self, url: str):
+        # pylint: disable=import-outside-toplevel
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(REDIS_CHARGE_SCRIPT)
+
+    def charge(self, key: str, limit: Limit, amount: int, debt: bool = False):
+        """Takes tokens from a bucket, see `charge_bucket`."""
+        allowed, tokens = self.script(
+            keys=[f"deku:rate_limit:{key}"],
+            args=[limit.rate, limit.burst, amount, 1 if debt else 0],
+        )
+        tokens = float(tokens)
+        retry_after = 0
+
+        if not allowed:
+            retry_after = ((1 if debt else amount) - tokens) / limit.rate
+
+        return RateLimitStatus(
+            allowed=bool(allowed),
+            limit=limit.burst,
+            remaining=math.floor(tokens),
+            reset=(limit.burst - tokens) / limit.rate,
+            retry_after=retry_after,
+        )
+
+
+class RateLimiter:
+    """
+    Rate limits publishing per account and per project.
+
+    Account limits come from the user's rate_limit_* columns, falling back to
+    the RATE_LIMIT_* settings, and are cached for RATE_LIMIT_CACHE_TTL seconds
+    so checks do not query the database on every request. Project limits come
+    from the RATE_LIMIT_PROJECT_* settings.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.account_limits = {}
+        self.lock = threading.Lock()
+        self.project_requests = Limit(
+            Configurations.RATE_LIMIT_PROJECT_REQUESTS,
+            Configurations.RATE_LIMIT_PROJECT_REQUEST_BURST,
+        )
+        self.project_messages = Limit(
+            Configurations.RATE_LIMIT_PROJECT_MESSAGES,
+            Configurations.RATE_LIMIT_PROJECT_MESSAGE_BURST,
+        )
+
+    def get_account_limits(self, account_sid: str) -> tuple:
+        """
+        Returns the request and message limits of an account.
+
+        :param account_sid: str - The account's account_sid.
+
+        :return: tuple - The request Limit and the message Limit.
+        """
+        now = time.monotonic()
+        cached = self.account_limits.get(account_sid)
+
+        if cached and cached[0] > now:
+            return cached[1]
+
+        values = UserHandler().get_rate_limits(account_sid=account_sid) or {}
+
+        def setting(field: str, default):
+            return default if values.get(field) is None else values[field]
+
+        limits = (
+            Limit(
+                setting("rate_limit_requests", Configurations.RATE_LIMIT_REQUESTS),
+                setting(
+                    "rate_limit_request_burst", Configurations.RATE_LIMIT_REQUEST_BURST
+                ),
+            ),
+            Limit(
+                setting("rate_limit_messages", Configurations.RATE_LIMIT_MESSAGES),
+                setting(
+                    "rate_limit_message_burst", Configurations.RATE_LIMIT_MESSAGE_BURST
+                ),
+            ),
+        )
+
+        with self.lock:
+            if len(self.account_limits) >= ACCOUNT_CACHE_SIZE:
+                self.account_limits = {
+                    key: value
+                    for key, value in self.account_limits.items()
+                    if value[0] > now
+                }
+
+            self.account_limits[account_sid] = (
+                now + Configurations.RATE_LIMIT_CACHE_TTL,
+                limits,
+            )
+
+        return limits
+
+    def check(self, checks: list):
+        """
+        Takes the given amounts from buckets, stopping at the first refusal.
+
+        :param checks: list - (key, Limit, amount) tuples. An amount of 0 only
+            checks that the bucket is not empty.
+
+        :return: RateLimitStatus - The first refusal, otherwise the status of
+            the first bucket, or None if no limit applies.
+        """
+        result = None
+
+        for key, limit, amount in checks:
+            if not limit:
+                continue
+
+            status = self.backend.charge(key, limit, amount, debt=amount == 0)
+
+            if not status.allowed:
+                return status
+
+            result = result or status
+
+        return result
+
+    def check_account(self, account_sid: str):
+        """
+        Charges a publish request to its account, once its credentials match.
+
+        Takes a token from the account's request bucket and checks that its
+        message bucket is not empty.
+
+        :param account_sid: str - The account's account_sid.
+
+        :return: RateLimitStatus - The first refusal, otherwise the status of
+            the account's request bucket, or None if no limit applies.
+        """
+        request_limit, message_limit = self.get_account_limits(account_sid)
+
+        return self.check(
+            [
+                (f"account:{account_sid}:requests", request_limit, 1),
+                (f"account:{account_sid}:messages", message_limit, 0),
+            ]
+        )
+
+    def check_project(self, account_sid: str, project_reference: str):
+        """
+        Charges a publish request to its project, once the project is found.
+
+        Project buckets are keyed by account as well, since a reference is
+        only looked up within its account.
+
+        :param account_sid: str - The account's account_sid.
+        :param project_reference: str - The project reference.
+
+        :return: RateLimitStatus - The first refusal, otherwise the status of
+            the project's request bucket, or None if no limit applies.
+        """
+        project = f"project:{account_sid}:{project_reference}"
+
+        return self.check(
+            [
+                (f"{project}:requests", self.project_requests, 1),
+                (f"{project}:messages", self.project_messages, 0),
+            ]
+        )
+
+    def charge_messages(
+        self, account_sid: str, project_reference: str, count: int
+    ) -> None:
+        """
+        Charges the messages of a publish request once they are counted.
+
+        :param account_sid: str - The account's account_sid.
+        :param project_reference: str - The project reference.
+        :param count: int - The number of messages accepted for sending.
+        """
+        _, message_limit = self.get_account_limits(account_sid)
+
+        for key, limit in (
+            (f"account:{account_sid}:messages", message_limit),
+            (
+                f"project:{account_sid}:{project_reference}:messages",
+                self.project_messages,
+            ),
+        ):
+            if limit and count:
+                self.backend.charge(key, limit, count, debt=True)
+
+
+def create_backend(url: str):
+    """
+    Creates the bucket backend configured by URL.
+
+    :param url: str - "memory", or a redis:// or rediss:// URL.
+
+    :return: The backend.
+    """
+    if not url or url == "memory":
+        return MemoryBackend()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+
+    raise ValueError(f"Invalid rate limit backend: {url}")
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the rate limiter, creating its backend on first use."""
+    global _rate_limiter  # pylint: disable=global-statement
+
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    backend=create_backend(Configurations.RATE_LIMIT_BACKEND)
+                )
+
+    return _rate_limiter
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+"""Compact MCC/MNC reference data.
+
+The MCC/MNC tables are packed into a binary file of sorted fixed-size records
+and a string pool. The file is memory-mapped on first use and searched in
+place, so worker processes share its pages instead of each holding the tables
+as Python objects. Lookups are memoized in small LRU caches, since traffic
+resolves the same few countries and operators over and over.
+"""
+
+import bisect
+import functools
+import mmap
+import os
+import struct
+import threading
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mccmnc.bin")
+
+MAGIC = b"DKCR"
+VERSION = 1
+CACHE_SIZE = 1024
+
+# magic, version, then (offset, count) of each section and of the string pool
+HEADER = struct.Struct("<4sH2x" + "II" * 6)
+
+# mcc, country, call code
+MCC_RECORD = struct.Struct("<HIHIH")
+# country or call code, mcc
+NAME_RECORD = struct.Struct("<IHH")
+# mcc, operator name, operator code
+OPERATOR_RECORD = struct.Struct("<HIHI")
+# operator code, operator name
+CODE_RECORD = struct.Struct("<IIH")
+
+
+class _Keys:
+    """A sequence view of the sort keys of a section, for bisect."""
+
+    def __init__(self, data, offset: int, count: int, record: struct.Struct, key):
+        self.data = data
+        self.offset = offset
+        self.count = count
+        self.record = record
+        self.key = key
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.key(
+            self.record.unpack_from(self.data, self.offset + index * self.record.size)
+        )
+
+    def unpack(self, index):
+        """Returns the record at index."""
+        return self.record.unpack_from(
+            self.data, self.offset + index * self.record.size
+        )
+
+
+class CarrierData:
+    """Read-only lookups over a memory-mapped carrier data file."""
+
+    def __init__(self, path: str = DATA_PATH):
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self.data, 0)
+
+        if header[0] != MAGIC or header[1] != VERSION:
+            self.data.close()
+            raise ValueError(f"Invalid carrier data file: {path}")
+
+        sections = [header[index : index + 2] for index in range(2, 14, 2)]
+        mccs, countries, call_codes, operators, codes, pool = sections
+
+        self.pool_offset = pool[0]
+
+        self.mccs = _Keys(self.data, *mccs, MCC_RECORD, lambda record: record[0])
+        self.countries = _Keys(
+            self.data, *countries, NAME_RECORD, lambda record: self.string(*record[:2])
+        )
+        self.call_codes = _Keys(
+            self.data, *call_codes, NAME_RECORD, lambda record: self.string(*record[:2])
+        )
+        self.operators = _Keys(
+            self.data,
+            *operators,
+            OPERATOR_RECORD,
+            lambda record: (record[0], self.string(*record[1:3])),
+        )
+        self.codes = _Keys(self.data, *codes, CODE_RECORD, lambda record: record[0])
+
+    def string(self, offset: int, length: int) -> bytes:
+        """Returns an encoded string from the string pool."""
+        start = self.pool_offset + offset
+        return self.data[start : start + length]
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def get_mcc(self, mcc: int) -> tuple:
+        """Returns the (country, call code) of an MCC, or None if unknown."""
+        index = bisect.bisect_left(self.mccs, mcc)
+
+        if index < len(self.mccs) and self.mccs[index] == mcc:
+            (
+                _,
+                country_offset,
+                country_length,
+                call_code_offset,
+                call_code_length,
+            ) = self.mccs.unpack(index)
+            return (
+                self.string(country_offset, country_length).decode("utf-8"),
+                self.string(call_code_offset, call_code_length).decode("utf-8"),
+            )
+
+        return None
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def get_mccs_by_country(self, country: str) -> tuple:
+        """Returns the MCCs of a country, in table order."""
+        return self.__get_mccs__(self.countries, country)
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def get_mccs_by_call_code(self, call_code: str) -> tuple:
+        """Returns the MCCs of a country calling code, in table order."""
+        return self.__get_mccs__(self.call_codes, call_code)
+
+    def __get_mccs__(self, index: _Keys, name: str) -> tuple:
+        key = name.encode("utf-8")
+        position = bisect.bisect_left(index, key)
+        mccs = []
+
+        while position < len(index) and index[position] == key:
+            mccs.append(index.unpack(position)[2])
+            position += 1
+
+        return tuple(mccs)
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def get_operator_code(self, mcc: int, operator_name: str) -> int:
+        """Returns the operator code of an operator in an MCC, or None."""
+        key = (mcc, operator_name.encode("utf-8"))
+        index = bisect.bisect_left(self.operators, key)
+
+        if index < len(self.operators) and self.operators[index] == key:
+            return self.operators.unpack(index)[3]
+
+        return None
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def get_operator_name(self, operator_code: int) -> str:
+        """Returns the operator name of an operator code, or None."""
+        index = bisect.bisect_left(self.codes, operator_code)
+
+        if index < len(self.codes) and self.codes[index] == operator_code:
+            return self.string(*self.codes.unpack(index)[1:]).decode("utf-8")
+
+        return None
+
+
+_carrier_data = None
+_carrier_data_lock = threading.Lock()
+
+
+def get_carrier_data() -> CarrierData:
+    """Returns the carrier data, memory-mapping the data file on first use."""
+    global _carrier_data  # pylint: disable=global-statement
+
+    if _carrier_data is None:
+        with _carrier_data_lock:
+            if _carrier_data is None:
+                _carrier_data = CarrierData()
+
+    return _carrier_data
+
+
+def build_carrier_data(mcc_dict: dict, mnc_dict: dict, path: str = DATA_PATH) -> int:
+    """Packs the MCC/MNC tables into a carrier data file.
+
+    Where several entries share a lookup key, the first in table order wins,
+    as it did with the linear scans over the tables.
+
+    Args:
+        mcc_dict (dict):
+            mcc -> [country, call code]
+        mnc_dict (dict):
+            (mcc, mnc) -> [operator code, operator name, ...]
+        path (str):
+            Path of the data file to write.
+    Returns:
+        (int): the size of the data file in bytes
+    """
+    pool = bytearray()
+    strings = {}
+
+    def add_string(value: str) -> tuple:
+        encoded = str(value).encode("utf-8")
+
+        if encoded not in strings:
+            strings[encoded] = (len(pool), len(encoded))
+            pool.extend(encoded)
+
+        return strings[encoded]
+
+    mccs = []
+    countries = []
+    call_codes = []
+
+    for order, (mcc, (country, call_code)) in enumerate(mcc_dict.items()):
+        country_ref = add_string(country)
+        call_code_ref = add_string(call_code)
+
+        mccs.append((mcc, *country_ref, *call_code_ref))
+        countries.append((str(country).encode("utf-8"), order, (*country_ref, mcc)))
+        call_codes.append(
+            (str(call_code).encode("utf-8"), order, (*call_code_ref, mcc))
+        )
+
+    operators = {}
+    codes = {}
+
+    for (mcc, _), values in mnc_dict.items():
+        if values[0] is None:
+            # Entries without an operator code cannot resolve to one.
+            continue
+
+        name_ref = add_string(values[1])
+        operators.setdefault(
+            (mcc, str(values[1]).encode("utf-8")), (mcc, *name_ref, values[0])
+        )
+        codes.setdefault(values[0], (values[0], *name_ref))
+
+    sections = [
+        (MCC_RECORD, sorted(mccs)),
+        (NAME_RECORD, [record for *_, record in sorted(countries)]),
+        (NAME_RECORD, [record for *_, record in sorted(call_codes)]),
+        (OPERATOR_RECORD, [operators[key] for key in sorted(operators)]),
+        (CODE_RECORD, [codes[key] for key in sorted(codes)]),
+    ]
+
+    body = bytearray()
+    layout = []
+
+    for record, rows in sections:
+        layout.extend((HEADER.size + len(body), len(rows)))
+
+        for row in rows:
+            body.extend(record.pack(*row))
+
+    layout.extend((HEADER.size + len(body), len(pool)))
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, *layout))
+        file.write(body)
+        file.write(pool)
+
+    return os.path.getsize(path)
@@ -3,7 +3,7 @@
 import phonenumbers
 from phonenumbers import geocoder, carrier
 
-from src.utils.std_carrier_lib import MCCMNC
+from src.utils.std_carrier_lib.carrier_data import get_carrier_data
 
 INVALID_COUNTRY_CODE_EXCEPTION = "INVALID_COUNTRY_CODE"
 
@@ -66,15 +66,10 @@ class CarrierInformation:
     ) -> str:
         """requires the first 3 digits"""
         if operator_code:
-            cm_op_code = (int(operator_code[0:3]), int(operator_code[-1]))
-            if cm_op_code in MCCMNC.MNC_dict:
-                operator_details = MCCMNC.MNC_dict[cm_op_code]
+            operator_name = get_carrier_data().get_operator_name(int(operator_code))
 
-                if operator_details[0] == int(operator_code):
-                    operator_name = str(operator_details[1])
-                    # logging.debug("%s", operator_name)
-
-                    return operator_name
+            if operator_name is not None:
+                return str(operator_name)
 
             return ""
         else:
@@ -96,13 +91,30 @@ class CarrierInformation:
             MISSING_COUNTRY_CODE_EXCEPTION
         """
 
+        _number = self.__parse_phonenumber__(MSISDN=MSISDN)
+
+        return phonenumbers.carrier.name_for_number(_number, "en")
+
+    def __parse_phonenumber__(self, MSISDN: str) -> phonenumbers.PhoneNumber:
+        """Parses and validates MSISDN.
+        Args:
+            MSISDN (str):
+                The phone number to parse.
+        Returns:
+            (PhoneNumber): the parsed phone number
+        Exceptions:
+            INVALID_PHONE_NUMBER_EXCEPTION
+            INVALID_COUNTRY_CODE_EXCEPTION
+            MISSING_COUNTRY_CODE_EXCEPTION
+        """
+
         try:
             _number = phonenumbers.parse(MSISDN, "en")
 
             if not phonenumbers.is_valid_number(_number):
                 raise InvalidPhoneNUmber()
 
-            return phonenumbers.carrier.name_for_number(_number, "en")
+            return _number
 
         except phonenumbers.NumberParseException as error:
             if (
@@ -125,10 +137,9 @@ class CarrierInformation:
             try:
                 """requires the first 3 digits"""
                 cm_op_code = int(operator_code[0:3])
+                operator_details = get_carrier_data().get_mcc(cm_op_code)
 
-                if cm_op_code in MCCMNC.MCC_dict:
-                    operator_details = MCCMNC.MCC_dict[cm_op_code]
-
+                if operator_details:
                     return str(operator_details[0])
 
             except Exception as error:
@@ -152,29 +163,9 @@ class CarrierInformation:
             MISSING_COUNTRY_CODE_EXCEPTION
         """
 
-        try:
-            _number = phonenumbers.parse(MSISDN, "en")
-
-            if not phonenumbers.is_valid_number(_number):
-                raise InvalidPhoneNUmber()
+        _number = self.__parse_phonenumber__(MSISDN=MSISDN)
 
-            # return phonenumbers.carrier.name_for_number(_number, "en")
-            return geocoder.description_for_number(_number, "en")
-
-        except phonenumbers.NumberParseException as error:
-            if (
-                error.error_type
-                == phonenumbers.NumberParseException.INVALID_COUNTRY_CODE
-            ):
-                if MSISDN[0] == "+" or MSISDN[0] == "0":
-                    raise InvalidCountryCode() from error
-                else:
-                    raise MissingCountryCode() from error
-            else:
-                raise error
-
-        except Exception as error:
-            raise error
+        return geocoder.description_for_number(_number, "en")
 
     def is_e164(self, MSISDN: str) -> str:
         import re
@@ -205,17 +196,48 @@ class CarrierInformation:
             raise error
 
     def get_operator_code(self, MSISDN: str) -> str:
-        """ """
-        MSISDN_country = self.__get_phonenumber_country__(MSISDN=MSISDN)
-        operator_name = self.__get_phonenumber_carrier_name__(MSISDN=MSISDN)
+        """Returns the MCC/MNC operator code of MSISDN, or None if unknown."""
+        _number = self.__parse_phonenumber__(MSISDN=MSISDN)
+
+        return self.__resolve_operator_code__(
+            country=geocoder.description_for_number(_number, "en"),
+            call_code=f"+{_number.country_code}",
+            operator_name=phonenumbers.carrier.name_for_number(_number, "en"),
+        )
+
+    def __resolve_operator_code__(
+        self, country: str, call_code: str, operator_name: str
+    ) -> str:
+        """Returns the operator code of an operator, or None if unknown.
+        Args:
+            country (str):
+                The country name, as given by the geocoder.
+            call_code (str):
+                The country calling code, used when the country name is
+                unknown and the code belongs to a single country.
+            operator_name (str):
+                The operator name, as given by the carrier lookup.
+        """
+        # Unnamed operators would match the table rows without a name
+        if not operator_name:
+            return None
+
+        carrier_data = get_carrier_data()
+        mccs = carrier_data.get_mccs_by_country(country)
+
+        # Shared calling codes, e.g. +1 or +7, do not tell the country
+        if not mccs and (
+            len(phonenumbers.region_codes_for_country_code(int(call_code[1:]))) == 1
+        ):
+            mccs = carrier_data.get_mccs_by_call_code(call_code)
+
+        for mcc in mccs:
+            operator_id = carrier_data.get_operator_code(mcc, operator_name)
 
-        operator_id = None
-        for IMSI, values in MCCMNC.MCC_dict.items():
-            if MSISDN_country == values[0]:
-                for key, values in MCCMNC.MNC_dict.items():
-                    if IMSI == key[0] and operator_name == values[1]:
-                        operator_id = values[0]
-                        return str(operator_id)
+            if operator_id is not None:
+                return str(operator_id)
+
+        return None
 
     def get_country_code(
         self, operator_code: str = None, phone_number: str = None
@@ -231,37 +253,29 @@ class CarrierInformation:
 
         if operator_code:
             cm_op_code = int(operator_code[0:3])
+            operator_details = get_carrier_data().get_mcc(cm_op_code)
 
-            if cm_op_code in MCCMNC.MCC_dict:
-                operator_details = MCCMNC.MCC_dict[cm_op_code]
-
+            if operator_details:
                 return str(operator_details[1])
 
         elif phone_number:
-            try:
-                _number = phonenumbers.parse(phone_number, "en")
+            _number = self.__parse_phonenumber__(MSISDN=phone_number)
 
-                if not phonenumbers.is_valid_number(_number):
-                    raise InvalidPhoneNUmber()
+            return _number.country_code
 
-                return _number.country_code
-
-            except phonenumbers.NumberParseException as error:
-                if (
-                    error.error_type
-                    == phonenumbers.NumberParseException.INVALID_COUNTRY_CODE
-                ):
-                    if phone_number[0] == "+" or phone_number[0] == "0":
-                        raise InvalidCountryCode() from error
+        return ""
 
-                    raise MissingCountryCode() from error
+    def get_routing_information(self, phone_number: str) -> tuple:
+        """
+        Retrieves the country code and operator name of a phone number, parsing it once.
 
-                raise error
+        :param phone_number: str - The phone number.
 
-            except Exception as error:
-                raise error
+        :return: tuple - The country code and the operator name.
+        """
+        _number = self.__parse_phonenumber__(MSISDN=phone_number)
 
-        return ""
+        return _number.country_code, phonenumbers.carrier.name_for_number(_number, "en")
 
     def validate_MSISDN(self, MSISDN: str) -> bool:
         try:
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+"""Prefix-trie carrier router.
+
+Compiles the number ranges of the phonenumbers carrier metadata into a digit
+trie, mapping country code + national prefix to a canonical carrier id.
+Routing a number is a longest-prefix match over its digits, without parsing
+or validating the number against the full phonenumbers metadata.
+"""
+
+import re
+import threading
+from array import array
+
+import phonenumbers
+from phonenumbers.carrierdata import CARRIER_DATA
+
+from src.utils.std_carrier_lib.helpers import InvalidPhoneNUmber
+
+E164_PATTERN = re.compile(r"^\+([1-9]\d{6,14})$")
+NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+NO_VALUE = -1
+
+
+def canonical_carrier_id(name: str) -> str:
+    """Returns a stable routing key for a carrier name, e.g. "mtn_cameroon"."""
+    return NON_ALPHANUMERIC.sub("_", name.lower()).strip("_")
+
+
+class PrefixTrie:
+    """
+    A digit trie stored in flat arrays.
+
+    Node n's child for digit d is children[n * 10 + d], 0 meaning no child,
+    and values[n] is the index of the value stored at n, or -1.
+    """
+
+    def __init__(self):
+        self.children = array("i", [0] * 10)
+        self.values = array("i", [NO_VALUE])
+        self.labels = []
+        self.label_indexes = {}
+
+    def insert(self, prefix: str, label: str) -> None:
+        """Stores a label at a digit prefix."""
+        node = 0
+
+        for digit in prefix:
+            slot = node * 10 + ord(digit) - 48
+            child = self.children[slot]
+
+            if not child:
+                child = len(self.values)
+                self.children[slot] = child
+                self.children.extend([0] * 10)
+                self.values.append(NO_VALUE)
+
+            node = child
+
+        if label not in self.label_indexes:
+            self.label_indexes[label] = len(self.labels)
+            self.labels.append(label)
+
+        self.values[node] = self.label_indexes[label]
+
+    def longest_match(self, digits: str, start: int = 0) -> tuple:
+        """
+        Returns the label of the longest stored prefix of digits[start:].
+
+        :param digits: str - The digits to match.
+        :param start: int - The position to start matching from.
+
+        :return: tuple - The label (or None) and the length of the matched prefix.
+        """
+        children = self.children
+        values = self.values
+
+        node = 0
+        best = NO_VALUE
+        length = 0
+
+        for position in range(start, len(digits)):
+            node = children[node * 10 + ord(digits[position]) - 48]
+
+            if not node:
+                break
+
+            if values[node] != NO_VALUE:
+                best = values[node]
+                length = position - start + 1
+
+        if best == NO_VALUE:
+            return None, 0
+
+        return self.labels[best], length
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PrefixRouter:
+    """Routes E.164 numbers to (country code, carrier id) by prefix."""
+
+    def __init__(self, carrier_data: dict = None):
+        self.country_codes = PrefixTrie()
+        self.carriers = PrefixTrie()
+
+        for country_code in phonenumbers.COUNTRY_CODE_TO_REGION_CODE:
+            self.country_codes.insert(str(country_code), str(country_code))
+
+        for prefix, names in (carrier_data or CARRIER_DATA).items():
+            name = names.get("en")
+
+            if name:
+                self.carriers.insert(prefix, canonical_carrier_id(name))
+
+    def route(self, phone_number: str) -> tuple:
+        """
+        Returns the country code and carrier id of a phone number.
+
+        :param phone_number: str - The phone number in E.164 format.
+
+        :return: tuple - The country code and the carrier id ("" if unknown).
+
+        :raises InvalidPhoneNUmber: If the number is not in E.164 format or
+            its country code is unknown.
+        """
+        match = E164_PATTERN.match(phone_number.replace(" ", ""))
+
+        if not match:
+            raise InvalidPhoneNUmber()
+
+        digits = match.group(1)
+        country_code, _ = self.country_codes.longest_match(digits)
+
+        if not country_code:
+            raise InvalidPhoneNUmber()
+
+        carrier_id, _ = self.carriers.longest_match(digits)
+
+        return int(country_code), carrier_id or ""
+
+
+_prefix_router = None
+_prefix_router_lock = threading.Lock()
+
+
+def get_prefix_router() -> PrefixRouter:
+    """Returns the prefix router, compiling it on first use."""
+    global _prefix_router  # pylint: disable=global-statement
+
+    if _prefix_router is None:
+        with _prefix_router_lock:
+            if _prefix_router is None:
+                _prefix_router = PrefixRouter()
+
+    return _prefix_router
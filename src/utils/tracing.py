@@ -0,0 +1,254 @@
+"""Tracing Module
+
+Lightweight spans around the stages of a request. The current span is kept in
+a context variable, so spans opened while another span is active become its
+children. Finished spans are handed to the configured exporter:
+
+- "log": one log line per span.
+- "file": OTLP/JSON trace requests, one per line, appended to TRACING_FILE.
+
+Tracing is disabled unless TRACING_EXPORTER is set, in which case opening a
+span costs a single check.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+from settings import Configurations
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "deku-cloud"
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed stage of a trace.
+
+    Attributes:
+        name (str): The name of the stage.
+        trace_id (str): The 32 hex digit ID shared by all spans of a trace.
+        span_id (str): The 16 hex digit ID of the span.
+        parent_id (str): The span ID of the parent span, or None.
+        attributes (dict): Attributes describing the stage.
+        start_ns (int): Start time in nanoseconds since the epoch.
+        end_ns (int): End time in nanoseconds since the epoch.
+        error (str): The error that ended the span, or None.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(self, name: str, parent=None, attributes: dict = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        """The duration of the span in milliseconds."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value) -> None:
+        """Sets an attribute of the span."""
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        """Returns the span in the OTLP/JSON span format."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+
+        return span
+
+
+def otlp_value(value) -> dict:
+    """Returns an attribute value in the OTLP/JSON AnyValue format."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+
+    if isinstance(value, float):
+        return {"doubleValue": value}
+
+    return {"stringValue": str(value)}
+
+
+class LogExporter:
+    """Logs one line per finished span."""
+
+    def export(self, span: Span) -> None:
+        """Exports a finished span."""
+        logger.info(
+            "span %s trace=%s span=%s parent=%s duration_ms=%.3f%s %s",
+            span.name,
+            span.trace_id,
+            span.span_id,
+            span.parent_id,
+            span.duration_ms,
+            f" error={span.error!r}" if span.error else "",
+            span.attributes,
+        )
+
+
+class FileExporter:
+    """Appends finished spans to a file as OTLP/JSON trace requests."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Exports a finished span."""
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                {
+                                    "key": "service.name",
+                                    "value": {"stringValue": SERVICE_NAME},
+                                }
+                            ]
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": __name__}, "spans": [span.to_otlp()]}
+                        ],
+                    }
+                ]
+            }
+        )
+
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+
+def create_exporter(name: str):
+    """
+    Creates the exporter configured by name.
+
+    :param name: str - "log", "file", or empty to disable tracing.
+
+    :return: The exporter, or None if tracing is disabled.
+    """
+    if not name:
+        return None
+
+    if name == "log":
+        return LogExporter()
+
+    if name == "file":
+        return FileExporter(path=Configurations.TRACING_FILE)
+
+    raise ValueError(f"Invalid tracing exporter: {name}")
+
+
+exporter = create_exporter(Configurations.TRACING_EXPORTER)
+
+
+def start_span(name: str, **attributes):
+    """
+    Starts a span as a child of the current span and makes it current.
+
+    :param name: str - The name of the stage.
+    :param attributes: Attributes describing the stage.
+
+    :return: tuple - The span and the token to pass to `end_span`,
+        or (None, None) if tracing is disabled.
+    """
+    if exporter is None:
+        return None, None
+
+    span = Span(name=name, parent=current_span.get(), attributes=attributes)
+
+    return span, current_span.set(span)
+
+
+def end_span(span: Span, token, error: Exception = None) -> None:
+    """
+    Ends a span started with `start_span` and exports it.
+
+    :param span: Span - The span to end.
+    :param token: The token returned by `start_span`.
+    :param error: Exception, optional - The error that ended the span.
+    """
+    if span is None:
+        return
+
+    span.end_ns = time.time_ns()
+
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+
+    try:
+        current_span.reset(token)
+    except ValueError:
+        # Ended in a different context than it was started in.
+        current_span.set(None)
+
+    try:
+        exporter.export(span)
+    except Exception as export_error:  # pylint: disable=broad-exception-caught
+        logger.error("Failed to export span '%s': %s", span.name, export_error)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    Traces the enclosed block as a span.
+
+    :param name: str - The name of the stage.
+    :param attributes: Attributes describing the stage.
+
+    :return: The span, or None if tracing is disabled.
+    """
+    if exporter is None:
+        yield None
+        return
+
+    started, token = start_span(name, **attributes)
+
+    try:
+        yield started
+    except BaseException as error:
+        end_span(started, token, error=error)
+        raise
+
+    end_span(started, token)
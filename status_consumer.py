@@ -0,0 +1,287 @@
+"""Delivery status consumer.
+
+Deku clients publish delivery status events to the status queue of their
+account's virtual host. This process drains every tenant's status queue and
+applies the events to the logs in batches, with one UPDATE per status.
+Messages are acknowledged only after the batch has been committed.
+
+Status events are JSON objects (or arrays of objects) of the form
+{"id": <log_id>, "status": "delivered"} or {"sid": <sid>, "status": "failed"}.
+
+Each process holds one connection per tenant. With many tenants, run several
+processes with --shards N and a different --shard each, every process then
+consumes the tenants whose account_sid hashes to its shard.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+
+import pika
+
+from settings import Configurations
+from src.orm.peewee.connector import database
+from src.orm.peewee.handlers.user import UserHandler
+from src.controllers.log import update_logs_status
+from src.utils import rabbitmq
+from src.utils.broker_topology import hash_key, topology
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUE = Configurations.RABBITMQ_STATUS_QUEUE
+RECONNECT_DELAY = 5
+
+
+class StatusConsumer(threading.Thread):
+    """
+    Drains the status queue of a single tenant virtual host.
+
+    Attributes:
+        user_id (int): The ID of the user who owns the virtual host.
+        account_sid (str): The user's account_sid, which names the virtual host.
+        batch_size (int): The maximum number of messages applied per batch.
+        flush_interval (float): The maximum seconds a partial batch waits.
+    """
+
+    def __init__(
+        self, user_id: int, account_sid: str, batch_size: int, flush_interval: float
+    ):
+        super().__init__(name=f"status-{account_sid}", daemon=True)
+
+        self.user_id = user_id
+        self.account_sid = account_sid
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        """Consume until stopped, reconnecting after failures."""
+
+        while not self.stopped.is_set():
+            try:
+                self.consume()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logger.error(
+                    "Status consumer for '%s' failed: %s", self.account_sid, error
+                )
+                self.stopped.wait(RECONNECT_DELAY)
+
+    def stop(self):
+        """Ask the consumer to stop after its current batch."""
+
+        self.stopped.set()
+
+    def current_node(self) -> str:
+        """Returns the RabbitMQ node the tenant is assigned to."""
+
+        with database.connection_context():
+            return topology.node_of(self.account_sid)
+
+    def consume(self):
+        """Collect messages into batches and flush them.
+
+        Once the queue is idle, the consumer reconnects if the tenant was
+        moved to another node, so the old node's queue is drained first.
+        """
+
+        node = self.current_node()
+        conn_params = rabbitmq.get_connection_parameters(
+            virtual_host=self.account_sid, node=node
+        )
+
+        with pika.BlockingConnection(conn_params) as connection:
+            channel = connection.channel()
+            channel.queue_declare(queue=STATUS_QUEUE, durable=True)
+            channel.basic_qos(prefetch_count=self.batch_size)
+
+            batch = []
+            deadline = None
+
+            for method, _, body in channel.consume(
+                STATUS_QUEUE, inactivity_timeout=self.flush_interval
+            ):
+                if self.stopped.is_set():
+                    break
+
+                if method:
+                    batch.append((method.delivery_tag, body))
+
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if batch and (
+                    len(batch) >= self.batch_size
+                    or method is None
+                    or time.monotonic() >= deadline
+                ):
+                    self.flush(channel=channel, batch=batch)
+                    batch = []
+                    deadline = None
+
+                if method is None and not batch:
+                    new_node = self.current_node()
+
+                    if new_node != node:
+                        logger.info(
+                            "Status consumer for '%s' is moving to '%s'",
+                            self.account_sid,
+                            new_node,
+                        )
+                        break
+
+            # Unacknowledged messages are requeued when the connection closes.
+            channel.cancel()
+
+    def flush(self, channel, batch: list):
+        """
+        Apply a batch of status events and acknowledge it.
+
+        :param channel: The channel the messages were consumed from.
+        :param batch: list - (delivery_tag, body) pairs in delivery order.
+        """
+        events = []
+
+        for _, body in batch:
+            try:
+                event = json.loads(body)
+            except ValueError:
+                logger.error("Dropping malformed status event: %s", body)
+                continue
+
+            events.extend(event if isinstance(event, list) else [event])
+
+        with database.connection_context():
+            updated = update_logs_status(user_id=self.user_id, items=events)
+
+        channel.basic_ack(delivery_tag=batch[-1][0], multiple=True)
+
+        logger.info(
+            "Applied %d status events for '%s': %s",
+            len(events),
+            self.account_sid,
+            updated,
+        )
+
+
+def in_shard(account_sid: str, shard: int, shards: int) -> bool:
+    """
+    Checks whether a tenant is consumed by a shard.
+
+    :param account_sid: str - The tenant's account_sid.
+    :param shard: int - The shard, from 0 to shards - 1.
+    :param shards: int - The number of shards.
+
+    :return: bool - True if the shard consumes the tenant.
+    """
+    return hash_key(account_sid) % shards == shard
+
+
+def run_consumers(
+    batch_size: int,
+    flush_interval: float,
+    refresh_interval: float,
+    shard: int = 0,
+    shards: int = 1,
+):
+    """
+    Keep one consumer running per tenant virtual host of a shard.
+
+    The list of tenants is refreshed periodically so new accounts are picked
+    up and consumers for deleted accounts are stopped.
+
+    :param batch_size: int - The maximum number of messages applied per batch.
+    :param flush_interval: float - The maximum seconds a partial batch waits.
+    :param refresh_interval: float - Seconds between tenant list refreshes.
+    :param shard: int - The shard consumed by this process, from 0 to shards - 1.
+    :param shards: int - The number of consumer processes.
+    """
+    user_handler = UserHandler()
+    consumers = {}
+
+    while True:
+        try:
+            with database.connection_context():
+                users_list = user_handler.get_users_by_field()[1]
+
+            account_sids = set()
+
+            for user in users_list:
+                if not in_shard(user.account_sid, shard=shard, shards=shards):
+                    continue
+
+                account_sids.add(user.account_sid)
+                consumer = consumers.get(user.account_sid)
+
+                if consumer and consumer.is_alive():
+                    continue
+
+                consumer = StatusConsumer(
+                    user_id=user.id,
+                    account_sid=user.account_sid,
+                    batch_size=batch_size,
+                    flush_interval=flush_interval,
+                )
+                consumer.start()
+                consumers[user.account_sid] = consumer
+
+            for account_sid in set(consumers).difference(account_sids):
+                consumers.pop(account_sid).stop()
+
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error("Failed to refresh status consumers: %s", error)
+
+        time.sleep(refresh_interval)
+
+
+def main():
+    """Command line interface for the status consumer."""
+
+    parser = argparse.ArgumentParser(description="Consume delivery status events")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=Configurations.STATUS_BATCH_SIZE,
+        help="maximum number of events applied per batch",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=Configurations.STATUS_FLUSH_INTERVAL,
+        help="maximum seconds a partial batch waits before it is applied",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=Configurations.STATUS_SHARDS,
+        help="number of consumer processes sharing the tenants",
+    )
+    parser.add_argument(
+        "--shard",
+        type=int,
+        default=0,
+        help="shard consumed by this process, from 0 to shards - 1",
+    )
+    parser.add_argument("--logs", default="info", help="Set log level")
+    args = parser.parse_args()
+
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+
+    logging.basicConfig(level=getattr(logging, args.logs.upper()))
+
+    run_consumers(
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        refresh_interval=Configurations.STATUS_REFRESH_INTERVAL,
+        shard=args.shard,
+        shards=args.shards,
+    )
+
+
+if __name__ == "__main__":
+    main()
+
+# python status_consumer.py --batch-size 500 --flush-interval 1
+# python status_consumer.py --shards 4 --shard 0